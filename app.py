@@ -1,66 +1,154 @@
-from flask import Flask, request, jsonify, send_from_directory, send_file
-from flask_migrate import Migrate # Added for Flask-Migrate
+from flask import Blueprint, Flask, Response, current_app, request, jsonify, send_from_directory, send_file, render_template, stream_with_context
 import logging
+from app_logging import configure_logging
+from template_cache import configure_template_cache
+from json_provider import configure_json
+import guide_enrichment
+import feedback_queue
+import event_stream
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy import desc, func
+from sqlalchemy import desc, func, text
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from decimal import Decimal
-import bcrypt
 import os
-from werkzeug.utils import secure_filename
 
 # Import db instance and all models from models.py
-from models import db, User, Product, ApplicationSetting, Prompt, ShowcaseProject, Guide, Project as ProjectData, Feedback # Added Feedback model
-
-app = Flask(__name__)
+from models import db, User, Product, ApplicationSetting, Prompt, ShowcaseProject, Guide, Project as ProjectData
+from pagination import NEXT_CURSOR_HEADER, PaginationError
+from showcase_query import ShowcaseQuery
+from product_query import ProductLookup, ProductQuery
+from project_feed import FIRST_PAGE_SIZE, ProjectFeedQuery
+from feedback_query import FeedbackQuery, feedback_counts
+from export_data import EXPORT_UNTIL_HEADER, ExportSpec, stream_export
+from change_feed import ChangeQuery
+from page_cache import page_cache
+from url_normalize import InvalidURL, url_hash, validate_url
+from idempotency import idempotent
+from serializers import SERIALIZERS
+from response_formats import JSON, encode, negotiate
+from compression import compression_level, init_compression
+from batch import BatchError, parse_batch, run_batch
+from read_routing import init_read_routing, read_only
+import stock_reservations
+from stock_reservations import ReservationError
+
+# bcrypt, Flask-Migrate (alembic) and the upload helpers are imported where they
+# are used, so scripts, tests and serverless cold starts only pay for what they
+# touch. `python -m benchmarks.startup` measures the import and factory cost.
 
 # --- Configuration ---
-# General Flask settings
-UPLOAD_FOLDER = 'uploads/showcase_images' # Used by ShowcaseProject
-app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
-app.config['ALLOWED_EXTENSIONS'] = {'png', 'jpg', 'jpeg', 'gif'} # Used by ShowcaseProject
-
-# SQLAlchemy settings for Flask-SQLAlchemy
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///projects.db' # Database URI
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False # Disable modification tracking
-
-# Initialize extensions
-db.init_app(app) # Initialize Flask-SQLAlchemy
-migrate = Migrate(app, db) # Initialize Flask-Migrate
-
-# Ensure the upload folder exists
-if not os.path.exists(UPLOAD_FOLDER):
-    os.makedirs(UPLOAD_FOLDER)
+DEFAULT_CONFIG = {
+    # General Flask settings
+    'UPLOAD_FOLDER': 'uploads/showcase_images', # Used by ShowcaseProject, created on the first upload
+    'ALLOWED_EXTENSIONS': {'png', 'jpg', 'jpeg', 'gif'}, # Used by ShowcaseProject
+    # SQLAlchemy settings for Flask-SQLAlchemy
+    'SQLALCHEMY_TRACK_MODIFICATIONS': False, # Disable modification tracking
+}
+
+bp = Blueprint('main', __name__)
+
+def create_app(config=None):
+    """Build the Flask app; `config` entries override the defaults and the environment"""
+    app = Flask(__name__)
+    app.config.update(DEFAULT_CONFIG)
+    app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL', 'sqlite:///projects.db') # Database URI
+    app.config.update(config or {})
+
+    # Initialize extensions
+    db.init_app(app) # Initialize Flask-SQLAlchemy
+    init_read_routing(app) # Read-only pool for @read_only GETs, see read_routing.py
+    configure_json(app) # jsonify through orjson when installed, see json_provider.py
+    init_compression(app) # gzip/brotli per Accept-Encoding, see compression.py
+    configure_logging(app) # Queue-based JSON logging, see app_logging.py
+    # `flask db ...` needs Flask-Migrate; nothing else does, so skip importing alembic otherwise
+    if os.environ.get('FLASK_RUN_FROM_CLI') == 'true' or app.config.get('ENABLE_MIGRATIONS'):
+        init_migrations(app)
+
+    app.register_blueprint(bp)
+    configure_template_cache(app) # Jinja bytecode cache, see template_cache.py
+    guide_enrichment.init_enrichment(app) # Link previews for new guides, started on first use
+    feedback_queue.init_queue(app) # Write-behind log for feedback submissions, replayed from the first request
+    event_stream.init_event_stream(app) # /events fan-out, polling started by the first subscriber
+    return app
+
+def init_migrations(app):
+    from flask_migrate import Migrate
+    return Migrate(app, db)
+
+def __getattr__(name):
+    # `from app import app` (Flask CLI discovery, WSGI servers, older scripts)
+    # builds the default app on first access instead of at import
+    if name == 'app':
+        global app
+        app = create_app()
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # Helper function for file uploads (used by ShowcaseProject)
 def allowed_file(filename):
     return '.' in filename and \
-           filename.rsplit('.', 1)[1].lower() in app.config['ALLOWED_EXTENSIONS']
+           filename.rsplit('.', 1)[1].lower() in current_app.config['ALLOWED_EXTENSIONS']
+
+# Column sizes of the Feedback model (details is Text, capped to keep queue lines small),
+# checked before a submission is queued
+FEEDBACK_FIELD_LIMITS = {'feedback_type': 20, 'summary': 200, 'details': 100_000, 'email': 120}
+
+# Helper for keyset-paginated list endpoints (see pagination.py)
+def paginated_response(items, next_cursor):
+    response = jsonify(items)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return response
+
+# Helper for list endpoints that speak the formats in response_formats.py
+def negotiated_response(serializer, rows):
+    mimetype = negotiate(request.headers.get('Accept'))
+    if mimetype == JSON:
+        response = jsonify(serializer.rows(rows))
+    else:
+        response = Response(encode(mimetype, serializer, rows), mimetype=mimetype)
+    response.vary.add('Accept')
+    return response
 
 # --- Routes ---
 
-from flask import render_template # Add render_template
-
-@app.route("/")
+@bp.route("/")
+@read_only
 def hello():
     try:
-        submitted_projects = db.session.query(ProjectData).all()
+        # Cached until the change log moves on (see page_cache.py)
+        return page_cache.respond('index', render_index, change_log_head)
     except Exception as e:
-        app.logger.error(f"Error fetching project data for / route: {e}")
-        submitted_projects = [] # Present an empty list on error
-    # Assuming index.html will be updated to display these projects
-    # and also other content it might already have.
-    # For now, we just pass the projects.
-    # The existing ShowcaseProjects are typically shown on showcase.html,
-    # so this will be for the newly added 'ProjectData' type projects.
-    return render_template("index.html", submitted_projects=submitted_projects)
+        current_app.logger.error(f"Error fetching project data for / route: {e}")
+        # Present an empty list on error, without caching the degraded page
+        return render_template("index.html", submitted_projects=[])
+
+def change_log_head():
+    # Every write to projects_data, by any process, logs a change with a higher seq (see change_feed.py)
+    return db.session.execute(text('SELECT COALESCE(MAX(seq), 0) FROM change_log')).scalar()
+
+def render_index():
+    # Only the newest projects are rendered; script.js loads the rest from the
+    # feed, starting at next_cursor, as the visitor scrolls
+    feed_query = ProjectFeedQuery(limit=FIRST_PAGE_SIZE)
+    sql, params = feed_query.sql()
+    submitted_projects, next_cursor = feed_query.paginate(db.session.execute(text(sql), params).fetchall())
+    return render_template("index.html", submitted_projects=submitted_projects, next_cursor=next_cursor)
+
+@bp.route('/cache/stats', methods=['GET'])
+def page_cache_stats():
+    return jsonify(page_cache.stats())
 
 # --- User Routes ---
-@app.route('/users', methods=['POST'])
+@bp.route('/users', methods=['POST'])
+@idempotent
 def create_user():
     data = request.get_json()
     if not data or not data.get('username') or not data.get('email') or not data.get('password'):
         return jsonify({"error": "Missing username, email, or password"}), 400
 
+    import bcrypt # Only sign-up needs it
+
     try:
         hashed_password = bcrypt.hashpw(data['password'].encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
         new_user = User(
@@ -76,10 +164,10 @@ def create_user():
         return jsonify({"error": "Username or email already exists"}), 409
     except Exception as e:
         db.session.rollback()
-        app.logger.error(f"Error creating user: {e}")
+        current_app.logger.error(f"Error creating user: {e}")
         return jsonify({"error": str(e)}), 500
 
-@app.route('/users/<int:user_id>', methods=['GET'])
+@bp.route('/users/<int:user_id>', methods=['GET'])
 def get_user(user_id):
     try:
         user = db.session.get(User, user_id) # More modern way to get by primary key
@@ -92,11 +180,12 @@ def get_user(user_id):
             })
         return jsonify({"error": "User not found"}), 404
     except Exception as e:
-        app.logger.error(f"Error getting user {user_id}: {e}")
+        current_app.logger.error(f"Error getting user {user_id}: {e}")
         return jsonify({"error": str(e)}), 500
 
 # --- Product Routes ---
-@app.route('/products', methods=['POST'])
+@bp.route('/products', methods=['POST'])
+@idempotent
 def add_product():
     data = request.get_json()
     if not data or not data.get('name') or data.get('price') is None:
@@ -121,23 +210,74 @@ def add_product():
         return jsonify({"error": "Invalid price format"}), 400
     except Exception as e:
         db.session.rollback()
-        app.logger.error(f"Error adding product: {e}")
+        current_app.logger.error(f"Error adding product: {e}")
         return jsonify({"error": str(e)}), 500
 
-@app.route('/products', methods=['GET'])
+@bp.route('/products', methods=['GET'])
+@read_only
 def list_products():
     try:
-        products = db.session.query(Product).all()
-        return jsonify([{
-            "id": p.id, "name": p.name, "description": p.description,
-            "price": str(p.price), "sku": p.sku, "stock_quantity": p.stock_quantity
-        } for p in products])
+        # Filtered, sorted and keyset-paginated on the catalog indexes (see product_query.py)
+        product_query = ProductQuery.from_args(request.args)
+        sql, params = product_query.sql(lambda sql, params: db.session.execute(text(sql), params).scalar())
+        rows = db.session.execute(text(sql), params).fetchall()
+        return paginated_response(*product_query.paginate(rows))
+    except PaginationError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
-        app.logger.error(f"Error listing products: {e}")
+        current_app.logger.error(f"Error listing products: {e}")
         return jsonify({"error": str(e)}), 500
 
+@bp.route('/products/lookup', methods=['GET'])
+@read_only
+def lookup_products():
+    try:
+        lookup = ProductLookup.from_args(request.args)
+        sql, params = lookup.sql()
+        return jsonify(lookup.respond(db.session.execute(text(sql), params).fetchall()))
+    except PaginationError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        current_app.logger.error(f"Error looking up products: {e}")
+        return jsonify({"error": str(e)}), 500
+
+# --- Stock Reservation Routes ---
+# Stock is taken and put back with conditional UPDATEs, never read-modify-write (see stock_reservations.py)
+@bp.route('/stock/reservations', methods=['POST'])
+@idempotent
+def reserve_stock():
+    try:
+        items, ttl = stock_reservations.parse_reservation(request.get_json(silent=True), current_app)
+        reservation = stock_reservations.reserve(db.session, items, ttl)
+        return jsonify({"message": "Stock reserved", "reservation": reservation}), 201
+    except ReservationError as e:
+        return jsonify(e.details()), e.status
+    except Exception as e:
+        current_app.logger.error(f"Error reserving stock: {e}", exc_info=True)
+        return jsonify({"error": "An unexpected error occurred."}), 500
+
+@bp.route('/stock/reservations/<string:token>/commit', methods=['POST'])
+def commit_reservation(token):
+    try:
+        return jsonify({"message": "Reservation committed", "reservation": stock_reservations.commit(db.session, token)})
+    except ReservationError as e:
+        return jsonify(e.details()), e.status
+    except Exception as e:
+        current_app.logger.error(f"Error committing reservation {token}: {e}", exc_info=True)
+        return jsonify({"error": "An unexpected error occurred."}), 500
+
+@bp.route('/stock/reservations/<string:token>/release', methods=['POST'])
+def release_reservation(token):
+    try:
+        return jsonify({"message": "Reservation released", "reservation": stock_reservations.release(db.session, token)})
+    except ReservationError as e:
+        return jsonify(e.details()), e.status
+    except Exception as e:
+        current_app.logger.error(f"Error releasing reservation {token}: {e}", exc_info=True)
+        return jsonify({"error": "An unexpected error occurred."}), 500
+
 # --- Application Settings Routes ---
-@app.route('/settings/<string:key>', methods=['GET'])
+@bp.route('/settings/<string:key>', methods=['GET'])
 def get_setting(key):
     try:
         setting = db.session.query(ApplicationSetting).filter(ApplicationSetting.key == key).first()
@@ -145,10 +285,11 @@ def get_setting(key):
             return jsonify({"key": setting.key, "value": setting.value, "description": setting.description})
         return jsonify({"error": "Setting not found"}), 404
     except Exception as e:
-        app.logger.error(f"Error getting setting {key}: {e}")
+        current_app.logger.error(f"Error getting setting {key}: {e}")
         return jsonify({"error": str(e)}), 500
 
-@app.route('/settings', methods=['POST'])
+@bp.route('/settings', methods=['POST'])
+@idempotent
 def create_or_update_setting():
     data = request.get_json()
     if not data or not data.get('key'):
@@ -172,14 +313,17 @@ def create_or_update_setting():
         return jsonify({"message": message, "setting": {"key": setting.key, "value": setting.value}}), 200 if message == "Setting updated" else 201
     except Exception as e:
         db.session.rollback()
-        app.logger.error(f"Error creating/updating setting: {e}")
+        current_app.logger.error(f"Error creating/updating setting: {e}")
         return jsonify({"error": str(e)}), 500
 
 # --- Prompt Routes ---
-@app.route('/prompts', methods=['GET'])
+@bp.route('/prompts', methods=['GET'])
+@read_only
+@compression_level(gzip=9, br=9) # Requested again unchanged, so compressed once and reused
 def get_prompts():
     try:
-        query = db.session.query(Prompt)
+        serializer = SERIALIZERS['prompts']
+        query = db.session.query(*serializer.select_columns(Prompt.__table__))
         category = request.args.get('category')
         if category:
             query = query.filter(Prompt.category == category)
@@ -198,31 +342,28 @@ def get_prompts():
             query = query.order_by(Prompt.title)
         elif sort_by == 'rating':
             query = query.order_by(desc(Prompt.rating))
-        prompts = query.all()
-        return jsonify([{
-            "id": p.id, "title": p.title, "category": p.category, "description": p.description,
-            "prompt_text": p.prompt_text, "rating": str(p.rating) if p.rating is not None else None,
-            "usage_count": p.usage_count, "created_at": p.created_at.isoformat() if p.created_at else None
-        } for p in prompts])
+        return negotiated_response(serializer, query.all())
     except Exception as e:
-        app.logger.error(f"Error getting prompts: {e}")
+        current_app.logger.error(f"Error getting prompts: {e}")
         return jsonify({"error": str(e)}), 500
 
-@app.route('/prompts/categories', methods=['GET'])
+@bp.route('/prompts/categories', methods=['GET'])
+@read_only
 def get_prompt_categories():
     try:
         categories = db.session.query(Prompt.category, func.count(Prompt.category).label('count')).group_by(Prompt.category).order_by(Prompt.category).all()
         return jsonify([{"name": cat, "count": count} for cat, count in categories])
     except Exception as e:
-        app.logger.error(f"Error getting prompt categories: {e}")
+        current_app.logger.error(f"Error getting prompt categories: {e}")
         return jsonify({"error": str(e)}), 500
 
-@app.route('/prompts', methods=['POST'])
+@bp.route('/prompts', methods=['POST'])
+@idempotent
 def create_prompt():
     data = request.get_json()
-    app.logger.info(f"Received prompt submission data: {data}")
+    current_app.logger.info("Received prompt submission", extra={"hot_path": True, "payload": data})
     if not data or not data.get('title') or not data.get('category') or not data.get('prompt_text'):
-        app.logger.warning("Prompt submission failed: Missing title, category, or prompt_text.")
+        current_app.logger.warning("Prompt submission failed: Missing title, category, or prompt_text.")
         return jsonify({"error": "Missing title, category, or prompt_text"}), 400
 
     try:
@@ -235,33 +376,25 @@ def create_prompt():
         )
         db.session.add(new_prompt)
         db.session.commit()
-        app.logger.info(f"Prompt committed to database. New prompt ID: {new_prompt.id}")
-        response_data = {
-            "message": "Prompt created",
-            "prompt": {
-                "id": new_prompt.id, "title": new_prompt.title, "category": new_prompt.category,
-                "description": new_prompt.description, "prompt_text": new_prompt.prompt_text,
-                "rating": str(new_prompt.rating) if new_prompt.rating is not None else None,
-                "usage_count": new_prompt.usage_count,
-                "created_at": new_prompt.created_at.isoformat() if new_prompt.created_at else None
-            }
-        }
-        return jsonify(response_data), 201
+        current_app.logger.info("Prompt committed to database", extra={"hot_path": True, "prompt_id": new_prompt.id})
+        event_stream.notify(current_app)
+        return jsonify({"message": "Prompt created", "prompt": SERIALIZERS['prompts'].obj(new_prompt)}), 201
     except ValueError:
         db.session.rollback()
-        app.logger.error(f"ValueError during prompt creation (rating format?). Data: {data}")
+        current_app.logger.error("ValueError during prompt creation (rating format?)", extra={"payload": data})
         return jsonify({"error": "Invalid rating format. Must be a number."}), 400
     except IntegrityError as ie:
         db.session.rollback()
-        app.logger.error(f"IntegrityError during prompt creation: {ie}. Data: {data}")
+        current_app.logger.error(f"IntegrityError during prompt creation: {ie}", extra={"payload": data})
         return jsonify({"error": "Database integrity error."}), 409
     except Exception as e:
         db.session.rollback()
-        app.logger.error(f"Unhandled exception during prompt creation: {e}. Data: {data}", exc_info=True)
+        current_app.logger.error(f"Unhandled exception during prompt creation: {e}", extra={"payload": data}, exc_info=True)
         return jsonify({"error": "An unexpected error occurred."}), 500
 
 # --- Showcase Project Routes ---
-@app.route('/showcase/projects', methods=['POST'])
+@bp.route('/showcase/projects', methods=['POST'])
+@idempotent
 def create_showcase_project():
     try:
         title = request.form.get('project-title')
@@ -276,8 +409,10 @@ def create_showcase_project():
         if 'project-image' in request.files:
             file = request.files['project-image']
             if file and file.filename != '' and allowed_file(file.filename):
+                from werkzeug.utils import secure_filename
                 filename = secure_filename(file.filename)
-                file.save(os.path.join(app.config['UPLOAD_FOLDER'], filename))
+                os.makedirs(current_app.config['UPLOAD_FOLDER'], exist_ok=True)
+                file.save(os.path.join(current_app.config['UPLOAD_FOLDER'], filename))
                 image_filename = filename
             elif file.filename != '':
                 return jsonify({"error": "Invalid image file type."}), 400
@@ -288,141 +423,162 @@ def create_showcase_project():
         )
         db.session.add(new_project)
         db.session.commit()
+        event_stream.notify(current_app)
         return jsonify({
             "message": "Project submitted successfully!",
-            "project": {
-                "id": new_project.id, "title": new_project.title, "category": new_project.category,
-                "description": new_project.description, "link": new_project.link,
-                "image_filename": new_project.image_filename,
-                "submitted_at": new_project.submitted_at.isoformat() if new_project.submitted_at else None
-            }
+            "project": SERIALIZERS['showcase_projects'].obj(new_project)
         }), 201
     except Exception as e:
         db.session.rollback()
-        app.logger.error(f"Error creating showcase project: {e}")
+        current_app.logger.error(f"Error creating showcase project: {e}")
         return jsonify({"error": "An internal error occurred: " + str(e)}), 500
 
-@app.route('/showcase/projects', methods=['GET'])
+@bp.route('/showcase/projects', methods=['GET'])
+@read_only
 def get_showcase_projects():
     try:
-        projects = db.session.query(ShowcaseProject).order_by(desc(ShowcaseProject.submitted_at)).all()
-        return jsonify([{
-            "id": p.id, "title": p.title, "category": p.category, "description": p.description,
-            "link": p.link, "image_url": f"/uploads/showcase_images/{p.image_filename}" if p.image_filename else None,
-            "image_filename": p.image_filename,
-            "submitted_at": p.submitted_at.isoformat() if p.submitted_at else None
-        } for p in projects])
+        showcase_query = ShowcaseQuery.from_args(request.args)
+        sql, params = showcase_query.sql()
+        rows = db.session.execute(text(sql), params).fetchall()
+        return paginated_response(*showcase_query.paginate(rows))
+    except PaginationError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
-        app.logger.error(f"Error fetching showcase projects: {e}")
+        current_app.logger.error(f"Error fetching showcase projects: {e}")
         return jsonify({"error": "An internal error occurred: " + str(e)}), 500
 
-@app.route('/uploads/showcase_images/<filename>')
+@bp.route('/uploads/showcase_images/<filename>')
 def uploaded_showcase_image(filename):
-    return send_from_directory(app.config['UPLOAD_FOLDER'], filename)
+    return send_from_directory(current_app.config['UPLOAD_FOLDER'], filename)
 
 # --- Static File Routes ---
-@app.route('/style.css')
+@bp.route('/style.css')
 def serve_css():
     return send_file('style.css', mimetype='text/css')
 
-@app.route('/script.js')
+@bp.route('/script.js')
 def serve_js():
     return send_file('script.js', mimetype='application/javascript')
 
-@app.route('/image.png')
+@bp.route('/image.png')
 def serve_image():
     return send_file('image.png', mimetype='image/png')
 
-@app.route('/placeholder.jpg')
+@bp.route('/placeholder.jpg')
 def serve_placeholder():
     return send_file('placeholder.jpg', mimetype='image/jpeg')
 
-@app.route('/nyc_subway_map_optimized.jpg')
+@bp.route('/nyc_subway_map_optimized.jpg')
 def serve_subway_map_texture():
     return send_file('nyc_subway_map_optimized.jpg', mimetype='image/jpeg')
 
-@app.route('/3d-engine-scene-data.js')
+@bp.route('/3d-engine-scene-data.js')
 def serve_3d_engine_scene_data():
     return send_file('3d-engine-scene-data.js', mimetype='application/javascript')
 
-@app.route('/3d-engine.js')
+@bp.route('/3d-engine.js')
 def serve_3d_engine():
     return send_file('3d-engine.js', mimetype='application/javascript')
 
-@app.route('/nyc_subway_map.png')
+@bp.route('/nyc_subway_map.png')
 def serve_subway_map():
     return send_file('nyc_subway_map.png', mimetype='image/png')
 
 # --- Documentation Pages ---
-@app.route('/docs.html')
+# These templates have no dynamic data, so they are rendered once per process
+@bp.route('/docs.html')
 def docs_page():
-    return render_template('docs.html')
+    return page_cache.respond('docs.html', lambda: render_template('docs.html'))
 
-@app.route('/changelog.html')
+@bp.route('/changelog.html')
 def changelog_page():
-    return render_template('changelog.html')
+    return page_cache.respond('changelog.html', lambda: render_template('changelog.html'))
 
 # --- Coming Soon Pages ---
-@app.route('/guides.html')
+@bp.route('/guides.html')
 def guides_page():
-    return render_template('guides.html')
+    return page_cache.respond('guides.html', lambda: render_template('guides.html'))
 
-@app.route('/showcase.html')
+@bp.route('/showcase.html')
 def showcase_page():
-    return render_template('showcase.html')
+    return page_cache.respond('showcase.html', lambda: render_template('showcase.html'))
 
-@app.route('/blog.html')
+@bp.route('/blog.html')
 def blog_page():
-    return render_template('blog.html')
+    return page_cache.respond('blog.html', lambda: render_template('blog.html'))
 
 
 # --- Guide Routes ---
-@app.route('/guides', methods=['POST'])
+@bp.route('/guides', methods=['POST'])
+@idempotent
 def create_guide():
     data = request.get_json()
-    app.logger.info(f"Received guide submission data: {data}")
-    if not data or not data.get('url') or not data.get('category'):
-        app.logger.warning("Guide submission failed: Missing url or category.")
+    current_app.logger.info("Received guide submission", extra={"hot_path": True, "payload": data})
+    if not isinstance(data, dict) or not data.get('url') or not data.get('category'):
+        current_app.logger.warning("Guide submission failed: Missing url or category.")
         return jsonify({"error": "Missing URL or category"}), 400
+    if not isinstance(data['url'], str) or not isinstance(data['category'], str):
+        current_app.logger.warning("Guide submission failed: url or category is not a string.")
+        return jsonify({"error": "URL and category must be strings"}), 400
+    url = data['url'].strip()
+    try:
+        validate_url(url)
+    except InvalidURL:
+        current_app.logger.warning("Guide submission failed: not an http(s) URL.", extra={"url": url})
+        return jsonify({"error": "URL must start with http:// or https://"}), 400
 
     try:
-        new_guide = Guide(url=data['url'], category=data['category'])
-        db.session.add(new_guide)
+        # One indexed statement: inserts, or does nothing if the canonical URL is already known
+        statement = sqlite_insert(Guide).values(url=url, url_hash=url_hash(url), category=data['category'])
+        statement = statement.on_conflict_do_nothing(index_elements=['url_hash']).returning(Guide.id, Guide.submitted_at)
+        new_guide = db.session.execute(statement).first()
+        if new_guide is None:
+            db.session.rollback()
+            current_app.logger.info("Guide submission rejected as duplicate", extra={"hot_path": True, "url": url})
+            return jsonify({"error": "This guide URL has already been submitted"}), 409
         db.session.commit()
-        app.logger.info(f"Guide committed to database. New guide ID: {new_guide.id}")
+        current_app.logger.info("Guide committed to database", extra={"hot_path": True, "guide_id": new_guide.id})
+        guide_enrichment.notify(current_app) # Fetches the link preview on the worker thread
+        event_stream.notify(current_app)
         return jsonify({
             "message": "Guide submitted successfully!",
             "guide": {
-                "id": new_guide.id, "url": new_guide.url, "category": new_guide.category,
+                "id": new_guide.id, "url": url, "category": data['category'],
                 "submitted_at": new_guide.submitted_at.isoformat() if new_guide.submitted_at else None
             }
         }), 201
     except Exception as e:
         db.session.rollback()
-        app.logger.error(f"Error creating guide: {e}", exc_info=True)
+        current_app.logger.error(f"Error creating guide: {e}", exc_info=True)
         return jsonify({"error": "An unexpected error occurred."}), 500
 
-@app.route('/guides', methods=['GET'])
+@bp.route('/guides', methods=['GET'])
+@read_only
+@compression_level(gzip=9, br=9)
 def get_guides():
     try:
-        query = db.session.query(Guide)
+        serializer = SERIALIZERS['guides']
+        query = db.session.query(*serializer.select_columns(Guide.__table__))
         category = request.args.get('category')
         if category and category.lower() != 'all':
             query = query.filter(Guide.category == category)
+        url = request.args.get('url')
+        if url:
+            # Finds the guide under any spelling of its URL
+            query = query.filter(Guide.url_hash == url_hash(url))
         query = query.order_by(desc(Guide.submitted_at))
-        guides = query.all()
-        return jsonify([{
-            "id": g.id, "url": g.url, "category": g.category,
-            "submitted_at": g.submitted_at.isoformat() if g.submitted_at else None
-        } for g in guides])
+        return negotiated_response(serializer, query.all())
+    except InvalidURL as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
-        app.logger.error(f"Error fetching guides: {e}", exc_info=True)
+        current_app.logger.error(f"Error fetching guides: {e}", exc_info=True)
         return jsonify({"error": "An unexpected error occurred."}), 500
 
 # --- New ProjectData Routes (for the original request) ---
 # These routes will interact with the 'projects_data' table via the ProjectData model
 
-@app.route('/submit_project_data', methods=['POST']) # Changed endpoint to avoid conflict
+@bp.route('/submit_project_data', methods=['POST']) # Changed endpoint to avoid conflict
+@idempotent
 def submit_project_data():
     data = request.get_json()
     if not data or not data.get('name') or not data.get('description') or not data.get('url'):
@@ -436,96 +592,164 @@ def submit_project_data():
         )
         db.session.add(new_project_entry)
         db.session.commit()
+        event_stream.notify(current_app)
         return jsonify({
             "message": "Project data submitted successfully!",
-            "project": {
-                "id": new_project_entry.id,
-                "name": new_project_entry.name,
-                "description": new_project_entry.description,
-                "url": new_project_entry.url
-            }
+            "project": SERIALIZERS['projects_data'].obj(new_project_entry)
         }), 201
     except Exception as e:
         db.session.rollback()
-        app.logger.error(f"Error submitting project data: {e}")
+        current_app.logger.error(f"Error submitting project data: {e}")
         return jsonify({"error": "An internal error occurred: " + str(e)}), 500
 
-@app.route('/list_project_data', methods=['GET']) # Changed endpoint to avoid conflict
+@bp.route('/list_project_data', methods=['GET']) # Changed endpoint to avoid conflict
+@bp.route('/projects/feed', methods=['GET'])
+@read_only
 def list_project_data():
     try:
-        projects = db.session.query(ProjectData).all()
-        return jsonify([{
-            "id": p.id,
-            "name": p.name,
-            "description": p.description,
-            "url": p.url
-        } for p in projects])
+        feed_query = ProjectFeedQuery.from_args(request.args)
+        sql, params = feed_query.sql()
+        rows = db.session.execute(text(sql), params).fetchall()
+        return paginated_response(*feed_query.paginate(rows))
+    except PaginationError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
-        app.logger.error(f"Error listing project data: {e}")
+        current_app.logger.error(f"Error listing project data: {e}")
         return jsonify({"error": "An internal error occurred: " + str(e)}), 500
 
 # --- Feedback Routes ---
-@app.route('/feedback', methods=['POST'])
+@bp.route('/feedback', methods=['POST'])
+@idempotent
 def submit_feedback():
     data = request.get_json()
-    app.logger.info(f"Received feedback submission data: {data}")
+    current_app.logger.info("Received feedback submission", extra={"hot_path": True, "payload": data})
     
     if not data or not data.get('feedback_type') or not data.get('summary') or not data.get('details'):
-        app.logger.warning("Feedback submission failed: Missing required fields.")
+        current_app.logger.warning("Feedback submission failed: Missing required fields.")
         return jsonify({"error": "Missing required fields: feedback_type, summary, or details"}), 400
+    # Nothing can be reported back once the submission is queued, so reject bad input now
+    for field, max_length in FEEDBACK_FIELD_LIMITS.items():
+        value = data.get(field)
+        if value is not None and (not isinstance(value, str) or len(value) > max_length):
+            return jsonify({"error": f"{field} must be a string of at most {max_length} characters"}), 400
 
     try:
-        new_feedback = Feedback(
-            feedback_type=data['feedback_type'],
-            summary=data['summary'],
-            details=data['details'],
-            email=data.get('email')  # Optional field
-        )
-        db.session.add(new_feedback)
-        db.session.commit()
-        app.logger.info(f"Feedback committed to database. New feedback ID: {new_feedback.id}")
-        
+        # Acknowledged once the submission is fsynced to the queue log; the
+        # applier inserts it in the next batch (see feedback_queue.py)
+        segment, position = feedback_queue.enqueue(current_app, data)
+        current_app.logger.info("Feedback queued", extra={"hot_path": True, "segment": segment, "position": position})
         return jsonify({
-            "message": "Feedback submitted successfully!",
-            "feedback": {
-                "id": new_feedback.id,
-                "feedback_type": new_feedback.feedback_type,
-                "summary": new_feedback.summary,
-                "details": new_feedback.details,
-                "email": new_feedback.email,
-                "status": new_feedback.status,
-                "submitted_at": new_feedback.submitted_at.isoformat() if new_feedback.submitted_at else None
-            }
-        }), 201
+            "message": "Feedback received!",
+            "status": "queued",
+            "ingest_lag": current_app.extensions['feedback_queue'].lag(),
+        }), 202
     except Exception as e:
-        db.session.rollback()
-        app.logger.error(f"Error submitting feedback: {e}", exc_info=True)
+        current_app.logger.error(f"Error queueing feedback: {e}", exc_info=True)
+        return jsonify({"error": "An unexpected error occurred."}), 500
+
+@bp.route('/feedback/queue', methods=['GET'])
+def feedback_queue_stats():
+    try:
+        return jsonify(feedback_queue.stats(current_app))
+    except Exception as e:
+        current_app.logger.error(f"Error reading feedback queue stats: {e}", exc_info=True)
         return jsonify({"error": "An unexpected error occurred."}), 500
 
-@app.route('/feedback', methods=['GET'])
+@bp.route('/feedback', methods=['GET'])
+@read_only
+@compression_level(gzip=4, br=4) # Pages differ per filter and cursor, so compression is paid each time
 def get_feedback():
     try:
-        query = db.session.query(Feedback)
-        feedback_type = request.args.get('type')
-        if feedback_type:
-            query = query.filter(Feedback.feedback_type == feedback_type)
-        
-        query = query.order_by(desc(Feedback.submitted_at))
-        feedback_list = query.all()
-        
-        return jsonify([{
-            "id": f.id,
-            "feedback_type": f.feedback_type,
-            "summary": f.summary,
-            "details": f.details,
-            "email": f.email,
-            "status": f.status,
-            "submitted_at": f.submitted_at.isoformat() if f.submitted_at else None
-        } for f in feedback_list])
+        feedback_query = FeedbackQuery.from_args(request.args)
+        sql, params = feedback_query.sql()
+        rows = db.session.execute(text(sql), params).fetchall()
+        return paginated_response(*feedback_query.paginate(rows))
+    except PaginationError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
-        app.logger.error(f"Error fetching feedback: {e}", exc_info=True)
+        current_app.logger.error(f"Error fetching feedback: {e}", exc_info=True)
         return jsonify({"error": "An unexpected error occurred."}), 500
 
+@bp.route('/feedback/counts', methods=['GET'])
+@read_only
+def get_feedback_counts():
+    try:
+        # Cached; the feedback applier invalidates them (see feedback_query.py)
+        return jsonify(feedback_counts.get(lambda sql: db.session.execute(text(sql)).fetchall()))
+    except Exception as e:
+        current_app.logger.error(f"Error counting feedback: {e}", exc_info=True)
+        return jsonify({"error": "An unexpected error occurred."}), 500
+
+# --- Export Routes ---
+@bp.route('/export/<string:table>', methods=['GET'])
+@read_only
+def export_table(table):
+    try:
+        spec = ExportSpec.from_args(table, request.args)
+    except KeyError:
+        return jsonify({"error": f"Unknown table: {table}"}), 404
+    except PaginationError as e:
+        return jsonify({"error": str(e)}), 400
+
+    compress = bool(request.accept_encodings['gzip'])
+
+    engine = db.session.get_bind() # The read pool, unless the client was just pinned to the primary
+
+    def generate():
+        # A connection of its own, held only while the response streams (see export_data.py)
+        with engine.connect() as conn:
+            yield from stream_export(conn, spec, compress)
+
+    response = Response(stream_with_context(generate()), mimetype=spec.mimetype)
+    response.headers['Content-Disposition'] = f'attachment; filename="{spec.filename}"'
+    response.headers[EXPORT_UNTIL_HEADER] = spec.until
+    response.headers['Vary'] = 'Accept-Encoding'
+    if compress:
+        response.headers['Content-Encoding'] = 'gzip'
+    return response
+
+# --- Change Feed Routes ---
+@bp.route('/changes', methods=['GET'])
+@read_only
+@compression_level(gzip=4, br=4)
+def get_changes():
+    try:
+        change_query = ChangeQuery.from_args(request.args)
+        sql, params = change_query.sql()
+        entries = db.session.execute(text(sql), params).fetchall()
+        # Same read transaction as the log entries, so rows match the seqs returned
+        return jsonify(change_query.respond(entries, lambda sql, params: db.session.execute(text(sql), params).fetchall()))
+    except PaginationError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        current_app.logger.error(f"Error reading the change feed: {e}", exc_info=True)
+        return jsonify({"error": "An unexpected error occurred."}), 500
+
+# --- Live Event Stream ---
+@bp.route('/events', methods=['GET'])
+def stream_events():
+    # EventSource sends Last-Event-ID when it reconnects; the query parameter covers the first connect
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+    try:
+        body = event_stream.subscribe(current_app, last_event_id)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    # No stream_with_context: an idle stream holds no request context or database session
+    response = Response(body, mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no' # Keep proxies from buffering the stream
+    return response
+
+# --- Batch Route ---
+@bp.route('/batch', methods=['POST'])
+@compression_level(gzip=4, br=4)
+def batch_requests():
+    try:
+        items = parse_batch(request.get_json(silent=True))
+    except BatchError as e:
+        return jsonify({"error": str(e)}), 400
+    # Each entry carries its own status; see batch.py
+    return jsonify({"responses": run_batch(current_app._get_current_object(), items, request)})
 
 if __name__ == '__main__':
     # The `db.create_all()` call is generally not needed here if using Flask-Migrate.
@@ -533,4 +757,4 @@ if __name__ == '__main__':
     # However, for simple non-migration setups or testing, you might use:
     # with app.app_context():
     #     db.create_all()
-    app.run(debug=True, host='127.0.0.1', port=8000)
+    create_app().run(debug=True, host='127.0.0.1', port=8000)
@@ -0,0 +1,166 @@
+"""
+Non-blocking structured logging for the Flask app
+
+Request threads only put records on an in-memory queue; a QueueListener thread
+formats them as JSON lines and does the file I/O. Payloads attached with
+`extra={'payload': ...}` are truncated before they are queued, and INFO records
+flagged with `extra={'hot_path': True}` can be sampled.
+
+Settings (environment variables, overridable through app.config):
+    LOG_FILE               JSON log file (default: app.log)
+    LOG_LEVEL              Level for app.logger (default: INFO)
+    LOG_INFO_SAMPLE_RATE   Share of hot-path INFO records kept, 0.0-1.0 (default: 1.0)
+    LOG_MAX_FIELD_CHARS    Longest string kept inside a payload (default: 256)
+    LOG_QUEUE_SIZE         Records buffered before new ones are dropped (default: 10000)
+"""
+
+import atexit
+import json
+import logging
+import os
+import queue
+import random
+import sys
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+from flask import has_request_context, request
+
+DEFAULTS = {
+    'LOG_FILE': 'app.log',
+    'LOG_LEVEL': 'INFO',
+    'LOG_INFO_SAMPLE_RATE': 1.0,
+    'LOG_MAX_FIELD_CHARS': 256,
+    'LOG_QUEUE_SIZE': 10000,
+}
+
+# Containers inside a payload are cut down to this many items
+MAX_PAYLOAD_ITEMS = 20
+MAX_PAYLOAD_DEPTH = 4
+
+# Attributes every LogRecord has; anything else on a record came from `extra=`
+_RECORD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+
+def truncate_payload(value, max_chars, depth=0):
+    """Return a JSON-safe copy of `value` with long strings and containers cut down"""
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+    if isinstance(value, str):
+        if len(value) <= max_chars:
+            return value
+        return f'{value[:max_chars]}...[{len(value) - max_chars} more chars]'
+    if depth >= MAX_PAYLOAD_DEPTH:
+        return f'<{type(value).__name__}>'
+    if isinstance(value, dict):
+        items = list(value.items())
+        out = {str(k): truncate_payload(v, max_chars, depth + 1) for k, v in items[:MAX_PAYLOAD_ITEMS]}
+        if len(items) > MAX_PAYLOAD_ITEMS:
+            out['...'] = f'{len(items) - MAX_PAYLOAD_ITEMS} more keys'
+        return out
+    if isinstance(value, (list, tuple, set)):
+        items = list(value)
+        out = [truncate_payload(v, max_chars, depth + 1) for v in items[:MAX_PAYLOAD_ITEMS]]
+        if len(items) > MAX_PAYLOAD_ITEMS:
+            out.append(f'...{len(items) - MAX_PAYLOAD_ITEMS} more items')
+        return out
+    return truncate_payload(str(value), max_chars, depth)
+
+
+class JsonFormatter(logging.Formatter):
+    """Formats a record as one JSON object per line, including any `extra` fields"""
+
+    def format(self, record):
+        entry = {
+            'timestamp': datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and key != 'hot_path':
+                entry[key] = value
+        if record.exc_text:
+            entry['exception'] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """Keeps only `rate` of the INFO records flagged as hot-path; other records always pass"""
+
+    def __init__(self, rate):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record):
+        if record.levelno != logging.INFO or not getattr(record, 'hot_path', False):
+            return True
+        return self.rate >= 1.0 or random.random() < self.rate
+
+
+class RequestQueueHandler(QueueHandler):
+    """QueueHandler that never blocks the request thread and snapshots request data"""
+
+    def __init__(self, log_queue, max_chars):
+        super().__init__(log_queue)
+        self.max_chars = max_chars
+        self.dropped = 0
+
+    def prepare(self, record):
+        # Runs on the request thread: copy out everything that may change or
+        # hold large objects before the record crosses to the listener thread
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record.message = record.getMessage()
+        record.msg, record.args, record.exc_info = record.message, None, None
+        if hasattr(record, 'payload'):
+            record.payload = truncate_payload(record.payload, self.max_chars)
+        if has_request_context():
+            record.request = {'method': request.method, 'path': request.path}
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def _setting(app, key):
+    if key in app.config:
+        return app.config[key]
+    return type(DEFAULTS[key])(os.environ.get(key, DEFAULTS[key]))
+
+
+def configure_logging(app):
+    """Route app.logger through a queue to a JSON file writer thread; returns the listener"""
+    file_handler = logging.FileHandler(_setting(app, 'LOG_FILE'), encoding='utf-8')
+    file_handler.setFormatter(JsonFormatter())
+    # Errors still show up on the console, without the console slowing requests down
+    console_handler = logging.StreamHandler(sys.stderr)
+    console_handler.setLevel(logging.WARNING)
+    console_handler.setFormatter(logging.Formatter('[%(asctime)s] %(levelname)s in %(name)s: %(message)s'))
+
+    log_queue = queue.Queue(maxsize=_setting(app, 'LOG_QUEUE_SIZE'))
+    queue_handler = RequestQueueHandler(log_queue, _setting(app, 'LOG_MAX_FIELD_CHARS'))
+    queue_handler.addFilter(SamplingFilter(_setting(app, 'LOG_INFO_SAMPLE_RATE')))
+
+    listener = QueueListener(log_queue, file_handler, console_handler, respect_handler_level=True)
+    listener.start()
+
+    app.logger.handlers = [queue_handler]
+    app.logger.setLevel(_setting(app, 'LOG_LEVEL'))
+    app.logger.propagate = False
+    app.extensions['log_listener'] = listener
+    atexit.register(shutdown_logging, app)
+    return listener
+
+
+def shutdown_logging(app):
+    """Flush every queued record to disk and stop the listener thread"""
+    listener = app.extensions.pop('log_listener', None)
+    if listener is None:
+        return
+    listener.stop()
+    for handler in listener.handlers:
+        handler.close()
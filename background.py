@@ -0,0 +1,54 @@
+"""
+Wakeable background worker threads
+
+A BackgroundWorker runs `work()` on a daemon thread whenever it is poked with
+notify(), and every `poll_seconds` otherwise. Request handlers only ever call
+notify(), which sets an event and returns, so they never wait on the work.
+The thread starts on the first notify(), so scripts that never trigger the
+work never start it.
+"""
+
+import threading
+
+
+class BackgroundWorker:
+    def __init__(self, name, work, poll_seconds, logger):
+        self.name = name
+        self.work = work
+        self.poll_seconds = poll_seconds
+        self.logger = logger
+        self._wakeup = threading.Event()
+        self._stopping = False
+        self._thread = None
+        self._lock = threading.Lock()
+        # Set whenever no pass is running or requested; tests wait on it
+        self.idle = threading.Event()
+        self.idle.set()
+
+    def notify(self):
+        """Ask for a pass soon"""
+        self.idle.clear()
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+        self._wakeup.set()
+
+    def stop(self, timeout=None):
+        self._stopping = True
+        self._wakeup.set()
+        if self._thread:
+            self._thread.join(timeout)
+
+    def _run(self):
+        while not self._stopping:
+            self._wakeup.wait(self.poll_seconds)
+            if self._stopping:
+                break
+            self._wakeup.clear()
+            try:
+                self.work()
+            except Exception as e:
+                self.logger.error(f"{self.name} pass failed: {e}", exc_info=True)
+            if not self._wakeup.is_set():
+                self.idle.set()
@@ -0,0 +1,132 @@
+"""
+Multi-operation batch endpoint
+
+POST /batch runs several sub-requests against the existing routes in one HTTP
+round trip:
+
+    {"requests": [
+        {"method": "GET", "path": "/prompts?category=Testing"},
+        {"method": "GET", "path": "/prompts/categories"},
+        {"method": "POST", "path": "/guides", "body": {"url": "...", "category": "blogpost"},
+         "headers": {"Idempotency-Key": "..."}}
+    ]}
+
+and answers 200 with one entry per sub-request, in order:
+
+    {"responses": [{"status": 200, "headers": {...}, "body": [...]}, ...]}
+
+A JSON body is embedded as JSON and a text/* body as a string. Anything else,
+e.g. a list asked for with Accept: application/msgpack, is base64 encoded and
+its entry has "base64": true.
+
+Sub-requests are dispatched in turn through the app's own routing, inside the
+batch's application context, so they share its database session. Each run of
+consecutive GETs reads on one pooled connection inside a single SQLite read
+transaction, i.e. the same snapshot; a write sub-request ends it and commits
+on its own as usual, and the reads after it see its result. A failing
+sub-request only fails its own entry. Streaming endpoints (/events, /export)
+and nested batches are answered with a 400 entry, since their bodies can't be
+held in a combined response.
+"""
+
+import base64
+import inspect
+
+from werkzeug.test import EnvironBuilder
+
+from read_routing import PIN_ENVIRON_KEY
+
+MAX_REQUESTS = 20
+READ_METHODS = ('GET', 'HEAD')
+WRITE_METHODS = ('POST', 'PUT', 'PATCH', 'DELETE')
+# Sub-responses are embedded in the combined body, which is compressed as a whole
+DROPPED_REQUEST_HEADERS = {'accept-encoding'}
+# Response headers that describe the sub-response's own framing, not its content
+DROPPED_HEADERS = {'content-length', 'content-encoding', 'transfer-encoding', 'vary'}
+
+
+class BatchError(ValueError):
+    """A malformed batch; the endpoint answers it with a 400"""
+
+
+def parse_batch(payload, max_requests=MAX_REQUESTS):
+    """Validate the request body; returns the list of sub-request dicts"""
+    items = payload.get('requests') if isinstance(payload, dict) else None
+    if not isinstance(items, list) or not items:
+        raise BatchError('Body must be {"requests": [...]} with at least one sub-request')
+    if len(items) > max_requests:
+        raise BatchError(f'At most {max_requests} sub-requests per batch')
+    for number, item in enumerate(items):
+        if not isinstance(item, dict) or not isinstance(item.get('path'), str) or not item['path'].startswith('/'):
+            raise BatchError(f'Sub-request {number} needs a path starting with /')
+        method = item.setdefault('method', 'GET')
+        if not isinstance(method, str) or method.upper() not in READ_METHODS + WRITE_METHODS:
+            raise BatchError(f'Sub-request {number} has an unsupported method: {method}')
+        item['method'] = method.upper()
+        if not isinstance(item.get('headers', {}), dict):
+            raise BatchError(f'Sub-request {number} headers must be an object')
+    return items
+
+
+def _entry(response):
+    headers = {name: value for name, value in response.headers.items() if name.lower() not in DROPPED_HEADERS}
+    if response.is_json:
+        return {'status': response.status_code, 'headers': headers, 'body': response.get_json(silent=True)}
+    if response.mimetype.startswith('text/') or not response.get_data():
+        return {'status': response.status_code, 'headers': headers, 'body': response.get_data(as_text=True)}
+    return {'status': response.status_code, 'headers': headers,
+            'body': base64.b64encode(response.get_data()).decode('ascii'), 'base64': True}
+
+
+def _error(status, message):
+    return {'status': status, 'headers': {}, 'body': {'error': message}}
+
+
+def run_batch(app, items, parent):
+    """Dispatch `items` in order within the current app context; returns the response entries"""
+    from models import db
+
+    entries = []
+    snapshot = False
+    try:
+        for item in items:
+            reading = item['method'] in READ_METHODS
+            if reading and not snapshot:
+                # pysqlite only opens a transaction before writes, so the reads get one here
+                db.session.connection().exec_driver_sql('BEGIN')
+                snapshot = True
+            elif not reading and snapshot:
+                db.session.rollback()
+                snapshot = False
+            entries.append(dispatch(app, item, parent))
+    finally:
+        if snapshot:
+            db.session.rollback()
+    return entries
+
+
+def dispatch(app, item, parent):
+    """Run one sub-request through the app's routing and return its entry"""
+    path, _, query = item['path'].partition('?')
+    if path.rstrip('/') == '/batch':
+        return _error(400, 'Batches cannot be nested')
+    builder = EnvironBuilder(
+        path=path, query_string=query, method=item['method'],
+        headers={name: value for name, value in (item.get('headers') or {}).items()
+                 if name.lower() not in DROPPED_REQUEST_HEADERS},
+        json=item.get('body') if 'body' in item else None, base_url=parent.host_url,
+        # Reads stay on the primary, inside the batch's snapshot (see read_routing.py)
+        environ_base={'REMOTE_ADDR': parent.remote_addr, PIN_ENVIRON_KEY: True},
+    )
+    # Same app, so the request context reuses the batch's app context and database session
+    with app.request_context(builder.get_environ()):
+        try:
+            response = app.full_dispatch_request()
+        except Exception as e:
+            app.logger.error(f"Batched {item['method']} {item['path']} failed: {e}", exc_info=True)
+            return _error(500, 'An unexpected error occurred.')
+        # Streaming views return generators (error pages come back as other iterables)
+        if inspect.isgenerator(response.response):
+            response.close()
+            return _error(400, f'{path} streams its response and cannot be batched')
+        return _entry(response)
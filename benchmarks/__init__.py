@@ -0,0 +1 @@
+"""Performance benchmarks for the Flask app and the Netlify functions."""
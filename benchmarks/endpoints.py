@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+"""
+Endpoint benchmark suite
+Seeds large datasets and measures every Flask route and Netlify function handler
+
+Usage:
+    python -m benchmarks.endpoints --scales 1000,100000,1000000
+    python -m benchmarks.endpoints --scales 1000 --compare benchmarks/baseline.json
+
+Each scale runs in its own subprocess so databases, caches and peak RSS
+never leak from one scale into the next.
+"""
+
+import argparse
+import importlib.util
+import json
+import math
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FUNCTIONS_DIR = os.path.join(REPO_ROOT, 'netlify', 'functions')
+DEFAULT_BASELINE = os.path.join(REPO_ROOT, 'benchmarks', 'baseline.json')
+DEFAULT_SCALES = [1000, 100000, 1000000]
+
+# Samples we always collect, even when a route blows through its time budget
+MIN_SAMPLES = 3
+
+# Values for URL converters, keyed by argument name. Rules whose arguments are
+# not listed here are reported as skipped rather than guessed at.
+PATH_ARGS = {
+    'user_id': 1,
+    'key': 'site_name',
+}
+
+
+# --- Route and handler cases ---
+
+def _flask_payload(rule, n):
+    """Keyword arguments for test_client.open() for POST routes, or None if unknown"""
+    payloads = {
+        '/users': lambda: {'json': {'username': f'bench_user_{n}', 'email': f'bench{n}@example.com', 'password': 'benchmark'}},
+        '/products': lambda: {'json': {'name': f'Bench Product {n}', 'price': '9.99', 'sku': f'BENCH-{n}'}},
+        '/settings': lambda: {'json': {'key': f'bench_setting_{n % 50}', 'value': str(n)}},
+        '/prompts': lambda: {'json': {'title': f'Bench Prompt {n}', 'category': 'Development', 'prompt_text': 'Explain {{code}}', 'rating': '4.5'}},
+        '/showcase/projects': lambda: {'data': {'project-title': f'Bench Project {n}', 'project-category': 'Development', 'project-description': 'Benchmark submission'}},
+        '/guides': lambda: {'json': {'url': f'https://example.com/bench-guides/{n}', 'category': 'blogpost'}},
+        '/submit_project_data': lambda: {'json': {'name': f'Bench {n}', 'description': 'Benchmark submission', 'url': f'https://example.com/bench/{n}'}},
+        '/feedback': lambda: {'json': {'feedback_type': 'bug', 'summary': f'Bench feedback {n}', 'details': 'Benchmark submission details'}},
+    }
+    factory = payloads.get(rule)
+    return factory() if factory else None
+
+
+def _netlify_body(function_name, n):
+    bodies = {
+        'prompts': {'title': f'Bench Prompt {n}', 'category': 'Development', 'prompt_text': 'Explain {{code}}', 'rating': '4.5'},
+        'guides': {'url': f'https://example.com/bench-guides/{n}', 'category': 'blogpost'},
+        'showcase_projects': {'title': f'Bench Project {n}', 'category': 'Development', 'description': 'Benchmark submission'},
+        'feedback': {'feedback_type': 'bug', 'summary': f'Bench feedback {n}', 'details': 'Benchmark submission details'},
+        'submit_project_data': {'name': f'Bench {n}', 'description': 'Benchmark submission', 'url': f'https://example.com/bench/{n}'},
+    }
+    return bodies.get(function_name)
+
+
+def flask_cases(app):
+    """Return (name, call) pairs for every benchmarkable Flask rule, plus the skipped rules"""
+    client = app.test_client()
+    cases, skipped = [], []
+    for rule in sorted(app.url_map.iter_rules(), key=lambda r: r.rule):
+        if rule.endpoint == 'static':
+            continue
+        if any(arg not in PATH_ARGS for arg in rule.arguments):
+            skipped.append(rule.rule)
+            continue
+        path = rule.build({arg: PATH_ARGS[arg] for arg in rule.arguments}, append_unknown=False)[1]
+        for method in sorted(rule.methods & {'GET', 'POST'}):
+            if method == 'GET':
+                call = (lambda p: lambda n: client.get(p).status_code)(path)
+            else:
+                if _flask_payload(rule.rule, 0) is None:
+                    skipped.append(f'POST {rule.rule}')
+                    continue
+                call = (lambda p, r: lambda n: client.post(p, **_flask_payload(r, n)).status_code)(path, rule.rule)
+            cases.append((f'flask {method} {rule.rule}', call))
+    return cases, skipped
+
+
+def load_function(name):
+    spec = importlib.util.spec_from_file_location(f'netlify_{name}', os.path.join(FUNCTIONS_DIR, f'{name}.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def netlify_cases():
+    """Return (name, call) pairs for the handler of every Netlify function"""
+    cases = []
+    for filename in sorted(os.listdir(FUNCTIONS_DIR)):
+        if not filename.endswith('.py'):
+            continue
+        name = filename[:-3]
+        handler = load_function(name).handler
+        for method in ('GET', 'POST'):
+            if method == 'POST' and _netlify_body(name, 0) is None:
+                continue
+
+            def call(n, handler=handler, method=method, name=name):
+                event = {'httpMethod': method, 'queryStringParameters': {}}
+                if method == 'POST':
+                    event['body'] = json.dumps(_netlify_body(name, n))
+                return handler(event, None)['statusCode']
+
+            # Functions that only accept one method answer the other with 405; skip those
+            if call(-1) == 405:
+                continue
+            cases.append((f'netlify {method} {name}', call))
+    return cases
+
+
+def create_community_schema():
+    """Let each Netlify function create its own tables by submitting one record"""
+    for name in ('prompts', 'guides', 'showcase_projects', 'feedback', 'submit_project_data'):
+        event = {'httpMethod': 'POST', 'body': json.dumps(_netlify_body(name, 'schema'))}
+        load_function(name).handler(event, None)
+
+
+# --- Measurement ---
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    rank = math.ceil(pct / 100 * len(sorted_values))
+    return sorted_values[max(0, min(len(sorted_values), rank) - 1)]
+
+
+def measure(call, iterations, budget, warmup):
+    for n in range(warmup):
+        call(-(n + 2))
+    latencies, errors = [], 0
+    started = time.perf_counter()
+    for n in range(iterations):
+        t0 = time.perf_counter()
+        status = call(n)
+        latencies.append((time.perf_counter() - t0) * 1000)
+        if status >= 500:
+            errors += 1
+        if time.perf_counter() - started > budget and len(latencies) >= MIN_SAMPLES:
+            break
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        'samples': len(latencies),
+        'errors': errors,
+        'p50_ms': round(percentile(latencies, 50), 3),
+        'p95_ms': round(percentile(latencies, 95), 3),
+        'p99_ms': round(percentile(latencies, 99), 3),
+        'throughput_rps': round(len(latencies) / elapsed, 2) if elapsed else None,
+        'peak_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    }
+
+
+def run_scale(scale, iterations, budget, warmup, seed):
+    """Seed fresh databases at `scale` rows per table and benchmark every case"""
+    workdir = tempfile.mkdtemp(prefix=f'jules_bench_{scale}_')
+    app_db = os.path.join(workdir, 'bench_app.db')
+    os.environ['DATABASE_URL'] = f'sqlite:///{app_db}'
+    os.environ['COMMUNITY_DB_PATH'] = os.path.join(workdir, 'community.db')
+    os.environ['LOG_FILE'] = os.path.join(workdir, 'bench_app.log')
+    os.environ['GUIDE_ENRICHMENT'] = 'off' # Never fetch the benchmark's made-up guide URLs
+    sys.path.insert(0, REPO_ROOT)
+    try:
+        from app import create_app
+        from models import db, User, ApplicationSetting
+        from generate_data import COMMUNITY_TABLES, generate
+
+        app = create_app()
+        seed_started = time.perf_counter()
+        with app.app_context():
+            db.create_all()
+            db.session.add(User(username='bench', email='bench@example.com', password_hash='x'))
+            db.session.add(ApplicationSetting(key='site_name', value='Benchmark'))
+            db.session.commit()
+            db.engine.dispose()
+        generate(app_db, scale, seed)
+        create_community_schema()
+        generate(os.environ['COMMUNITY_DB_PATH'], scale, seed, COMMUNITY_TABLES)
+        seed_seconds = time.perf_counter() - seed_started
+        print(f'🌱 Seeded {scale} rows per table in {seed_seconds:.1f}s', file=sys.stderr)
+
+        cases, skipped = flask_cases(app)
+        cases += netlify_cases()
+        routes = {}
+        for name, call in cases:
+            routes[name] = stats = measure(call, iterations, budget, warmup)
+            print(f'   {name:<45} p50 {stats["p50_ms"]:>10.2f}ms  p95 {stats["p95_ms"]:>10.2f}ms  '
+                  f'{stats["throughput_rps"]:>9.1f} req/s', file=sys.stderr)
+        for rule in skipped:
+            print(f'⚠️  Skipped {rule} (no sample arguments or payload)', file=sys.stderr)
+        return {'seed_seconds': round(seed_seconds, 2), 'routes': routes, 'skipped': skipped}
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+# --- Baseline comparison ---
+
+def compare(baseline, current, threshold, min_delta_ms):
+    """Return a list of human readable regressions of `current` against `baseline`"""
+    regressions = []
+    for scale, results in current['scales'].items():
+        base_routes = baseline.get('scales', {}).get(scale, {}).get('routes', {})
+        for name, stats in results['routes'].items():
+            base = base_routes.get(name)
+            if not base:
+                continue
+            for key in ('p50_ms', 'p95_ms', 'p99_ms'):
+                if stats[key] > base[key] * (1 + threshold) and stats[key] - base[key] > min_delta_ms:
+                    regressions.append(f'[{scale}] {name}: {key} {base[key]:.2f} -> {stats[key]:.2f}')
+            if base['throughput_rps'] and stats['throughput_rps'] < base['throughput_rps'] * (1 - threshold):
+                regressions.append(f'[{scale}] {name}: throughput {base["throughput_rps"]:.1f} -> {stats["throughput_rps"]:.1f} req/s')
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark Flask routes and Netlify handlers against seeded datasets')
+    parser.add_argument('--scales', default=','.join(str(s) for s in DEFAULT_SCALES),
+                        help='Comma separated row counts per table (default: %(default)s)')
+    parser.add_argument('--iterations', type=int, default=50, help='Measured requests per route')
+    parser.add_argument('--warmup', type=int, default=1, help='Unmeasured requests per route')
+    parser.add_argument('--budget', type=float, default=10.0, help='Seconds per route before sampling stops early')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed for the generated datasets')
+    parser.add_argument('--output', help=f'Where to write results (default: {DEFAULT_BASELINE} unless comparing)')
+    parser.add_argument('--compare', metavar='BASELINE', help='Fail if results regress against this baseline file')
+    parser.add_argument('--threshold', type=float, default=0.20, help='Allowed relative regression (default: %(default)s)')
+    parser.add_argument('--min-delta-ms', type=float, default=1.0, help='Ignore latency changes smaller than this')
+    parser.add_argument('--worker-scale', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker_scale is not None:
+        result = run_scale(args.worker_scale, args.iterations, args.budget, args.warmup, args.seed)
+        json.dump(result, sys.stdout)
+        return 0
+
+    current = {
+        'meta': {
+            'created_at': datetime.now(timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'iterations': args.iterations,
+            'seed': args.seed,
+        },
+        'scales': {},
+    }
+    for scale in [int(s) for s in args.scales.split(',') if s]:
+        print(f'🏁 Benchmarking at {scale} rows per table...', file=sys.stderr)
+        proc = subprocess.run(
+            [sys.executable, '-m', 'benchmarks.endpoints', '--worker-scale', str(scale),
+             '--iterations', str(args.iterations), '--warmup', str(args.warmup),
+             '--budget', str(args.budget), '--seed', str(args.seed)],
+            cwd=REPO_ROOT, stdout=subprocess.PIPE, check=True,
+        )
+        current['scales'][str(scale)] = json.loads(proc.stdout)
+
+    output = args.output or (None if args.compare else DEFAULT_BASELINE)
+    if output:
+        with open(output, 'w') as f:
+            json.dump(current, f, indent=2, sort_keys=True)
+        print(f'📄 Results written to {output}', file=sys.stderr)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(baseline, current, args.threshold, args.min_delta_ms)
+        if regressions:
+            print(f'❌ {len(regressions)} regression(s) above {args.threshold:.0%}:', file=sys.stderr)
+            for line in regressions:
+                print(f'   {line}', file=sys.stderr)
+            return 1
+        print('✅ No regressions against baseline', file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
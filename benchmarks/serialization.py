@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+Serialization microbenchmark
+Times turning a list of rows into a JSON body, the old way and through serializers.py,
+and compares the negotiated list formats of response_formats.py
+
+Usage:
+    python -m benchmarks.serialization
+    python -m benchmarks.serialization --rows 50000 --runs 7 --output serialization.json
+
+For each table a temp database is seeded with --rows rows, then every pipeline
+fetches all of them, builds the response dicts and encodes the body:
+
+    orm + jsonify       model objects, dicts built by hand, the standard library json
+    rows + json         plain rows (select_columns), the compiled serializer, json
+    rows + orjson       the same, encoded with orjson (skipped when not installed)
+
+Rows per second is the median run over the whole pipeline; the fetch, build and
+encode columns split it up.
+
+Then the same rows are encoded in every format a list endpoint offers (JSON,
+columnar JSON, MessagePack) and decoded again as a client would, reporting body
+size raw and gzipped, and the encode and decode times.
+"""
+
+import argparse
+import gzip
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+# Table -> (INSERT for one seeded row, row factory)
+SEED = {
+    'prompts': ("INSERT INTO prompts (title, category, description, prompt_text, rating, usage_count, is_featured, "
+                "created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, '2024-05-01 12:00:00', '2024-05-01 12:00:00')",
+                lambda n: (f'Prompt {n}', 'Development', 'Explains a piece of code step by step',
+                           'Explain {{code}} to a new team member', round(1 + n % 400 / 100, 2), n % 1000, n % 7 == 0)),
+    'guides': ("INSERT INTO guides (url, url_hash, category, submitted_at, title, enrichment_status) "
+               "VALUES (?, ?, ?, '2024-05-01 12:00:00', ?, 'done')",
+               lambda n: (f'https://example.com/guides/{n}', f'{n:032x}', 'blogpost', f'Guide {n}')),
+    'products': ("INSERT INTO products (name, description, price, sku, stock_quantity) VALUES (?, ?, ?, ?, ?)",
+                 lambda n: (f'Product {n}', 'A product', round(n % 10000 / 100, 2), f'SKU-{n}', n % 50)),
+}
+
+
+def legacy_dicts(table, objects):
+    """The dicts app.py built by hand before serializers.py"""
+    if table == 'prompts':
+        return [{
+            "id": p.id, "title": p.title, "category": p.category, "description": p.description,
+            "prompt_text": p.prompt_text, "rating": str(p.rating) if p.rating is not None else None,
+            "usage_count": p.usage_count, "is_featured": p.is_featured,
+            "created_at": p.created_at.isoformat() if p.created_at else None,
+            "updated_at": p.updated_at.isoformat() if p.updated_at else None,
+        } for p in objects]
+    if table == 'guides':
+        return [{
+            "id": g.id, "url": g.url, "category": g.category,
+            "submitted_at": g.submitted_at.isoformat() if g.submitted_at else None,
+            "title": g.title, "description": g.description,
+            "favicon_url": g.favicon_url, "canonical_url": g.canonical_url
+        } for g in objects]
+    return [{
+        "id": p.id, "name": p.name, "description": p.description,
+        "price": str(p.price), "sku": p.sku, "stock_quantity": p.stock_quantity
+    } for p in objects]
+
+
+def pipelines(table):
+    """(name, fetch, build, encode) for every pipeline available here"""
+    import serializers
+    from models import db
+
+    model = next(mapper.class_ for mapper in db.Model.registry.mappers if mapper.local_table.name == table)
+    serializer = serializers.SERIALIZERS[table]
+
+    def fetch_objects():
+        objects = db.session.query(model).all()
+        db.session.expunge_all()
+        return objects
+
+    def fetch_rows():
+        return db.session.query(*serializer.select_columns(model.__table__)).all()
+
+    def stdlib(data):
+        # What jsonify did: sorted keys, compact separators
+        return json.dumps(data, sort_keys=True, separators=(',', ':')).encode('utf-8')
+
+    found = [
+        ('orm + jsonify', fetch_objects, lambda objects: legacy_dicts(table, objects), stdlib),
+        ('rows + json', fetch_rows, serializer.rows,
+         lambda data: json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')),
+    ]
+    if serializers.orjson is not None:
+        found.append(('rows + orjson', fetch_rows, serializer.rows, serializers.orjson.dumps))
+    return found
+
+
+def measure(app, table, runs):
+    from models import db
+
+    results = {}
+    with app.app_context():
+        for name, fetch, build, encode in pipelines(table):
+            timings = []
+            for _ in range(runs + 1): # The first run warms caches and is dropped
+                started = time.perf_counter()
+                rows = fetch()
+                fetched = time.perf_counter()
+                data = build(rows)
+                built = time.perf_counter()
+                body = encode(data)
+                timings.append((fetched - started, built - fetched, time.perf_counter() - built, len(body)))
+                db.session.rollback()
+            timings = timings[1:]
+            total = statistics.median(sum(t[:3]) for t in timings)
+            results[name] = {
+                'rows_per_second': round(len(rows) / total),
+                'fetch_ms': round(statistics.median(t[0] for t in timings) * 1000, 1),
+                'build_ms': round(statistics.median(t[1] for t in timings) * 1000, 1),
+                'encode_ms': round(statistics.median(t[2] for t in timings) * 1000, 1),
+                'body_bytes': timings[0][3],
+            }
+    return results
+
+
+def measure_formats(app, table, runs):
+    import response_formats
+    from models import db
+    from serializers import SERIALIZERS
+
+    serializer = SERIALIZERS[table]
+    model = next(mapper.class_ for mapper in db.Model.registry.mappers if mapper.local_table.name == table)
+    with app.app_context():
+        rows = db.session.query(*serializer.select_columns(model.__table__)).all()
+    decoders = {response_formats.MSGPACK: response_formats.unpackb}
+    results = {}
+    for mimetype in response_formats.OFFERED:
+        decode = decoders.get(mimetype, json.loads)
+        encode_times, decode_times = [], []
+        for _ in range(runs + 1):
+            started = time.perf_counter()
+            body = response_formats.encode(mimetype, serializer, rows)
+            encoded = time.perf_counter()
+            decode(body)
+            encode_times.append(encoded - started)
+            decode_times.append(time.perf_counter() - encoded)
+        results[mimetype] = {
+            'body_bytes': len(body),
+            'gzip_bytes': len(gzip.compress(body, 6)),
+            'encode_ms': round(statistics.median(encode_times[1:]) * 1000, 1),
+            'decode_ms': round(statistics.median(decode_times[1:]) * 1000, 1),
+        }
+    return results
+
+
+def seed(app, table, rows):
+    import sqlite3
+    from models import db
+
+    with app.app_context():
+        db.create_all()
+        path = db.engine.url.database
+    insert, factory = SEED[table]
+    with sqlite3.connect(path) as conn:
+        conn.executemany(insert, (factory(n) for n in range(rows)))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Compare list serialization pipelines and response formats')
+    parser.add_argument('--rows', type=int, default=20000, help='Rows per table (default: %(default)s)')
+    parser.add_argument('--runs', type=int, default=5, help='Timed runs per pipeline (default: %(default)s)')
+    parser.add_argument('--tables', help=f"Comma separated subset of: {', '.join(SEED)}")
+    parser.add_argument('--output', help='Write the full results to this JSON file')
+    args = parser.parse_args(argv)
+
+    names = [n.strip() for n in args.tables.split(',')] if args.tables else list(SEED)
+    unknown = [n for n in names if n not in SEED]
+    if unknown:
+        parser.error(f"unknown table(s): {', '.join(unknown)}")
+
+    import response_formats
+    results = {
+        'meta': {
+            'created_at': datetime.now(timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'rows': args.rows,
+            'runs': args.runs,
+            'msgpack': 'native' if response_formats.msgpack is not None else 'pure Python fallback',
+        },
+        'tables': {},
+    }
+    for table in names:
+        workdir = tempfile.mkdtemp(prefix='jules_serialization_')
+        try:
+            from app import create_app
+            app = create_app({'SQLALCHEMY_DATABASE_URI': f"sqlite:///{os.path.join(workdir, 'bench.db')}",
+                              'LOG_FILE': os.path.join(workdir, 'bench.log')})
+            seed(app, table, args.rows)
+            stats, formats = measure(app, table, args.runs), measure_formats(app, table, args.runs)
+            results['tables'][table] = {'pipelines': stats, 'formats': formats}
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+        baseline = stats['orm + jsonify']['rows_per_second']
+        print(f'📦 {table} ({args.rows} rows)', file=sys.stderr)
+        for name, pipeline in stats.items():
+            print(f"   {name:<14} {pipeline['rows_per_second']:>9} rows/s  {pipeline['rows_per_second'] / baseline:>5.1f}x  "
+                  f"(fetch {pipeline['fetch_ms']:.1f}ms, build {pipeline['build_ms']:.1f}ms, "
+                  f"encode {pipeline['encode_ms']:.1f}ms)", file=sys.stderr)
+        plain = formats[response_formats.JSON]['body_bytes']
+        for mimetype, fmt in formats.items():
+            print(f"   {mimetype:<35} {fmt['body_bytes']:>10} bytes {fmt['body_bytes'] / plain:>5.0%}  "
+                  f"gzip {fmt['gzip_bytes']:>9}  encode {fmt['encode_ms']:.1f}ms  decode {fmt['decode_ms']:.1f}ms",
+                  file=sys.stderr)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f'📄 Results written to {args.output}', file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Cold start benchmark
+Times fresh interpreters importing the app, building it and serving one request,
+and breaks the import cost down with `python -X importtime`
+
+Usage:
+    python -m benchmarks.startup
+    python -m benchmarks.startup --runs 10 --top 15 --output startup.json
+
+Every run is a new process with an empty temp directory for the database and
+log file, so nothing is warm except the OS file cache.
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# What serverless and CLI entry points actually do on a cold start
+SCENARIOS = {
+    'import app': 'import app',
+    'create_app()': 'import app; app.create_app()',
+    'first request': "import app; app.create_app().test_client().get('/docs.html')",
+    'import build_static': 'import build_static',
+    'import init_db': 'import init_db',
+    'netlify list_project_data': (
+        "import importlib.util; "
+        "spec = importlib.util.spec_from_file_location('f', 'netlify/functions/list_project_data.py'); "
+        "spec.loader.exec_module(importlib.util.module_from_spec(spec))"
+    ),
+}
+
+
+def _run(code, workdir, importtime=False):
+    env = dict(os.environ,
+               DATABASE_URL=f"sqlite:///{os.path.join(workdir, 'startup.db')}",
+               COMMUNITY_DB_PATH=os.path.join(workdir, 'community.db'),
+               LOG_FILE=os.path.join(workdir, 'startup.log'))
+    command = [sys.executable] + (['-X', 'importtime'] if importtime else []) + ['-c', code]
+    started = time.perf_counter()
+    proc = subprocess.run(command, cwd=REPO_ROOT, env=env, capture_output=True, text=True)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    if proc.returncode != 0:
+        raise RuntimeError(f'{code!r} failed:\n{proc.stderr}')
+    return elapsed_ms, proc.stderr
+
+
+def parse_importtime(stderr):
+    """Return {top-level package: ms spent importing it} from `-X importtime` output"""
+    packages = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'imported package' in line:
+            continue
+        self_us, _, name = line[len('import time:'):].split('|')
+        # Self time summed per package, so sqlalchemy.* counts once however deep it was pulled in
+        package = name.strip().split('.')[0]
+        packages[package] = packages.get(package, 0) + int(self_us) / 1000
+    return packages
+
+
+def measure(code, runs):
+    workdir = tempfile.mkdtemp(prefix='jules_startup_')
+    try:
+        _run(code, workdir) # Warm the OS file cache and compile .pyc files
+        wall = sorted(_run(code, workdir)[0] for _ in range(runs))
+        modules = parse_importtime(_run(code, workdir, importtime=True)[1])
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return {
+        'wall_p50_ms': round(statistics.median(wall), 1),
+        'wall_min_ms': round(wall[0], 1),
+        'import_ms': round(sum(modules.values()), 1),
+        'slowest_imports': {name: round(ms, 1) for name, ms in sorted(modules.items(), key=lambda item: -item[1])},
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Measure cold start time of the app and its entry points')
+    parser.add_argument('--runs', type=int, default=5, help='Timed runs per scenario (default: %(default)s)')
+    parser.add_argument('--top', type=int, default=8, help='Slowest top-level imports to show per scenario')
+    parser.add_argument('--scenarios', help=f"Comma separated subset of: {', '.join(SCENARIOS)}")
+    parser.add_argument('--output', help='Write the full results to this JSON file')
+    args = parser.parse_args(argv)
+
+    names = [n.strip() for n in args.scenarios.split(',')] if args.scenarios else list(SCENARIOS)
+    unknown = [n for n in names if n not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown scenario(s): {', '.join(unknown)}")
+
+    results = {
+        'meta': {
+            'created_at': datetime.now(timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'runs': args.runs,
+        },
+        'scenarios': {},
+    }
+    baseline_ms = measure('pass', args.runs)['wall_p50_ms']
+    print(f'🐍 Bare interpreter startup: {baseline_ms:.1f}ms', file=sys.stderr)
+    results['meta']['interpreter_ms'] = baseline_ms
+
+    for name in names:
+        stats = measure(SCENARIOS[name], args.runs)
+        results['scenarios'][name] = stats
+        print(f'⏱️  {name:<28} p50 {stats["wall_p50_ms"]:>8.1f}ms  (imports {stats["import_ms"]:.1f}ms)', file=sys.stderr)
+        for module, ms in list(stats['slowest_imports'].items())[:args.top]:
+            print(f'      {module:<36} {ms:>8.1f}ms', file=sys.stderr)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f'📄 Results written to {args.output}', file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
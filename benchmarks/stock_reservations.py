@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Stock reservation stress test
+Many threads reserve the same few SKUs at once; counts oversold units and reservations per second
+
+Usage:
+    python -m benchmarks.stock_reservations
+    python -m benchmarks.stock_reservations --threads 32 --attempts 200 --stock 500 --output stock.json
+
+A temp database is seeded with --skus products of --stock units each. Every
+thread then makes --attempts reservations of one to three random SKUs, one to
+three units each, and commits or releases each one it gets. Two strategies are
+compared:
+
+    conditional update   stock_reservations.reserve, one UPDATE ... WHERE stock_quantity >= n per SKU
+    read-modify-write    SELECT the stock, check it in Python, UPDATE it to the new value
+
+Oversold units are the units handed out beyond the seeded stock. The conditional
+update must report 0; the read-modify-write run shows what it replaces. The
+command exits with status 1 when the conditional update oversells.
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+
+class OutOfStock(Exception):
+    pass
+
+
+def conditional_update(session, items):
+    """Returns a finish(commit) callable, or raises when short"""
+    import stock_reservations
+
+    try:
+        reservation = stock_reservations.reserve(session, items, ttl=600)
+    except stock_reservations.OutOfStock:
+        raise OutOfStock()
+    return lambda keep: (stock_reservations.commit if keep else stock_reservations.release)(session, reservation['token'])
+
+
+def read_modify_write(session, items):
+    """What a reserve in Python would do; stock put back with the same pattern"""
+    from sqlalchemy import text
+
+    def adjust(sku, delta):
+        row = session.execute(text('SELECT id, stock_quantity FROM products WHERE sku = :sku'), {'sku': sku}).first()
+        if row.stock_quantity + delta < 0:
+            return False
+        time.sleep(0) # Let another thread in between the read and the write, as a busy server would
+        session.execute(text('UPDATE products SET stock_quantity = :left WHERE id = :id'),
+                        {'left': row.stock_quantity + delta, 'id': row.id})
+        session.commit()
+        return True
+
+    taken = []
+    for sku, quantity in items:
+        if not adjust(sku, -quantity):
+            for sku_taken, quantity_taken in taken:
+                adjust(sku_taken, quantity_taken)
+            raise OutOfStock()
+        taken.append((sku, quantity))
+
+    def finish(keep):
+        if not keep:
+            for sku_taken, quantity_taken in taken:
+                adjust(sku_taken, quantity_taken)
+    return finish
+
+
+STRATEGIES = {'conditional update': conditional_update, 'read-modify-write': read_modify_write}
+
+
+def seed(app, skus, stock):
+    import sqlite3
+    from models import db
+
+    with app.app_context():
+        db.create_all()
+        path = db.engine.url.database
+    with sqlite3.connect(path) as conn:
+        conn.executemany('INSERT INTO products (name, price, sku, stock_quantity) VALUES (?, 1, ?, ?)',
+                         [(f'Product {n}', f'SKU-{n}', stock) for n in range(skus)])
+
+
+def run(app, strategy, args):
+    from models import db
+
+    sold, latencies, outcomes, errors = Counter(), [], Counter(), []
+    lock = threading.Lock()
+    skus = [f'SKU-{n}' for n in range(args.skus)]
+
+    def worker(seed_value):
+        rng = random.Random(seed_value)
+        with app.app_context():
+            for _ in range(args.attempts):
+                items = sorted((sku, rng.randint(1, 3)) for sku in rng.sample(skus, rng.randint(1, min(3, len(skus)))))
+                keep = rng.random() < args.commit_ratio
+                started = time.perf_counter()
+                try:
+                    finish = strategy(db.session, items)
+                    finish(keep)
+                    outcome = 'committed' if keep else 'released'
+                except OutOfStock:
+                    outcome = 'rejected'
+                except Exception as e:
+                    db.session.rollback()
+                    outcome = 'error'
+                    with lock:
+                        errors.append(str(e).splitlines()[0])
+                elapsed = time.perf_counter() - started
+                with lock:
+                    latencies.append(elapsed)
+                    outcomes[outcome] += 1
+                    if outcome == 'committed':
+                        sold.update(dict(items))
+            db.session.remove()
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(args.threads)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    with app.app_context():
+        left = dict(db.session.execute(db.text('SELECT sku, stock_quantity FROM products')).fetchall())
+    oversold = sum(max(0, sold[sku] - args.stock) for sku in skus)
+    # Units sold plus units left must add up to the seeded stock, however the sales interleaved
+    drift = sum(sold[sku] + left[sku] - args.stock for sku in skus)
+    attempts = sum(outcomes.values())
+    return {
+        'outcomes': dict(outcomes),
+        'oversold_units': oversold,
+        'stock_drift': drift,
+        'negative_stock': sum(1 for sku in skus if left[sku] < 0),
+        'attempts_per_second': round(attempts / elapsed),
+        'p50_ms': round(statistics.median(latencies) * 1000, 2),
+        'p99_ms': round(sorted(latencies)[int(len(latencies) * 0.99) - 1] * 1000, 2),
+        'errors': Counter(errors).most_common(3),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Stress stock reservations from many threads')
+    parser.add_argument('--threads', type=int, default=16, help='Concurrent buyers (default: %(default)s)')
+    parser.add_argument('--attempts', type=int, default=100, help='Reservations per thread (default: %(default)s)')
+    parser.add_argument('--skus', type=int, default=5, help='Products competed for (default: %(default)s)')
+    parser.add_argument('--stock', type=int, default=300, help='Units of each product (default: %(default)s)')
+    parser.add_argument('--commit-ratio', type=float, default=0.8,
+                        help='Share of reservations committed rather than released (default: %(default)s)')
+    parser.add_argument('--output', help='Write the full results to this JSON file')
+    args = parser.parse_args(argv)
+
+    results = {
+        'meta': {
+            'created_at': datetime.now(timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            **{key: value for key, value in vars(args).items() if key != 'output'},
+        },
+        'strategies': {},
+    }
+    for name, strategy in STRATEGIES.items():
+        workdir = tempfile.mkdtemp(prefix='jules_stock_')
+        try:
+            from app import create_app
+            app = create_app({'SQLALCHEMY_DATABASE_URI': f"sqlite:///{os.path.join(workdir, 'bench.db')}",
+                              'LOG_FILE': os.path.join(workdir, 'bench.log')})
+            seed(app, args.skus, args.stock)
+            stats = results['strategies'][name] = run(app, strategy, args)
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+        outcomes = stats['outcomes']
+        print(f"🛒 {name:<19} {stats['attempts_per_second']:>6} reservations/s  "
+              f"p50 {stats['p50_ms']:.2f}ms  p99 {stats['p99_ms']:.2f}ms  "
+              f"({outcomes.get('committed', 0)} committed, {outcomes.get('released', 0)} released, "
+              f"{outcomes.get('rejected', 0)} rejected, {outcomes.get('error', 0)} errors)", file=sys.stderr)
+        marker = '✅' if stats['oversold_units'] == 0 and stats['stock_drift'] == 0 else '❌'
+        print(f"   {marker} {stats['oversold_units']} units oversold, stock off by {stats['stock_drift']}",
+              file=sys.stderr)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f'📄 Results written to {args.output}', file=sys.stderr)
+    safe = results['strategies']['conditional update']
+    return 0 if safe['oversold_units'] == 0 and safe['stock_drift'] == 0 else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
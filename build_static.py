@@ -9,7 +9,8 @@ import shutil
 import json
 from flask import Flask
 from models import db, Project as ProjectData, ShowcaseProject, Prompt, Guide, Feedback
-from app import app
+from app import create_app
+from template_cache import print_report, warm_templates
 
 def create_static_site():
     """Generate static HTML files from Flask templates"""
@@ -22,6 +23,12 @@ def create_static_site():
     
     print("🏗️  Starting static site generation...")
     
+    app = create_app()
+    
+    # Compile every template into the bytecode cache before rendering anything
+    print("🔥 Precompiling templates...")
+    print_report(warm_templates(app))
+    
     # Initialize database and get data for static generation
     with app.app_context():
         try:
@@ -118,6 +125,8 @@ def create_static_site():
 # Direct function access
 /submit_project_data  /.netlify/functions/submit_project_data  200
 /list_project_data  /.netlify/functions/list_project_data  200
+/projects/feed  /.netlify/functions/list_project_data  200
+/feedback/counts  /.netlify/functions/feedback/counts  200
 /feedback  /.netlify/functions/feedback  200
 /prompts  /.netlify/functions/prompts  200
 /guides  /.netlify/functions/guides  200
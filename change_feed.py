@@ -0,0 +1,107 @@
+"""
+Change feed for incremental client sync
+
+Triggers on prompts, guides, showcase_projects and projects_data keep one row
+per changed record in change_log: (seq, table_name, row_id, deleted). Every
+insert, update or delete replaces the record's entry with a new one, and seq is
+an AUTOINCREMENT key, so it only ever grows and the log holds exactly the latest
+change of each record. Deletions stay as tombstones (deleted = 1). Because the
+triggers are in the database, every writer is covered: the Flask routes, the
+import and sync tools, the guide enrichment worker.
+
+GET /changes?since=<seq> returns what changed after `since`, oldest first:
+
+    {"changes": [{"seq": 42, "table": "guides", "id": 7, "op": "upsert", "row": {...}},
+                 {"seq": 43, "table": "prompts", "id": 3, "op": "delete"}],
+     "since": 43, "has_more": false}
+
+A client starts from since=0 (the whole data set), applies the changes to its
+cache and sends the returned `since` next time; while has_more is true it asks
+again straight away. Rows have the same fields as the list endpoints return
+(see serializers.py). Only the standard library is used, like the other query
+modules.
+
+Supported parameters:
+    since      last seq the client has applied (default 0)
+    tables     comma-separated subset of CHANGE_TABLES
+    limit      changes per response, see pagination.py
+"""
+
+from pagination import PaginationError, parse_limit
+from serializers import SERIALIZERS
+
+# Table -> columns returned for an upsert
+CHANGE_TABLES = {table: SERIALIZERS[table].columns
+                 for table in ('prompts', 'guides', 'showcase_projects', 'projects_data')}
+
+CHANGE_LOG_INDEX = 'ix_change_log_table_row'
+
+
+def trigger_ddl(table):
+    """The insert, update and delete triggers that log changes to `table`"""
+    statements = []
+    for event, ref, deleted in (('INSERT', 'new', 0), ('UPDATE', 'new', 0), ('DELETE', 'old', 1)):
+        statements.append(
+            f"CREATE TRIGGER IF NOT EXISTS {table}_change_log_{event[0].lower()} AFTER {event} ON {table} BEGIN "
+            f"DELETE FROM change_log WHERE table_name = '{table}' AND row_id = {ref}.id; "
+            f"INSERT INTO change_log (table_name, row_id, deleted) VALUES ('{table}', {ref}.id, {deleted}); END")
+    return statements
+
+
+class ChangeQuery:
+    """A parsed change feed request"""
+
+    def __init__(self, since=None, tables=None, limit=None):
+        try:
+            self.since = int(since or 0)
+        except (TypeError, ValueError):
+            raise PaginationError('since must be a sequence number from a previous response')
+        if self.since < 0:
+            raise PaginationError('since must not be negative')
+        self.tables = [t for t in (tables or '').split(',') if t] or list(CHANGE_TABLES)
+        unknown = [t for t in self.tables if t not in CHANGE_TABLES]
+        if unknown:
+            raise PaginationError(f"Unknown table(s): {', '.join(unknown)}")
+        self.limit = parse_limit(limit)
+
+    @classmethod
+    def from_args(cls, args):
+        return cls(args.get('since'), args.get('tables'), args.get('limit'))
+
+    def sql(self):
+        """Log entries after `since`, oldest first; one more than the limit to tell if there are more"""
+        params = {'since': self.since, 'limit': self.limit + 1}
+        where = ['seq > :since']
+        if len(self.tables) < len(CHANGE_TABLES):
+            names = [f':table_{i}' for i in range(len(self.tables))]
+            where.append(f"table_name IN ({', '.join(names)})")
+            params.update({name[1:]: table for name, table in zip(names, self.tables)})
+        sql = f"SELECT seq, table_name, row_id, deleted FROM change_log WHERE {' AND '.join(where)} ORDER BY seq LIMIT :limit"
+        return sql, params
+
+    def respond(self, entries, fetch_rows):
+        """Build the response body from the log entries and `fetch_rows(sql, params)` -> rows"""
+        has_more = len(entries) > self.limit
+        entries = entries[:self.limit]
+        wanted = {}
+        for seq, table, row_id, deleted in entries:
+            if not deleted:
+                wanted.setdefault(table, []).append(row_id)
+        rows = {}
+        for table, ids in wanted.items():
+            serializer = SERIALIZERS[table]
+            marks = ', '.join(f':id_{i}' for i in range(len(ids)))
+            for row in fetch_rows(f"SELECT {', '.join(serializer.columns)} FROM {table} WHERE id IN ({marks})",
+                                  {f'id_{i}': row_id for i, row_id in enumerate(ids)}):
+                rows[table, row[0]] = serializer.row(row)
+
+        changes = []
+        for seq, table, row_id, deleted in entries:
+            row = rows.get((table, row_id))
+            # A row deleted since its entry was read is a tombstone too; its delete comes later
+            if deleted or row is None:
+                changes.append({'seq': seq, 'table': table, 'id': row_id, 'op': 'delete'})
+            else:
+                changes.append({'seq': seq, 'table': table, 'id': row_id, 'op': 'upsert', 'row': row})
+        since = entries[-1][0] if entries else self.since
+        return {'changes': changes, 'since': since, 'has_more': has_more}
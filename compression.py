@@ -0,0 +1,216 @@
+"""
+Response compression for the JSON API and the Netlify functions
+
+Responses are compressed with brotli (when the brotli package is installed) or
+gzip, whichever the client's Accept-Encoding prefers; on equal q values brotli
+wins, since it is smaller at similar speed. Bodies shorter than
+COMPRESSION_MIN_SIZE bytes are sent as they are, because a few hundred bytes
+barely shrink and cost a compressor setup per request.
+
+In Flask, `init_compression(app)` registers an after_request hook that
+compresses every eligible response: JSON, text, JavaScript and MessagePack
+bodies that are not streamed and not already encoded. /events and /export
+stream, and page_cache.py stores its own encodings, so they are left alone.
+Views can set their own levels with `@compression_level(...)`. Netlify
+functions wrap their handler in `@compress_handler(...)`, which compresses the
+body and returns it base64-encoded.
+
+Compressed bodies are kept in an LRU keyed by a hash of the uncompressed body,
+the encoding and the level, up to COMPRESSION_CACHE_BYTES in total. A list that
+hasn't changed since the last hit is then hashed, not compressed again; the
+page cache stores the same encodings with each page.
+
+Settings (environment variables, overridable through app.config):
+    COMPRESSION_MIN_SIZE        Smallest body compressed, in bytes (default: 1024)
+    COMPRESSION_GZIP_LEVEL      Default gzip level, 1-9 (default: 6)
+    COMPRESSION_BROTLI_QUALITY  Default brotli quality, 0-11 (default: 5)
+    COMPRESSION_CACHE_BYTES     Compressed bodies kept for reuse (default: 16 MiB, 0 disables)
+"""
+
+import base64
+import collections
+import functools
+import hashlib
+import os
+import threading
+import zlib
+
+try:
+    import brotli
+except ImportError: # Optional: `pip install brotli` to offer Content-Encoding: br
+    brotli = None
+
+DEFAULTS = {
+    'COMPRESSION_MIN_SIZE': 1024,
+    'COMPRESSION_GZIP_LEVEL': 6,
+    'COMPRESSION_BROTLI_QUALITY': 5,
+    'COMPRESSION_CACHE_BYTES': 16 * 1024 * 1024,
+}
+
+# Server preference among encodings the client accepts equally
+ENCODINGS = ('br', 'gzip') if brotli is not None else ('gzip',)
+COMPRESSIBLE_TYPES = ('application/json', 'application/javascript', 'application/msgpack')
+
+
+def _setting(app, key):
+    """`app` may be None (the Netlify functions), leaving the environment and the defaults"""
+    if app is not None and key in app.config:
+        return app.config[key]
+    return type(DEFAULTS[key])(os.environ.get(key, DEFAULTS[key]))
+
+
+def default_levels(app=None):
+    return {'gzip': int(_setting(app, 'COMPRESSION_GZIP_LEVEL')), 'br': int(_setting(app, 'COMPRESSION_BROTLI_QUALITY'))}
+
+
+def is_compressible(mimetype):
+    return bool(mimetype) and (mimetype.startswith('text/') or mimetype.endswith('+json')
+                               or mimetype in COMPRESSIBLE_TYPES)
+
+
+def choose_encoding(accept_encoding, available=ENCODINGS):
+    """The encoding in `available` that an Accept-Encoding value prefers, or None for identity"""
+    accepted = {}
+    for item in (accept_encoding or '').split(','):
+        coding, _, params = item.partition(';')
+        q = 1.0
+        name, _, value = params.partition('=')
+        if name.strip().lower() == 'q':
+            try:
+                q = float(value)
+            except ValueError:
+                q = 0.0
+        accepted[coding.strip().lower()] = q
+    best, best_q = None, 0.0
+    for encoding in available:
+        q = accepted.get(encoding, accepted.get('*', 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def compress(body, encoding, level):
+    if encoding == 'br':
+        return brotli.compress(body, quality=level)
+    return zlib.compress(body, level, wbits=31) # 31: gzip header and trailer
+
+
+def encode_all(body, levels=None):
+    """Every encoding this process offers of `body`, keyed by Content-Encoding"""
+    levels = levels or default_levels()
+    return {encoding: compress(body, encoding, levels[encoding]) for encoding in ENCODINGS}
+
+
+class CompressedCache:
+    """Compressed bodies by (body hash, encoding, level), least recently used dropped past `max_bytes`"""
+
+    def __init__(self, max_bytes=DEFAULTS['COMPRESSION_CACHE_BYTES']):
+        self.max_bytes = max_bytes
+        self._bodies = collections.OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = self.misses = 0
+
+    def compress(self, body, encoding, level):
+        if not self.max_bytes:
+            return compress(body, encoding, level)
+        key = (hashlib.blake2b(body, digest_size=16).digest(), encoding, level)
+        with self._lock:
+            compressed = self._bodies.get(key)
+            if compressed is not None:
+                self._bodies.move_to_end(key)
+                self.hits += 1
+                return compressed
+            self.misses += 1
+        compressed = compress(body, encoding, level)
+        with self._lock:
+            if key not in self._bodies and len(compressed) <= self.max_bytes:
+                self._bodies[key] = compressed
+                self._bytes += len(compressed)
+                while self._bytes > self.max_bytes:
+                    self._bytes -= len(self._bodies.popitem(last=False)[1])
+        return compressed
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {'hits': self.hits, 'misses': self.misses, 'entries': len(self._bodies), 'bytes': self._bytes,
+                    'hit_rate': round(self.hits / lookups, 4) if lookups else None}
+
+    def clear(self):
+        with self._lock:
+            self._bodies.clear()
+            self._bytes = 0
+            self.hits = self.misses = 0
+
+
+compressed_cache = CompressedCache()
+
+
+def compression_level(gzip=None, br=None):
+    """Per-view levels, e.g. higher for lists that are requested again unchanged"""
+    def decorator(view):
+        view.compression_levels = {'gzip': gzip, 'br': br}
+        return view
+    return decorator
+
+
+def _levels(overrides, app=None):
+    levels = default_levels(app)
+    levels.update({encoding: level for encoding, level in (overrides or {}).items() if level is not None})
+    return levels
+
+
+# --- Flask ---
+
+def init_compression(app):
+    compressed_cache.max_bytes = int(_setting(app, 'COMPRESSION_CACHE_BYTES'))
+    app.after_request(compress_response)
+
+
+def compress_response(response):
+    from flask import current_app, request
+
+    if (response.direct_passthrough or response.is_streamed or 'Content-Encoding' in response.headers
+            or not is_compressible(response.mimetype) or response.status_code < 200
+            or response.status_code in (204, 206, 304)):
+        return response
+    response.vary.add('Accept-Encoding')
+    encoding = choose_encoding(request.headers.get('Accept-Encoding'))
+    if encoding is None:
+        return response
+    body = response.get_data()
+    if len(body) < int(_setting(current_app, 'COMPRESSION_MIN_SIZE')):
+        return response
+    view = current_app.view_functions.get(request.endpoint)
+    level = _levels(getattr(view, 'compression_levels', None), current_app)[encoding]
+    response.set_data(compressed_cache.compress(body, encoding, level))
+    response.headers['Content-Encoding'] = encoding
+    return response
+
+
+# --- Netlify ---
+
+def compress_handler(gzip=None, br=None):
+    """Compress a Netlify function's text responses as the request's Accept-Encoding allows"""
+    def decorator(handler):
+        @functools.wraps(handler)
+        def wrapper(event, context):
+            response = handler(event, context)
+            body = response.get('body')
+            headers = response.setdefault('headers', {})
+            content_type = headers.get('Content-Type', 'application/json').split(';')[0].strip()
+            if not isinstance(body, str) or response.get('isBase64Encoded') or not is_compressible(content_type):
+                return response
+            headers['Vary'] = ', '.join(filter(None, [headers.get('Vary'), 'Accept-Encoding']))
+            request_headers = {name.lower(): value for name, value in (event.get('headers') or {}).items()}
+            encoding = choose_encoding(request_headers.get('accept-encoding'))
+            data = body.encode('utf-8')
+            if encoding is None or len(data) < int(_setting(None, 'COMPRESSION_MIN_SIZE')):
+                return response
+            level = _levels({'gzip': gzip, 'br': br})[encoding]
+            headers['Content-Encoding'] = encoding
+            return dict(response, body=base64.b64encode(compressed_cache.compress(data, encoding, level)).decode('ascii'),
+                        isBase64Encoded=True)
+        return wrapper
+    return decorator
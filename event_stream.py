@@ -0,0 +1,253 @@
+"""
+Server-Sent Events stream of new and changed submissions
+
+GET /events is an EventSource stream. Each event is one change from the
+change log (see change_feed.py), compact enough to update a list in place:
+
+    id: 1042
+    event: guides
+    data: {"id": 7, "op": "upsert", "url": "https://...", "category": "blogpost"}
+
+The event id is the change log seq, so a reconnecting client's Last-Event-ID
+header (or ?last_event_id= on the first connect) resumes exactly where it left
+off. Events still in the broker's replay buffer are sent again; for an older id
+the stream starts with a `reset` event whose data is {"since": <id>}, and the
+client catches up through /changes?since=<id> before applying live events.
+
+One ChangePoller per process reads the change log on a background thread (see
+background.py) and publishes to the EventBroker, which appends each event to
+every subscriber's bounded buffer and wakes the waiting streams. The routes that
+commit prompts, guides, showcase projects and project data poke the poller, so
+their events go out at once; changes written by other processes (the sync and
+import tools, other workers) go out within EVENT_STREAM_POLL seconds. A client
+that falls EVENT_STREAM_CLIENT_BUFFER events behind is sent a `reset` rather
+than holding memory for it.
+
+Neither the broker nor the poller keeps a thread per subscriber: an idle stream
+is a handler waiting on one shared Condition, sending a comment line every
+EVENT_STREAM_HEARTBEAT seconds. Under a threaded server each open stream still
+occupies a request thread, so to hold thousands of subscribers in one worker run
+a cooperative server, e.g. `gunicorn -k gevent "app:create_app()"`, where each
+stream is a greenlet and the threading primitives used here are patched.
+
+Settings (environment variables, overridable through app.config):
+    EVENT_STREAM_HEARTBEAT      Seconds between keep-alive comments (default: 15)
+    EVENT_STREAM_CLIENT_BUFFER  Events buffered per subscriber before it is reset (default: 256)
+    EVENT_STREAM_REPLAY         Recent events kept for Last-Event-ID resume (default: 1024)
+    EVENT_STREAM_POLL           Seconds between change log polls (default: 2)
+    EVENT_STREAM_RETRY_MS       Reconnect delay suggested to clients (default: 3000)
+"""
+
+import collections
+import json
+import os
+import threading
+
+from background import BackgroundWorker
+from change_feed import ChangeQuery
+from pagination import MAX_LIMIT
+
+DEFAULTS = {
+    'EVENT_STREAM_HEARTBEAT': 15.0,
+    'EVENT_STREAM_CLIENT_BUFFER': 256,
+    'EVENT_STREAM_REPLAY': 1024,
+    'EVENT_STREAM_POLL': 2.0,
+    'EVENT_STREAM_RETRY_MS': 3000,
+}
+
+# Fields sent with an upsert event, besides id and op
+EVENT_FIELDS = {
+    'prompts': ('title', 'category'),
+    'guides': ('url', 'category'),
+    'showcase_projects': ('title', 'category'),
+    'projects_data': ('name', 'url'),
+}
+
+RESET_EVENT = 'reset'
+
+
+def _setting(app, key):
+    if key in app.config:
+        return app.config[key]
+    return type(DEFAULTS[key])(os.environ.get(key, DEFAULTS[key]))
+
+
+class Subscription:
+    def __init__(self):
+        self.pending = collections.deque()
+        self.reset_since = None # Set when the client must catch up through /changes
+
+
+class EventBroker:
+    """Fans published events out to subscribers' bounded buffers"""
+
+    def __init__(self, client_buffer=256, replay=1024):
+        self.client_buffer = client_buffer
+        self._changed = threading.Condition()
+        self._recent = collections.deque(maxlen=replay)
+        # Every event after this seq is in _recent; None until the poller has started
+        self.replay_from = None
+        self.last_seq = None # Last seq published, or the starting point
+        self._subscribers = set()
+        self.published = 0
+        self.resets = 0
+
+    @property
+    def subscriber_count(self):
+        return len(self._subscribers)
+
+    def start_at(self, seq):
+        with self._changed:
+            if self.replay_from is None:
+                self.replay_from = self.last_seq = seq
+
+    def publish(self, events):
+        """Publish (seq, name, data) tuples, in seq order"""
+        if not events:
+            return
+        with self._changed:
+            for event in events:
+                if len(self._recent) == self._recent.maxlen:
+                    self.replay_from = self._recent[0][0]
+                self._recent.append(event)
+                for subscription in self._subscribers:
+                    if subscription.reset_since is not None:
+                        continue
+                    if len(subscription.pending) >= self.client_buffer:
+                        # Too far behind: drop its buffer and let it catch up from the change feed
+                        subscription.reset_since = subscription.pending[0][0] - 1
+                        subscription.pending.clear()
+                        self.resets += 1
+                        continue
+                    subscription.pending.append(event)
+            self.last_seq = events[-1][0]
+            self.published += len(events)
+            self._changed.notify_all()
+
+    def subscribe(self, last_event_id=None):
+        """Register a subscriber, replaying what it missed after `last_event_id` when still buffered"""
+        with self._changed:
+            subscription = Subscription()
+            if last_event_id is not None:
+                if self.replay_from is not None and last_event_id >= self.replay_from:
+                    missed = [event for event in self._recent if event[0] > last_event_id]
+                    subscription.pending.extend(missed[-self.client_buffer:])
+                    if len(missed) > self.client_buffer:
+                        subscription.reset_since = last_event_id
+                        subscription.pending.clear()
+                else:
+                    subscription.reset_since = last_event_id
+            self._subscribers.add(subscription)
+            return subscription
+
+    def unsubscribe(self, subscription):
+        with self._changed:
+            self._subscribers.discard(subscription)
+
+    def wait(self, subscription, timeout):
+        """Return (events, reset_since) for `subscription`, waiting up to `timeout` seconds for some"""
+        with self._changed:
+            self._changed.wait_for(lambda: subscription.pending or subscription.reset_since is not None, timeout)
+            events = list(subscription.pending)
+            subscription.pending.clear()
+            reset_since, subscription.reset_since = subscription.reset_since, None
+            return events, reset_since
+
+
+def format_event(event_id, name, data):
+    return f"id: {event_id}\nevent: {name}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+
+def sse_stream(broker, last_event_id, heartbeat, retry_ms):
+    """Yield the text/event-stream body for one subscriber until the client goes away"""
+    # Subscribed once the server starts sending, so a response that is never sent leaves nothing behind
+    subscription = broker.subscribe(last_event_id)
+    try:
+        yield f'retry: {retry_ms}\n\n'
+        while True:
+            events, reset_since = broker.wait(subscription, heartbeat)
+            if reset_since is not None:
+                yield f"event: {RESET_EVENT}\ndata: {json.dumps({'since': reset_since})}\n\n"
+            if events:
+                yield ''.join(format_event(*event) for event in events)
+            elif reset_since is None:
+                yield ': keep-alive\n\n'
+    finally:
+        broker.unsubscribe(subscription)
+
+
+def compact_events(body):
+    """Turn a change feed response body into (seq, table, data) events"""
+    events = []
+    for change in body['changes']:
+        data = {'id': change['id'], 'op': change['op']}
+        if change['op'] == 'upsert':
+            data.update({field: change['row'][field] for field in EVENT_FIELDS[change['table']]})
+        events.append((change['seq'], change['table'], data))
+    return events
+
+
+def last_seq(app):
+    from sqlalchemy import text
+    from models import db
+
+    with app.app_context():
+        return db.session.execute(text('SELECT COALESCE(MAX(seq), 0) FROM change_log')).scalar()
+
+
+def poll_changes(app, broker):
+    """Publish every change logged since the last pass; the first pass only sets the starting point"""
+    from sqlalchemy import text
+    from models import db
+
+    if broker.replay_from is None:
+        broker.start_at(last_seq(app))
+    since = broker.last_seq
+    with app.app_context():
+        while True:
+            change_query = ChangeQuery(since=since, limit=MAX_LIMIT)
+            sql, params = change_query.sql()
+            entries = db.session.execute(text(sql), params).fetchall()
+            body = change_query.respond(entries, lambda sql, params: db.session.execute(text(sql), params).fetchall())
+            db.session.commit() # Ends the read transaction, so the next pass sees new commits
+            broker.publish(compact_events(body))
+            since = body['since']
+            if not body['has_more']:
+                break
+
+
+class ChangePoller(BackgroundWorker):
+    """Publishes change log entries when poked, and every EVENT_STREAM_POLL seconds otherwise"""
+
+    def __init__(self, app, broker):
+        super().__init__('event-stream-poller', lambda: poll_changes(app, broker),
+                         float(_setting(app, 'EVENT_STREAM_POLL')), app.logger)
+
+
+def init_event_stream(app):
+    """Attach the broker and its (not yet started) poller to the app"""
+    broker = app.extensions['event_broker'] = EventBroker(
+        int(_setting(app, 'EVENT_STREAM_CLIENT_BUFFER')), int(_setting(app, 'EVENT_STREAM_REPLAY')))
+    app.extensions['event_poller'] = ChangePoller(app, broker)
+
+
+def subscribe(app, last_event_id=None):
+    """Return the response body generator for a new /events client"""
+    if last_event_id is not None:
+        try:
+            last_event_id = int(last_event_id)
+        except ValueError:
+            raise ValueError('Last-Event-ID must be an event id from this stream')
+    broker = app.extensions['event_broker']
+    if broker.replay_from is None:
+        # Fixed before subscribing, so a Last-Event-ID from before this process is judged correctly
+        broker.start_at(last_seq(app))
+    app.extensions['event_poller'].notify() # Starts the poller with the first subscriber
+    return sse_stream(broker, last_event_id, float(_setting(app, 'EVENT_STREAM_HEARTBEAT')),
+                      int(_setting(app, 'EVENT_STREAM_RETRY_MS')))
+
+
+def notify(app):
+    """Called after a route commits a change: publish it now rather than on the next poll"""
+    if app.extensions['event_broker'].subscriber_count:
+        app.extensions['event_poller'].notify()
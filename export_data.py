@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+Streaming CSV / NDJSON export of the community tables
+
+SQLite renders every output line itself, with json_object() for NDJSON and
+format() for CSV, so Python only joins finished lines and writes them;
+encoding row tuples with the json and csv modules tops out at about half the
+throughput. Lines are read through a streaming cursor EXPORT_BATCH_ROWS at a
+time, so an export holds one batch in memory however large the table is.
+Values are written as SQLite stores them (timestamps as 'YYYY-MM-DD HH:MM:SS'
+text), which is also what import_data.py reads back.
+
+`since` / `until` select a window on the table's timestamp column (since
+inclusive, until exclusive). An incremental exporter passes the previous
+export's X-Export-Until header (or the CLI's printed bound) as the next since.
+Feedback is stamped when it is queued but only lands in the table when the
+queue applier runs (see feedback_queue.py), so its default `until` stops
+before the oldest submission still queued; that one falls in the next window.
+projects_data has no timestamp and is always exported whole.
+
+Served at /export/<table>?format=ndjson|csv&since=...&until=..., gzipped on the
+fly when the client sends Accept-Encoding: gzip.
+
+Usage:
+    python export_data.py                                   # every table as NDJSON into exports/
+    python export_data.py feedback guides --format csv --gzip --since 2026-01-01
+"""
+
+import argparse
+import os
+import sys
+import time
+import zlib
+from datetime import datetime, timezone
+
+from pagination import PaginationError, parse_bound
+
+# Table -> timestamp column that since/until filter on
+EXPORT_TABLES = {
+    'prompts': 'created_at',
+    'guides': 'submitted_at',
+    'showcase_projects': 'submitted_at',
+    'feedback': 'submitted_at',
+    'projects_data': None,
+}
+FORMATS = {
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+    'csv': ('text/csv', 'csv'),
+}
+EXPORT_UNTIL_HEADER = 'X-Export-Until'
+
+# Rows fetched from the cursor and encoded at a time
+EXPORT_BATCH_ROWS = 2000
+# Streaming exports favour throughput over ratio
+GZIP_LEVEL = 1
+
+
+def table_columns(table):
+    """[(name, is_text)] for every column of `table` in models.py"""
+    from sqlalchemy import String
+    from models import db
+
+    return [(column.name, isinstance(column.type, String)) for column in db.Model.metadata.tables[table].columns]
+
+
+def default_until(table):
+    """Upper bound of an export that doesn't name one, as 'YYYY-MM-DD HH:MM:SS'
+
+    Now, in whole seconds, since CURRENT_TIMESTAMP defaults only have second
+    precision. For feedback, no later than the oldest queued submission.
+    """
+    until = datetime.now(timezone.utc)
+    if table == 'feedback':
+        from flask import current_app, has_app_context
+
+        if has_app_context() and 'feedback_queue' in current_app.extensions:
+            from feedback_queue import oldest_unapplied
+
+            queued = oldest_unapplied(current_app)
+            if queued is not None:
+                until = min(until, queued)
+    return until.strftime('%Y-%m-%d %H:%M:%S')
+
+
+class ExportSpec:
+    """A validated export request"""
+
+    def __init__(self, table, fmt=None, since=None, until=None):
+        if table not in EXPORT_TABLES:
+            raise KeyError(table)
+        self.table = table
+        self.stamp = EXPORT_TABLES[table]
+        self.format = fmt or 'ndjson'
+        if self.format not in FORMATS:
+            raise PaginationError(f"format must be one of {', '.join(FORMATS)}")
+        if not self.stamp and (since or until):
+            raise PaginationError(f'{table} has no timestamp to filter on')
+        self.since = parse_bound('since', since)
+        self.until = None
+        if self.stamp:
+            # Fixed when the export starts, so the next window starts exactly here
+            self.until = parse_bound('until', until) or default_until(table)
+        self.columns = table_columns(table)
+
+    @classmethod
+    def from_args(cls, table, args):
+        return cls(table, args.get('format'), args.get('since'), args.get('until'))
+
+    @property
+    def mimetype(self):
+        return FORMATS[self.format][0]
+
+    @property
+    def filename(self):
+        return f'{self.table}.{FORMATS[self.format][1]}'
+
+    def header(self):
+        """Bytes written before the first row"""
+        return (','.join(name for name, _ in self.columns) + '\n').encode('utf-8') if self.format == 'csv' else b''
+
+    def sql(self):
+        if self.format == 'ndjson':
+            pairs = ', '.join(f"'{name}', {name}" for name, _ in self.columns)
+            line = f'json_object({pairs})'
+        else:
+            # One format() call per row; %w doubles embedded double quotes, which is
+            # exactly CSV quoting (RFC 4180). NULL becomes an empty field.
+            template = ','.join('"%w"' if is_text else '%s' for _, is_text in self.columns)
+            values = ', '.join(f"ifnull({name}, '')" for name, _ in self.columns)
+            line = f"format('{template}', {values})"
+        where, params = [], {}
+        if self.until:
+            where.append(f'{self.stamp} < :until')
+            params['until'] = self.until
+        if self.since:
+            where.append(f'{self.stamp} >= :since')
+            params['since'] = self.since
+        where_clause = f"WHERE {' AND '.join(where)}" if where else ''
+        # Rowid order is a plain table scan; the window only filters it
+        sql = f"SELECT {line} FROM {self.table} {where_clause} ORDER BY id"
+        return sql, params
+
+
+def fetch_lines(conn, spec, batch_rows=EXPORT_BATCH_ROWS):
+    """Yield lists of rendered lines from a SQLAlchemy connection, `batch_rows` at a time"""
+    from sqlalchemy import text
+
+    sql, params = spec.sql()
+    result = conn.execution_options(stream_results=True).execute(text(sql), params)
+    yield from result.scalars().partitions(batch_rows)
+
+
+def encode(conn, spec):
+    """Yield the export of `spec` as bytes chunks, one per batch"""
+    header = spec.header()
+    if header:
+        yield header
+    for lines in fetch_lines(conn, spec):
+        lines.append('')
+        yield '\n'.join(lines).encode('utf-8')
+
+
+def gzip_chunks(chunks, level=GZIP_LEVEL):
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31) # 31: gzip header and trailer
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def stream_export(conn, spec, compress=False):
+    """Yield the encoded (and optionally gzipped) export of `spec` as bytes chunks"""
+    chunks = encode(conn, spec)
+    return gzip_chunks(chunks) if compress else chunks
+
+
+def export_to_file(conn, spec, path, compress=False):
+    """Write one export to `path`; returns (bytes written before compression, seconds)"""
+    raw = 0
+    started = time.perf_counter()
+
+    def counted(chunks):
+        nonlocal raw
+        for chunk in chunks:
+            raw += len(chunk)
+            yield chunk
+
+    chunks = counted(encode(conn, spec))
+    with open(path, 'wb') as f:
+        for chunk in gzip_chunks(chunks) if compress else chunks:
+            f.write(chunk)
+    return raw, time.perf_counter() - started
+
+
+def export_tables(app, tables, fmt='ndjson', since=None, until=None, compress=False, output_dir='exports'):
+    """Export `tables` into `output_dir`, printing size and throughput; returns the paths written"""
+    from models import db
+
+    os.makedirs(output_dir, exist_ok=True)
+    paths, spec = [], None
+    with app.app_context(), db.engine.connect() as conn:
+        for table in tables:
+            spec = ExportSpec(table, fmt, since, until)
+            path = os.path.join(output_dir, spec.filename + ('.gz' if compress else ''))
+            raw, elapsed = export_to_file(conn, spec, path, compress)
+            print(f"📤 {table:<18} {raw / 1e6:>9.1f}MB in {elapsed:.2f}s "
+                  f"({raw / 1e6 / max(elapsed, 1e-9):.0f}MB/s) -> {path}")
+            paths.append(path)
+    if spec and spec.until:
+        print(f"🔖 Exported rows stamped before {spec.until}; pass it as --since next time")
+    return paths
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Stream community tables to NDJSON or CSV files')
+    parser.add_argument('tables', nargs='*', help=f"Tables to export (default: all of {', '.join(EXPORT_TABLES)})")
+    parser.add_argument('--format', choices=list(FORMATS), default='ndjson')
+    parser.add_argument('--since', help='Only rows stamped at or after this ISO date/datetime')
+    parser.add_argument('--until', help='Only rows stamped before this ISO date/datetime (default: now)')
+    parser.add_argument('--gzip', action='store_true', help='Compress the output files')
+    parser.add_argument('--output-dir', default='exports', help='Directory for the files (default: %(default)s)')
+    args = parser.parse_args(argv)
+
+    unknown = [t for t in args.tables if t not in EXPORT_TABLES]
+    if unknown:
+        parser.error(f"unknown table(s): {', '.join(unknown)}")
+
+    from app import create_app
+
+    try:
+        export_tables(create_app(), args.tables or list(EXPORT_TABLES), args.format,
+                      args.since, args.until, args.gzip, args.output_dir)
+    except PaginationError as e:
+        parser.error(str(e))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,140 @@
+"""
+Feedback triage query specification
+
+The Flask route and the Netlify function both build their SQL here, newest
+first with a keyset on (submitted_at, id), so the same parameters return the
+same pages from either backend. Every filter combination is served by one of
+the (status, submitted_at), (feedback_type, submitted_at) or (submitted_at)
+indexes. Only the standard library is used so the Netlify bundle can import
+this module.
+
+Supported parameters:
+    type       exact feedback_type
+    status     exact status (submitted, under_review, resolved)
+    since      ISO 8601 date or datetime, inclusive
+    until      ISO 8601 date or datetime, exclusive
+    fields     'full' (default) or 'summary', which leaves out `details`
+    limit      page size, see pagination.py
+    cursor     opaque keyset cursor from the previous page's X-Next-Cursor
+"""
+
+import threading
+import time
+from datetime import datetime, timezone
+
+from pagination import PaginationError, decode_cursor, parse_bound, parse_limit, split_page
+from serializers import SERIALIZERS
+
+FEEDBACK_COLUMNS = SERIALIZERS['feedback'].columns
+SUMMARY_COLUMNS = tuple(c for c in FEEDBACK_COLUMNS if c != 'details')
+FEEDBACK_STATUSES = ('submitted', 'under_review', 'resolved')
+
+INDEX_DDL = [
+    'CREATE INDEX IF NOT EXISTS ix_feedback_submitted_at ON feedback (submitted_at)',
+    'CREATE INDEX IF NOT EXISTS ix_feedback_status_submitted_at ON feedback (status, submitted_at)',
+    'CREATE INDEX IF NOT EXISTS ix_feedback_type_submitted_at ON feedback (feedback_type, submitted_at)',
+]
+
+# Each one is a scan of the matching index, which covers it
+COUNT_SQL = {
+    'by_status': 'SELECT status, COUNT(*) FROM feedback GROUP BY status',
+    'by_type': 'SELECT feedback_type, COUNT(*) FROM feedback GROUP BY feedback_type',
+}
+
+# Counts are refreshed at least this often; writers in this process invalidate them sooner
+COUNTS_TTL_SECONDS = 60
+
+
+def ensure_feedback_indexes(conn):
+    """Create the listing indexes on a sqlite3 connection"""
+    for statement in INDEX_DDL:
+        conn.execute(statement)
+
+
+class FeedbackQuery:
+    """A parsed feedback listing request that renders to SQL with named parameters"""
+
+    def __init__(self, feedback_type=None, status=None, since=None, until=None, fields=None, limit=None, cursor=None):
+        self.feedback_type = feedback_type or None
+        self.status = status or None
+        if self.status and self.status not in FEEDBACK_STATUSES:
+            raise PaginationError(f"status must be one of {', '.join(FEEDBACK_STATUSES)}")
+        self.since = parse_bound('since', since)
+        self.until = parse_bound('until', until)
+        fields = fields or 'full'
+        if fields not in ('full', 'summary'):
+            raise PaginationError("fields must be 'full' or 'summary'")
+        self.columns = FEEDBACK_COLUMNS if fields == 'full' else SUMMARY_COLUMNS
+        self.limit = parse_limit(limit)
+        self.cursor = decode_cursor(cursor, size=2)
+        if self.cursor and not isinstance(self.cursor[1], int):
+            raise PaginationError('Invalid cursor')
+
+    @classmethod
+    def from_args(cls, args):
+        """Build from a request.args-like mapping"""
+        return cls(args.get('type'), args.get('status'), args.get('since'), args.get('until'),
+                   args.get('fields'), args.get('limit'), args.get('cursor'))
+
+    def sql(self):
+        where, params = [], {'limit': self.limit + 1}
+        if self.feedback_type:
+            where.append('feedback_type = :feedback_type')
+            params['feedback_type'] = self.feedback_type
+        if self.status:
+            where.append('status = :status')
+            params['status'] = self.status
+        if self.since:
+            where.append('submitted_at >= :since')
+            params['since'] = self.since
+        if self.until:
+            where.append('submitted_at < :until')
+            params['until'] = self.until
+        if self.cursor:
+            where.append('(submitted_at, id) < (:cursor_key, :cursor_id)')
+            params['cursor_key'], params['cursor_id'] = self.cursor
+
+        where_clause = f"WHERE {' AND '.join(where)}" if where else ''
+        sql = (f"SELECT {', '.join(self.columns)} FROM feedback {where_clause} "
+               f"ORDER BY submitted_at DESC, id DESC LIMIT :limit")
+        return sql, params
+
+    def paginate(self, rows):
+        """Return (formatted page, next cursor) from the rows fetched with `sql()`"""
+        date_index = self.columns.index('submitted_at')
+        page, next_cursor = split_page(list(rows), self.limit, lambda row: [row[date_index], row[0]])
+        return SERIALIZERS['feedback'].subset(self.columns).rows(page), next_cursor
+
+
+class FeedbackCounts:
+    """Per-status and per-type feedback counts, kept for up to `ttl` seconds"""
+
+    def __init__(self, ttl=COUNTS_TTL_SECONDS):
+        self.ttl = ttl
+        self._counts = None
+        self._computed_at = 0.0
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def get(self, execute):
+        """Return the counts, running `execute(sql)` -> rows on a miss"""
+        with self._lock:
+            if self._counts is not None and time.monotonic() - self._computed_at < self.ttl:
+                return self._counts
+            generation = self._generation
+        counts = {name: {key or 'unset': count for key, count in execute(sql)} for name, sql in COUNT_SQL.items()}
+        counts['total'] = sum(counts['by_status'].values())
+        counts['as_of'] = datetime.now(timezone.utc).isoformat()
+        with self._lock:
+            # A write that raced the queries invalidated them; serve them once but don't keep them
+            if self._generation == generation:
+                self._counts, self._computed_at = counts, time.monotonic()
+        return counts
+
+    def invalidate(self):
+        with self._lock:
+            self._counts = None
+            self._generation += 1
+
+
+feedback_counts = FeedbackCounts()
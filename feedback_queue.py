@@ -0,0 +1,426 @@
+"""
+Write-behind ingestion queue for feedback submissions
+
+POST /feedback appends the submission to an append-only log on local disk and
+answers 202 as soon as the line is flushed (and fsynced), without touching the
+database. A background applier (see background.py) reads the log from its
+checkpoint and inserts up to FEEDBACK_QUEUE_BATCH records per transaction with
+one executemany INSERT, so a burst of submissions costs one commit per batch
+instead of one per request.
+
+The log is newline-delimited JSON split into numbered segment files
+(feedback-00000001.log, ...). The writer starts a new segment once the current
+one passes FEEDBACK_QUEUE_SEGMENT_BYTES, and the applier deletes a segment once
+it has moved past it.
+
+Recovery: the applier's checkpoint (the 'feedback' row of ingest_checkpoints)
+is advanced in the same transaction as the rows it inserted, with an UPDATE
+conditional on the old position, so after a crash the log is replayed from the
+first record whose insert was not committed and no record is applied twice. A
+line torn by a crash mid-write is terminated when the writer reopens the
+segment and is then skipped as malformed. Only one process may write to a
+queue directory; any number of appliers may run against it.
+
+Settings (environment variables, overridable through app.config):
+    FEEDBACK_QUEUE_DIR            Log directory (default: <instance path>/feedback_queue)
+    FEEDBACK_QUEUE_FSYNC          fsync every append before acknowledging (default: on)
+    FEEDBACK_QUEUE_APPLIER        Apply the log on a background thread (default: on);
+                                  when off, run `python feedback_queue.py` from cron
+    FEEDBACK_QUEUE_BATCH          Records per insert transaction (default: 500)
+    FEEDBACK_QUEUE_SEGMENT_BYTES  Size at which the writer starts a new segment (default: 4 MiB)
+    FEEDBACK_QUEUE_POLL           Seconds between passes when nobody pokes the applier (default: 30)
+
+Usage:
+    python feedback_queue.py            # apply everything queued and exit
+    python feedback_queue.py --stats    # print the backlog without applying it
+"""
+
+import argparse
+import collections
+import json
+import os
+import re
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+
+from background import BackgroundWorker
+from feedback_query import feedback_counts
+
+DEFAULTS = {
+    'FEEDBACK_QUEUE_DIR': '',
+    'FEEDBACK_QUEUE_FSYNC': 'on',
+    'FEEDBACK_QUEUE_APPLIER': 'on',
+    'FEEDBACK_QUEUE_BATCH': 500,
+    'FEEDBACK_QUEUE_SEGMENT_BYTES': 4 * 1024 * 1024,
+    'FEEDBACK_QUEUE_POLL': 30.0,
+}
+
+CHECKPOINT_NAME = 'feedback'
+RECORD_VERSION = 1
+RECORD_FIELDS = ('feedback_type', 'summary', 'details', 'email')
+REQUIRED_FIELDS = ('feedback_type', 'summary', 'details')
+SEGMENT_PATTERN = re.compile(r'^feedback-(\d{8})\.log$')
+
+
+def _setting(app, key):
+    if key in app.config:
+        return app.config[key]
+    return type(DEFAULTS[key])(os.environ.get(key, DEFAULTS[key]))
+
+
+def _enabled(app, key):
+    return str(_setting(app, key)).lower() not in ('', '0', 'false', 'no', 'off')
+
+
+def segment_name(segment):
+    return f'feedback-{segment:08d}.log'
+
+
+class FeedbackQueue:
+    """Append-only, segmented log of feedback submissions"""
+
+    def __init__(self, directory, fsync=True, segment_bytes=DEFAULTS['FEEDBACK_QUEUE_SEGMENT_BYTES']):
+        self.directory = directory
+        self.fsync = fsync
+        self.segment_bytes = segment_bytes
+        self._lock = threading.Lock()
+        self._file = None
+        self._segment = None
+        # (segment, end position, time.time()) of every record this process queued
+        # that the applier has not committed yet, oldest first
+        self._unapplied = collections.deque()
+        self.applied = 0
+        self.skipped = 0
+        self.last_batch_ms = None
+
+    # --- Segments ---
+
+    def segments(self):
+        """Numbers of the segment files on disk, ascending"""
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return []
+        return sorted(int(m.group(1)) for m in map(SEGMENT_PATTERN.match, names) if m)
+
+    def path(self, segment):
+        return os.path.join(self.directory, segment_name(segment))
+
+    def next_segment(self, segment):
+        return next((n for n in self.segments() if n > segment), None)
+
+    def remove_segments_before(self, segment):
+        for n in self.segments():
+            if n < segment:
+                try:
+                    os.remove(self.path(n))
+                except FileNotFoundError:
+                    pass
+
+    def _open_segment(self, segment):
+        os.makedirs(self.directory, exist_ok=True)
+        self._file = open(self.path(segment), 'ab')
+        self._segment = segment
+        size = self._file.tell()
+        if size:
+            with open(self.path(segment), 'rb') as f:
+                f.seek(size - 1)
+                torn = f.read(1) != b'\n'
+            if torn:
+                # Terminate a line cut short by a crash so it reads as one malformed record
+                self._file.write(b'\n')
+                self._sync()
+        elif self.fsync:
+            # Make the new directory entry durable too
+            fd = os.open(self.directory, os.O_RDONLY)
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+
+    def _sync(self):
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+
+    # --- Writing ---
+
+    def append(self, record):
+        """Durably append one submission; returns its (segment, end position)"""
+        line = json.dumps(dict(record, v=RECORD_VERSION, queued_at=datetime.now(timezone.utc).isoformat()),
+                          separators=(',', ':')).encode('utf-8') + b'\n'
+        with self._lock:
+            if self._file is None:
+                self._open_segment((self.segments() or [1])[-1])
+            elif self._file.tell() >= self.segment_bytes:
+                self._file.close()
+                self._open_segment(self._segment + 1)
+            self._file.write(line)
+            self._sync()
+            position = (self._segment, self._file.tell())
+            self._unapplied.append(position + (time.time(),))
+        return position
+
+    def close(self):
+        with self._lock:
+            if self._file:
+                self._file.close()
+                self._file = None
+
+    # --- Reading ---
+
+    def read(self, segment, position, max_records):
+        """Complete lines from `position` on; returns (lines, position after the last one)"""
+        lines = []
+        try:
+            with open(self.path(segment), 'rb') as f:
+                f.seek(position)
+                while len(lines) < max_records:
+                    line = f.readline()
+                    if not line.endswith(b'\n'):
+                        break # End of file, or a line still being written
+                    lines.append(line)
+                    position += len(line)
+        except FileNotFoundError:
+            pass
+        return lines, position
+
+    def mark_applied(self, segment, position, applied, skipped, batch_ms):
+        with self._lock:
+            while self._unapplied and self._unapplied[0][:2] <= (segment, position):
+                self._unapplied.popleft()
+            self.applied += applied
+            self.skipped += skipped
+            self.last_batch_ms = batch_ms
+
+    def lag(self):
+        """Submissions this process queued that are not in the database yet, and the oldest one's age"""
+        with self._lock:
+            oldest = self._unapplied[0][2] if self._unapplied else None
+            return {
+                'pending': len(self._unapplied),
+                'seconds': round(time.time() - oldest, 3) if oldest else 0.0,
+            }
+
+    def backlog(self, segment, position):
+        """Bytes on disk past the checkpoint (segment, position)"""
+        pending = 0
+        for n in self.segments():
+            if n >= segment:
+                try:
+                    pending += os.path.getsize(self.path(n)) - (position if n == segment else 0)
+                except FileNotFoundError:
+                    pass
+        return max(pending, 0)
+
+
+# --- Applying ---
+
+def _parse(line):
+    record = json.loads(line)
+    if record.get('v') != RECORD_VERSION:
+        raise ValueError(f"unknown record version {record.get('v')!r}")
+    row = {field: record.get(field) for field in RECORD_FIELDS}
+    if not all(row[field] for field in REQUIRED_FIELDS):
+        raise ValueError('missing required fields')
+    row['status'] = 'submitted'
+    row['submitted_at'] = datetime.fromisoformat(record['queued_at'])
+    return row
+
+
+def load_checkpoint(queue):
+    """The applier's (segment, position), creating the row at the oldest segment if needed"""
+    from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+    from models import db, IngestCheckpoint
+
+    checkpoint = db.session.get(IngestCheckpoint, CHECKPOINT_NAME)
+    if checkpoint is None:
+        db.session.execute(sqlite_insert(IngestCheckpoint)
+                           .values(name=CHECKPOINT_NAME, segment=(queue.segments() or [1])[0], position=0)
+                           .on_conflict_do_nothing())
+        db.session.commit()
+        checkpoint = db.session.get(IngestCheckpoint, CHECKPOINT_NAME)
+    return checkpoint.segment, checkpoint.position
+
+
+def oldest_unapplied(app):
+    """queued_at of the oldest submission not in the database yet, or None; needs an app context
+
+    Read from the log past the stored checkpoint, so it sees what any process
+    queued, and never writes (it runs on read-only connections too).
+    """
+    from models import db, IngestCheckpoint
+
+    queue = app.extensions['feedback_queue']
+    checkpoint = db.session.get(IngestCheckpoint, CHECKPOINT_NAME)
+    segment, position = (checkpoint.segment, checkpoint.position) if checkpoint else ((queue.segments() or [1])[0], 0)
+    while segment is not None:
+        lines, position = queue.read(segment, position, int(_setting(app, 'FEEDBACK_QUEUE_BATCH')))
+        for line in lines:
+            try:
+                return _parse(line)['submitted_at']
+            except (ValueError, KeyError, TypeError, AttributeError):
+                pass # Skipped by the applier too
+        if not lines:
+            segment, position = queue.next_segment(segment), 0
+    return None
+
+
+def _advance(checkpoint, segment, position):
+    """Move the checkpoint if nobody else did; the caller commits or rolls back"""
+    from sqlalchemy import update
+    from models import db, IngestCheckpoint
+
+    result = db.session.execute(
+        update(IngestCheckpoint)
+        .where(IngestCheckpoint.name == CHECKPOINT_NAME,
+               IngestCheckpoint.segment == checkpoint[0], IngestCheckpoint.position == checkpoint[1])
+        .values(segment=segment, position=position, updated_at=datetime.now(timezone.utc)))
+    return result.rowcount == 1
+
+
+def apply_pending(app, max_batches=None):
+    """Apply queued submissions in batches until the log is drained; returns {'applied', 'skipped'}
+
+    A batch the database refuses (locked, disk full, ...) is rolled back and
+    raised, and the next pass retries it from the same checkpoint.
+    """
+    from sqlalchemy import insert
+    from models import db, Feedback
+
+    queue = app.extensions['feedback_queue']
+    batch_size = int(_setting(app, 'FEEDBACK_QUEUE_BATCH'))
+    counts = {'applied': 0, 'skipped': 0}
+    with app.app_context():
+        checkpoint = load_checkpoint(queue)
+        batches = 0
+        while max_batches is None or batches < max_batches:
+            segment, position = checkpoint
+            # Looked up before reading: the writer creates a segment only after
+            # its last write to the previous one, so that read sees all of it
+            following = queue.next_segment(segment)
+            lines, end = queue.read(segment, position, batch_size)
+            if not lines:
+                if following is None:
+                    break
+                if not _advance(checkpoint, following, 0):
+                    db.session.rollback()
+                    break # Another applier got there first
+                db.session.commit()
+                checkpoint = (following, 0)
+                queue.remove_segments_before(following)
+                continue
+
+            started = time.perf_counter()
+            rows = []
+            for line in lines:
+                try:
+                    rows.append(_parse(line))
+                except (ValueError, KeyError, TypeError, AttributeError) as e:
+                    app.logger.error(f"Skipping malformed feedback record in {segment_name(segment)}@{position}: {e}")
+            try:
+                if rows:
+                    db.session.execute(insert(Feedback), rows) # One executemany for the whole batch
+                if not _advance(checkpoint, segment, end):
+                    db.session.rollback()
+                    break
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                raise
+            checkpoint = (segment, end)
+            if rows:
+                feedback_counts.invalidate()
+            applied, skipped = len(rows), len(lines) - len(rows)
+            queue.mark_applied(segment, end, applied, skipped, round((time.perf_counter() - started) * 1000, 2))
+            counts['applied'] += applied
+            counts['skipped'] += skipped
+            batches += 1
+    return counts
+
+
+def stats(app):
+    """Backlog as seen on disk plus this process's counters; needs an app context"""
+    queue = app.extensions['feedback_queue']
+    segment, position = load_checkpoint(queue)
+    return {
+        'checkpoint': {'segment': segment, 'position': position},
+        'segments': queue.segments(),
+        'pending_bytes': queue.backlog(segment, position),
+        'lag': queue.lag(),
+        'applied': queue.applied,
+        'skipped': queue.skipped,
+        'last_batch_ms': queue.last_batch_ms,
+    }
+
+
+class FeedbackApplier(BackgroundWorker):
+    """Applies the feedback log when poked, and every FEEDBACK_QUEUE_POLL seconds otherwise"""
+
+    def __init__(self, app, poll_seconds=None):
+        if poll_seconds is None:
+            poll_seconds = float(_setting(app, 'FEEDBACK_QUEUE_POLL'))
+        super().__init__('feedback-applier', lambda: apply_pending(app), poll_seconds, app.logger)
+        # Whether the log a previous run left behind has been looked at yet
+        self.replay_checked = False
+
+
+def init_queue(app):
+    """Attach the queue and the (not yet started) applier to the app
+
+    Whatever a previous run left in the log is replayed when the app serves its
+    first request, so CLI commands and scripts that build the app never start
+    the applier thread.
+    """
+    directory = _setting(app, 'FEEDBACK_QUEUE_DIR') or os.path.join(app.instance_path, 'feedback_queue')
+    app.extensions['feedback_queue'] = FeedbackQueue(
+        directory,
+        fsync=_enabled(app, 'FEEDBACK_QUEUE_FSYNC'),
+        segment_bytes=int(_setting(app, 'FEEDBACK_QUEUE_SEGMENT_BYTES')),
+    )
+    if _enabled(app, 'FEEDBACK_QUEUE_APPLIER'):
+        app.extensions['feedback_applier'] = FeedbackApplier(app)
+        app.before_request(replay_leftovers)
+
+
+def replay_leftovers():
+    from flask import current_app
+
+    applier = current_app.extensions['feedback_applier']
+    if not applier.replay_checked:
+        applier.replay_checked = True
+        if current_app.extensions['feedback_queue'].segments():
+            applier.notify()
+
+
+def enqueue(app, record):
+    """Durably queue one submission and poke the applier; returns the queue position"""
+    position = app.extensions['feedback_queue'].append({field: record.get(field) for field in RECORD_FIELDS})
+    applier = app.extensions.get('feedback_applier')
+    if applier:
+        applier.notify()
+    return position
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Apply queued feedback submissions to the database')
+    parser.add_argument('--stats', action='store_true', help='Print the backlog without applying it')
+    args = parser.parse_args(argv)
+
+    from app import create_app
+
+    app = create_app({'FEEDBACK_QUEUE_APPLIER': 'off'})
+    with app.app_context():
+        if not args.stats:
+            counts = apply_pending(app)
+            print(f"📥 Applied {counts['applied']} queued feedback submissions ({counts['skipped']} skipped)")
+        backlog = stats(app)
+    print(f"🗂️  {app.extensions['feedback_queue'].directory}: segments {backlog['segments'] or 'none'}, "
+          f"{backlog['pending_bytes']} bytes pending")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,315 @@
+#!/usr/bin/env python3
+"""
+Synthetic data generator
+Fills the database with realistic prompts, guides, showcase projects, feedback,
+project data and products at any scale, for profiling and benchmarks
+
+Triggers on a table (the showcase search index, the change log) are dropped
+while its rows are loaded and put back afterwards. The search index is then
+rebuilt and the new rows are logged with one INSERT ... SELECT each, which is
+much faster than firing the triggers row by row. Don't load into a database
+the app is writing to at the same time: its writes to that table would not be
+logged while the triggers are gone.
+
+Rows are numbered on from each table's highest id, and the numbers feed the
+unique columns (guide URLs, product SKUs), so running the generator again on
+the same database adds another `scale` rows instead of colliding with the last
+run.
+
+Usage:
+    python generate_data.py --scale 1000000 --seed 7
+    python generate_data.py --scale 5000 --tables prompts,guides --db /tmp/other.db
+"""
+
+import argparse
+import random
+import sqlite3
+import sys
+import time
+from datetime import datetime, timedelta
+
+from change_feed import CHANGE_TABLES
+from url_normalize import url_hash
+
+# Rows per executemany() call; each batch is its own transaction
+BATCH_SIZE = 100000
+
+# Generated timestamps are spread over this many days before the reference date
+HISTORY_DAYS = 730
+
+# Size of the pre-generated pools that long text columns are drawn from
+POOL_SIZE = 4096
+
+PROMPT_CATEGORIES = ['Development', 'Writing', 'Debugging', 'Coding', 'Productivity', 'Automation', 'Testing', 'Documentation']
+SHOWCASE_CATEGORIES = ['Web Development', 'Automation', 'Productivity', 'Development', 'Data Science', 'DevOps', 'Mobile']
+GUIDE_CATEGORIES = ['blogpost', 'youtube', 'redditpost', 'xpost']
+FEEDBACK_TYPES = ['bug', 'feature', 'suggestion', 'general', 'kudos']
+FEEDBACK_STATUSES = ['submitted', 'under_review', 'resolved']
+
+SUBJECTS = ['unit tests', 'a REST API', 'the login flow', 'database migrations', 'a CLI tool', 'React components',
+            'CI pipelines', 'a data pipeline', 'error handling', 'the caching layer', 'a Discord bot', 'API docs']
+VERBS = ['Refactor', 'Review', 'Document', 'Debug', 'Optimize', 'Generate', 'Explain', 'Migrate', 'Test', 'Summarize']
+ADJECTIVES = ['Smart', 'Automated', 'Lightweight', 'Open', 'Rapid', 'Friendly', 'Scalable', 'Tiny', 'Visual', 'Secure']
+NOUNS = ['Task Manager', 'Code Reviewer', 'Doc Bot', 'Changelog Writer', 'Test Runner', 'Issue Triage',
+         'Release Helper', 'Snippet Vault', 'Deploy Monitor', 'Prompt Library']
+PLACEHOLDERS = ['{{language}}', '{{paste code here}}', '{{topic}}', '{{target audience}}', '{{desired tone}}',
+                '{{error message}}', '{{framework}}', '{{file path}}', '{{requirements}}', '{{schema}}']
+SENTENCES = [
+    'Explain each change you make and why it is needed.',
+    'Keep the public interface backwards compatible.',
+    'Point out any edge cases that are not handled.',
+    'Prefer small, focused functions with clear names.',
+    'Include examples of the expected input and output.',
+    'List any assumptions you had to make.',
+    'Flag anything that could be a security problem.',
+    'Suggest tests that would catch a regression.',
+    'Use the existing code style of the project.',
+    'Summarize the result in a short bullet list at the end.',
+]
+BLOG_HOSTS = ['dev.to', 'medium.com', 'blog.example.com', 'hashnode.dev', 'substack.com']
+SUBREDDITS = ['programming', 'Python', 'webdev', 'MachineLearning', 'learnprogramming']
+FEEDBACK_SUMMARIES = ['Form submission fails on {}', 'Add {} support', 'Improve {} performance',
+                      'Typo on the {} page', 'Love the new {}', 'Dark mode for {}']
+FEEDBACK_AREAS = ['mobile', 'the guides page', 'search', 'showcase uploads', 'the prompt library', 'docs', 'Safari']
+
+
+def _base36(number):
+    digits = '0123456789abcdefghijklmnopqrstuvwxyz'
+    out = ''
+    while True:
+        number, rem = divmod(number, 36)
+        out = digits[rem] + out
+        if not number:
+            return out
+
+
+class _Pools:
+    """Pre-generated values that rows are assembled from, so each row costs a few lookups"""
+
+    def __init__(self, rng, now):
+        start = now - timedelta(days=HISTORY_DAYS)
+        self.days = [(start + timedelta(days=d)).strftime('%Y-%m-%d ') for d in range(HISTORY_DAYS + 1)]
+        self.times = [f'{s // 3600:02d}:{s // 60 % 60:02d}:{s % 60:02d}' for s in range(86400)]
+        self.prompt_texts = [self._prompt_text(rng) for _ in range(POOL_SIZE)]
+        self.prompt_titles = [(v, s) for v in VERBS for s in SUBJECTS]
+        self.sentence_runs = [' '.join(rng.sample(SENTENCES, rng.randint(1, 6))) for _ in range(POOL_SIZE)]
+        self.project_names = [f'{a} {n}' for a in ADJECTIVES for n in NOUNS]
+        self.feedback_summaries = [(area, s.format(area)) for s in FEEDBACK_SUMMARIES for area in FEEDBACK_AREAS]
+        self.ratings = [round(rng.triangular(1, 5, 4.3), 2) for _ in range(POOL_SIZE)]
+        # Usage counts follow a long-tailed distribution: most prompts are barely used
+        self.usage_counts = [int(rng.paretovariate(1.2)) - 1 for _ in range(POOL_SIZE)]
+
+    @staticmethod
+    def _prompt_text(rng):
+        # Sentence counts are skewed towards short prompts with a long tail
+        count = min(len(SENTENCES), int(rng.expovariate(0.35)) + 1)
+        placeholders = rng.sample(PLACEHOLDERS, rng.randint(1, 3))
+        lines = [f'{rng.choice(VERBS)} {rng.choice(SUBJECTS)} written in {placeholders[0]}.']
+        lines.extend(rng.sample(SENTENCES, count))
+        lines.extend(f'\n{p.strip("{}").capitalize()}:\n{p}' for p in placeholders[1:])
+        return '\n'.join(lines)
+
+    def timestamps(self, start, count, scale, rng):
+        """Timestamps that grow with the row number, like real submissions, with some jitter"""
+        step = HISTORY_DAYS * 86400 // max(scale, 1)
+        days, times = self.days, self.times
+        out = []
+        for i in range(start, start + count):
+            second = i * step + int(rng.random() * step)
+            out.append(days[second // 86400] + times[second % 86400])
+        return out
+
+
+def prompt_rows(start, count, scale, pools, rng, offset=0):
+    stamps = pools.timestamps(start, count, scale, rng)
+    titles = rng.choices(pools.prompt_titles, k=count)
+    ratings = [r if rng.random() < 0.8 else None for r in rng.choices(pools.ratings, k=count)]
+    return [
+        (f'{verb} {subject} #{i}', category, f'Helps you {verb.lower()} {subject} with Jules.',
+         text, rating, usage, stamp, stamp)
+        for i, (verb, subject), category, text, rating, usage, stamp in zip(
+            range(offset + start, offset + start + count), titles, rng.choices(PROMPT_CATEGORIES, k=count),
+            rng.choices(pools.prompt_texts, k=count), ratings,
+            rng.choices(pools.usage_counts, k=count), stamps)
+    ]
+
+
+def _guide_url(i, category, subject, rng):
+    slug = subject.replace(' ', '-').lower()
+    key = _base36(i * 7919 + 104729)
+    if category == 'youtube':
+        return f'https://www.youtube.com/watch?v={key}'
+    if category == 'redditpost':
+        return f'https://www.reddit.com/r/{rng.choice(SUBREDDITS)}/comments/{key}/{slug}/'
+    if category == 'xpost':
+        return f'https://x.com/jules_fan_{i % 5000}/status/{i + 10**15}'
+    return f'https://{rng.choice(BLOG_HOSTS)}/jules-{slug}-{key}'
+
+
+def guide_rows(start, count, scale, pools, rng, offset=0):
+    stamps = pools.timestamps(start, count, scale, rng)
+    categories = rng.choices(GUIDE_CATEGORIES, k=count)
+    urls = [_guide_url(i, category, subject, rng)
+            for i, category, subject in zip(range(offset + start, offset + start + count), categories, rng.choices(SUBJECTS, k=count))]
+    return [(url, url_hash(url), category, stamp) for url, category, stamp in zip(urls, categories, stamps)]
+
+
+def showcase_rows(start, count, scale, pools, rng, offset=0):
+    stamps = pools.timestamps(start, count, scale, rng)
+    return [
+        (f'{name} {i}', category, f'{name} built with Jules. {sentences}',
+         f'https://github.com/example/{name.replace(" ", "-").lower()}-{i}',
+         f'project_{i}.jpg' if i % 5 == 0 else None, stamp)
+        for i, name, category, sentences, stamp in zip(
+            range(offset + start, offset + start + count), rng.choices(pools.project_names, k=count),
+            rng.choices(SHOWCASE_CATEGORIES, k=count), rng.choices(pools.sentence_runs, k=count), stamps)
+    ]
+
+
+def feedback_rows(start, count, scale, pools, rng, offset=0):
+    stamps = pools.timestamps(start, count, scale, rng)
+    return [
+        (feedback_type, summary, f'Reported on {area}. {sentences}',
+         f'user{i}@example.com' if i % 10 < 7 else None, status, stamp)
+        for i, feedback_type, (area, summary), sentences, status, stamp in zip(
+            range(offset + start, offset + start + count), rng.choices(FEEDBACK_TYPES, k=count),
+            rng.choices(pools.feedback_summaries, k=count), rng.choices(pools.sentence_runs, k=count),
+            rng.choices(FEEDBACK_STATUSES, weights=[6, 3, 1], k=count), stamps)
+    ]
+
+
+def project_data_rows(start, count, scale, pools, rng, offset=0):
+    return [
+        (f'{name} {i}', f'{name}: {sentence}', f'https://example.com/projects/{i}')
+        for i, name, sentence in zip(
+            range(offset + start, offset + start + count), rng.choices(pools.project_names, k=count),
+            rng.choices(SENTENCES, k=count))
+    ]
+
+
+def product_rows(start, count, scale, pools, rng, offset=0):
+    stamps = pools.timestamps(start, count, scale, rng)
+    return [
+        (f'{name} {i}', f'{name}: {sentence}', round(rng.lognormvariate(3, 1), 2), f'GEN-{i:08d}',
+         # About one product in five is out of stock
+         0 if rng.random() < 0.2 else rng.randint(1, 500), stamp)
+        for i, name, sentence, stamp in zip(
+            range(offset + start, offset + start + count), rng.choices(pools.project_names, k=count),
+            rng.choices(SENTENCES, k=count), stamps)
+    ]
+
+
+# Column lists are shared by the Flask schema and the Netlify community.db schema,
+# apart from products, which only the Flask app has
+TABLES = {
+    'prompts': (('title', 'category', 'description', 'prompt_text', 'rating', 'usage_count', 'created_at', 'updated_at'), prompt_rows),
+    'guides': (('url', 'url_hash', 'category', 'submitted_at'), guide_rows),
+    'showcase_projects': (('title', 'category', 'description', 'link', 'image_filename', 'submitted_at'), showcase_rows),
+    'feedback': (('feedback_type', 'summary', 'details', 'email', 'status', 'submitted_at'), feedback_rows),
+    'projects_data': (('name', 'description', 'url'), project_data_rows),
+    'products': (('name', 'description', 'price', 'sku', 'stock_quantity', 'created_at'), product_rows),
+}
+COMMUNITY_TABLES = [table for table in TABLES if table != 'products']
+
+
+def _exists(conn, name):
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE name = ?", (name,)).fetchone() is not None
+
+
+def _drop_triggers(conn, table):
+    """Drop the triggers on `table`; returns their CREATE statements"""
+    triggers = conn.execute("SELECT name, sql FROM sqlite_master WHERE type = 'trigger' AND tbl_name = ?",
+                            (table,)).fetchall()
+    for name, _ in triggers:
+        conn.execute(f'DROP TRIGGER {name}')
+    return [sql for _, sql in triggers]
+
+
+def _catch_up(conn, table, after_id):
+    """Do in bulk what the dropped triggers would have done for the rows with id > after_id"""
+    if table == 'showcase_projects' and _exists(conn, 'showcase_projects_fts'):
+        conn.execute("INSERT INTO showcase_projects_fts(showcase_projects_fts) VALUES ('rebuild')")
+    if table in CHANGE_TABLES and _exists(conn, 'change_log'):
+        # OR REPLACE: an id SQLite reused after a delete replaces its tombstone, as the trigger would
+        conn.execute(f"INSERT OR REPLACE INTO change_log (table_name, row_id, deleted) "
+                     f"SELECT '{table}', id, 0 FROM {table} WHERE id > ? ORDER BY id", (after_id,))
+
+
+def generate(db_path, scale, seed=42, tables=None, batch_size=BATCH_SIZE):
+    """Insert `scale` rows into each table of an existing schema; returns rows per table"""
+    rng = random.Random(seed)
+    pools = _Pools(rng, datetime(2026, 1, 1))  # fixed date so a seed always reproduces the same rows
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    inserted = {}
+    try:
+        conn.execute('PRAGMA journal_mode = WAL')
+        conn.execute('PRAGMA synchronous = OFF')
+        conn.execute('PRAGMA temp_store = MEMORY')
+        for table in tables or TABLES:
+            columns, make_rows = TABLES[table]
+            sql = f'INSERT INTO {table} ({", ".join(columns)}) VALUES ({", ".join("?" for _ in columns)})'
+            last_id = conn.execute(f'SELECT COALESCE(MAX(id), 0) FROM {table}').fetchone()[0]
+            conn.execute('BEGIN')
+            triggers = _drop_triggers(conn, table)
+            conn.execute('COMMIT')
+            try:
+                for start in range(0, scale, batch_size):
+                    rows = make_rows(start, min(batch_size, scale - start), scale, pools, rng, offset=last_id)
+                    conn.execute('BEGIN')
+                    conn.executemany(sql, rows)
+                    conn.execute('COMMIT')
+            finally:
+                if conn.in_transaction:
+                    conn.execute('ROLLBACK')
+                conn.execute('BEGIN')
+                _catch_up(conn, table, last_id)
+                for trigger in triggers:
+                    conn.execute(trigger)
+                conn.execute('COMMIT')
+            inserted[table] = scale
+    finally:
+        conn.close()
+    return inserted
+
+
+def _app_database_path():
+    """Resolve the SQLite file used by the Flask app, creating its tables if needed"""
+    from app import create_app
+    from models import db
+
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        path = db.engine.url.database
+        db.engine.dispose()
+    return path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Generate synthetic community data')
+    parser.add_argument('--scale', type=int, default=10000, help='Rows per table (default: %(default)s)')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed (default: %(default)s)')
+    parser.add_argument('--tables', help=f'Comma separated subset of: {", ".join(TABLES)}')
+    parser.add_argument('--db', help='SQLite file to fill (default: the Flask app database)')
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help='Rows per transaction')
+    args = parser.parse_args(argv)
+
+    tables = args.tables.split(',') if args.tables else list(TABLES)
+    unknown = [t for t in tables if t not in TABLES]
+    if unknown:
+        parser.error(f'unknown table(s): {", ".join(unknown)}')
+
+    db_path = args.db or _app_database_path()
+    print(f"🌱 Generating {args.scale} rows per table into {db_path} (seed {args.seed})...")
+    started = time.perf_counter()
+    inserted = generate(db_path, args.scale, args.seed, tables, args.batch_size)
+    elapsed = time.perf_counter() - started
+    total = sum(inserted.values())
+    for table, count in inserted.items():
+        print(f"   - {count} {table}")
+    print(f"✅ Inserted {total} rows in {elapsed:.1f}s ({total / elapsed:,.0f} rows/s)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
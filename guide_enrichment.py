@@ -0,0 +1,435 @@
+"""
+Background link-metadata enrichment for guides
+
+New guides are stored with enrichment_status 'pending'. create_guide only pokes
+the worker, which runs on its own thread (see background.py): it fetches the pending URLs
+concurrently with asyncio, reads the title, description, favicon and canonical
+URL out of each page's <head>, and stores them on the Guide row ('done'), or
+gives up after the retries ('failed').
+
+Requests go through a thread pool running urllib, so there is no extra
+dependency; asyncio adds the global and per-host concurrency limits, timeouts
+and retries with exponential backoff. Successful responses are kept in an
+on-disk cache, so re-running enrichment (or enriching the same page submitted
+twice) does not hit the remote site again until the cache entry expires.
+
+Guide URLs come from anyone, so only http(s) URLs are fetched, and only from
+public addresses: the host is resolved before connecting, and a connection to a
+loopback, private, link-local or reserved address is refused. The same checks
+run on every redirect hop.
+
+Settings (environment variables, overridable through app.config):
+    GUIDE_ENRICHMENT          Enrich new guides in the background (default: on)
+    ENRICHMENT_CONCURRENCY    Requests in flight overall (default: 8)
+    ENRICHMENT_PER_HOST       Requests in flight per host (default: 2)
+    ENRICHMENT_TIMEOUT        Seconds per request (default: 10)
+    ENRICHMENT_RETRIES        Retries after a timeout, connection error, 429 or 5xx (default: 2)
+    ENRICHMENT_BACKOFF        Seconds before the first retry, doubled each time (default: 1.0)
+    ENRICHMENT_CACHE_DIR      Response cache directory (default: <instance path>/enrichment_cache)
+    ENRICHMENT_CACHE_TTL      Seconds a cached response stays fresh (default: 86400)
+    ENRICHMENT_ALLOW_PRIVATE  Also fetch from private and loopback addresses, for local testing (default: off)
+
+Usage:
+    python guide_enrichment.py    # enrich every pending guide once, e.g. from cron
+"""
+
+import asyncio
+import hashlib
+import http.client
+import ipaddress
+import json
+import os
+import socket
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from html.parser import HTMLParser
+from urllib.parse import urljoin, urlsplit
+
+from background import BackgroundWorker
+from url_normalize import InvalidURL, validate_url
+
+DEFAULTS = {
+    'GUIDE_ENRICHMENT': 'on',
+    'ENRICHMENT_CONCURRENCY': 8,
+    'ENRICHMENT_PER_HOST': 2,
+    'ENRICHMENT_TIMEOUT': 10.0,
+    'ENRICHMENT_RETRIES': 2,
+    'ENRICHMENT_BACKOFF': 1.0,
+    'ENRICHMENT_CACHE_DIR': '',
+    'ENRICHMENT_CACHE_TTL': 86400,
+    'ENRICHMENT_ALLOW_PRIVATE': 'off',
+}
+
+USER_AGENT = 'JulesCommunityBot/1.0 (+link previews for submitted guides)'
+# Only the <head> matters, and it is nearly always in the first few hundred KB
+MAX_BODY_BYTES = 512 * 1024
+# Guides picked up per pass; the worker loops until none are pending
+BATCH_SIZE = 50
+# How often the worker looks for pending guides when nobody pokes it
+POLL_SECONDS = 300
+
+MAX_TITLE_CHARS = 300
+MAX_DESCRIPTION_CHARS = 1000
+MAX_URL_CHARS = 500
+
+
+# --- HTML metadata ---
+
+class MetadataParser(HTMLParser):
+    """Collects <title>, description, icon and canonical link from a page's head"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.title = ''
+        self.meta = {}
+        self.icons = []
+        self.canonical = None
+        self._in_title = False
+
+    def handle_starttag(self, tag, attrs):
+        attrs = {k.lower(): (v or '').strip() for k, v in attrs}
+        if tag == 'title':
+            self._in_title = True
+        elif tag == 'meta':
+            key = (attrs.get('property') or attrs.get('name') or '').lower()
+            if key and attrs.get('content') and key not in self.meta:
+                self.meta[key] = attrs['content']
+        elif tag == 'link' and attrs.get('href'):
+            rel = attrs.get('rel', '').lower().split()
+            if 'canonical' in rel and not self.canonical:
+                self.canonical = attrs['href']
+            elif 'icon' in rel or 'apple-touch-icon' in rel:
+                # Plain icons first, touch icons only as a fallback
+                self.icons.append((0 if 'icon' in rel else 1, attrs['href']))
+
+    def handle_endtag(self, tag):
+        if tag == 'title':
+            self._in_title = False
+
+    def handle_data(self, data):
+        if self._in_title:
+            self.title += data
+
+
+def _clean(text, limit):
+    text = ' '.join((text or '').split())
+    return text[:limit] or None
+
+
+def parse_metadata(html, base_url):
+    """Return title, description, favicon_url and canonical_url for a page fetched from `base_url`"""
+    head_end = html.lower().find('</head>')
+    parser = MetadataParser()
+    parser.feed(html[:head_end] if head_end != -1 else html)
+    meta = parser.meta
+    icon = min(parser.icons)[1] if parser.icons else '/favicon.ico'
+    canonical = parser.canonical or meta.get('og:url') or base_url
+    return {
+        'title': _clean(meta.get('og:title') or parser.title or meta.get('twitter:title'), MAX_TITLE_CHARS),
+        'description': _clean(meta.get('og:description') or meta.get('description')
+                              or meta.get('twitter:description'), MAX_DESCRIPTION_CHARS),
+        'favicon_url': urljoin(base_url, icon)[:MAX_URL_CHARS],
+        'canonical_url': urljoin(base_url, canonical)[:MAX_URL_CHARS],
+    }
+
+
+# --- Response cache ---
+
+class ResponseCache:
+    """Successful responses on disk, one JSON file per URL"""
+
+    def __init__(self, directory, ttl):
+        self.directory = directory
+        self.ttl = ttl
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, url):
+        return os.path.join(self.directory, hashlib.sha256(url.encode('utf-8')).hexdigest() + '.json')
+
+    def get(self, url):
+        try:
+            with open(self._path(url), encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return entry if time.time() - entry['fetched_at'] < self.ttl else None
+
+    def put(self, url, response):
+        entry = dict(response, fetched_at=time.time())
+        # Write then rename, so a concurrent reader never sees half a file
+        tmp_path = f'{self._path(url)}.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(entry, f)
+        os.replace(tmp_path, self._path(url))
+
+
+# --- Fetching ---
+
+class RetryableError(Exception):
+    """Timeouts, connection errors, 429 and 5xx responses"""
+
+
+class BlockedURLError(Exception):
+    """A URL that is not http(s), or whose host resolves to a non-public address; never retried"""
+
+
+def check_url(url):
+    """Raise BlockedURLError unless `url` is an http(s) URL with a host (see url_normalize.validate_url)"""
+    try:
+        validate_url(url)
+    except InvalidURL as e:
+        raise BlockedURLError(str(e))
+
+
+def is_public_address(address):
+    ip = ipaddress.ip_address(address.split('%')[0]) # Drop an IPv6 zone id
+    if ip.version == 6 and ip.ipv4_mapped:
+        ip = ip.ipv4_mapped
+    return not (ip.is_private or ip.is_loopback or ip.is_link_local or ip.is_reserved
+                or ip.is_multicast or ip.is_unspecified)
+
+
+def _public_connection(address, timeout, source_address=None):
+    """socket.create_connection that resolves the host once and refuses any non-public address"""
+    host, port = address
+    try:
+        addresses = socket.getaddrinfo(host, port, type=socket.SOCK_STREAM)
+    except socket.gaierror as e:
+        raise RetryableError(f'Cannot resolve {host}: {e}')
+    for *_, sockaddr in addresses:
+        if not is_public_address(sockaddr[0]):
+            raise BlockedURLError(f'{host} resolves to non-public address {sockaddr[0]}')
+    # Connect to the address just checked, so a second lookup can't swap in another one
+    return socket.create_connection(addresses[0][4][:2], timeout, source_address)
+
+
+class _PublicHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._create_connection = _public_connection
+
+
+class _PublicHTTPSConnection(http.client.HTTPSConnection):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._create_connection = _public_connection
+
+
+class _PublicHTTPHandler(urllib.request.HTTPHandler):
+    def http_open(self, req):
+        return self.do_open(_PublicHTTPConnection, req)
+
+
+class _PublicHTTPSHandler(urllib.request.HTTPSHandler):
+    def https_open(self, req):
+        return self.do_open(_PublicHTTPSConnection, req, context=self._context)
+
+
+class _CheckedRedirectHandler(urllib.request.HTTPRedirectHandler):
+    """Follows a redirect only to another http(s) URL; the new host is checked when it is connected to"""
+
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        try:
+            check_url(newurl)
+        except BlockedURLError:
+            fp.close()
+            raise
+        return super().redirect_request(req, fp, code, msg, headers, newurl)
+
+
+def _opener(allow_private):
+    # Built by hand rather than with build_opener: no file:, ftp: or data: handlers, and no
+    # proxies from the environment, whose address would be checked instead of the site's
+    opener = urllib.request.OpenerDirector()
+    if allow_private:
+        handlers = [urllib.request.HTTPHandler(), urllib.request.HTTPSHandler()]
+    else:
+        handlers = [_PublicHTTPHandler(), _PublicHTTPSHandler()]
+    for handler in handlers + [_CheckedRedirectHandler(), urllib.request.HTTPDefaultErrorHandler(),
+                               urllib.request.HTTPErrorProcessor()]:
+        opener.add_handler(handler)
+    return opener
+
+
+def _fetch_blocking(url, timeout, allow_private=False):
+    check_url(url)
+    request = urllib.request.Request(url, headers={'User-Agent': USER_AGENT, 'Accept': 'text/html,application/xhtml+xml'})
+    try:
+        with _opener(allow_private).open(request, timeout=timeout) as response:
+            body = response.read(MAX_BODY_BYTES)
+            charset = response.headers.get_content_charset() or 'utf-8'
+            return {'status': response.status, 'url': response.geturl(),
+                    'content_type': response.headers.get_content_type(),
+                    'body': body.decode(charset, errors='replace')}
+    except urllib.error.HTTPError as e:
+        if e.code == 429 or e.code >= 500:
+            raise RetryableError(f'HTTP {e.code}')
+        return {'status': e.code, 'url': url, 'content_type': None, 'body': ''}
+    except (urllib.error.URLError, TimeoutError, ConnectionError) as e:
+        raise RetryableError(str(getattr(e, 'reason', e)))
+
+
+class Fetcher:
+    """Fetches URLs concurrently within global and per-host limits; use inside one event loop"""
+
+    def __init__(self, concurrency, per_host, timeout, retries, backoff, cache=None, allow_private=False):
+        self.per_host = per_host
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.cache = cache
+        self.allow_private = allow_private
+        self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='guide-enrichment')
+        self._hosts = {}
+
+    def close(self):
+        self._executor.shutdown(wait=False)
+
+    async def fetch(self, url):
+        """Return the response dict for `url`, from the cache when fresh; raises RetryableError when out of retries"""
+        if self.cache:
+            cached = self.cache.get(url)
+            if cached:
+                return cached
+        check_url(url)
+        host = urlsplit(url).hostname
+        limit = self._hosts.setdefault(host, asyncio.Semaphore(self.per_host))
+        loop = asyncio.get_running_loop()
+        for attempt in range(self.retries + 1):
+            try:
+                async with limit:
+                    # The executor thread may outlive a timed-out wait, but its socket times out too
+                    response = await asyncio.wait_for(
+                        loop.run_in_executor(self._executor, _fetch_blocking, url, self.timeout, self.allow_private),
+                        self.timeout + 1)
+                break
+            except (RetryableError, asyncio.TimeoutError) as e:
+                if attempt == self.retries:
+                    raise RetryableError(str(e) or 'timed out')
+                await asyncio.sleep(self.backoff * 2 ** attempt)
+        if self.cache and _succeeded(response):
+            self.cache.put(url, response)
+        return response
+
+
+def _succeeded(response):
+    # urllib leaves the status unset for a response it didn't get over HTTP
+    return isinstance(response.get('status'), int) and 200 <= response['status'] < 300
+
+
+async def fetch_metadata(fetcher, url):
+    """Return (status, metadata or error message) for one guide URL"""
+    try:
+        response = await fetcher.fetch(url)
+    except Exception as e: # Out of retries, a blocked URL, or one urllib cannot fetch at all
+        return 'failed', f'Fetch failed: {e}'
+    if not _succeeded(response):
+        return 'failed', f"HTTP {response['status']}"
+    if response['content_type'] not in ('text/html', 'application/xhtml+xml'):
+        # Still worth keeping: the canonical URL after redirects
+        return 'done', {'title': None, 'description': None, 'favicon_url': None, 'canonical_url': response['url']}
+    return 'done', parse_metadata(response['body'], response['url'])
+
+
+# --- Running against the database ---
+
+def _setting(app, key):
+    if key in app.config:
+        return app.config[key]
+    return type(DEFAULTS[key])(os.environ.get(key, DEFAULTS[key]))
+
+
+def _flag(app, key):
+    return str(_setting(app, key)).lower() not in ('', '0', 'false', 'no', 'off')
+
+
+def enabled(app):
+    return _flag(app, 'GUIDE_ENRICHMENT')
+
+
+def make_fetcher(app):
+    cache_dir = _setting(app, 'ENRICHMENT_CACHE_DIR') or os.path.join(app.instance_path, 'enrichment_cache')
+    return Fetcher(
+        concurrency=int(_setting(app, 'ENRICHMENT_CONCURRENCY')),
+        per_host=int(_setting(app, 'ENRICHMENT_PER_HOST')),
+        timeout=float(_setting(app, 'ENRICHMENT_TIMEOUT')),
+        retries=int(_setting(app, 'ENRICHMENT_RETRIES')),
+        backoff=float(_setting(app, 'ENRICHMENT_BACKOFF')),
+        cache=ResponseCache(cache_dir, float(_setting(app, 'ENRICHMENT_CACHE_TTL'))),
+        allow_private=_flag(app, 'ENRICHMENT_ALLOW_PRIVATE'),
+    )
+
+
+async def _fetch_all(app, urls):
+    fetcher = make_fetcher(app)
+    try:
+        return await asyncio.gather(*(fetch_metadata(fetcher, url) for url in urls))
+    finally:
+        fetcher.close()
+
+
+def enrich_pending(app):
+    """Enrich every pending guide; returns {'done': n, 'failed': n}"""
+    from models import db, Guide
+
+    counts = {'done': 0, 'failed': 0}
+    with app.app_context():
+        while True:
+            pending = (db.session.query(Guide.id, Guide.url)
+                       .filter(Guide.enrichment_status == 'pending')
+                       .order_by(Guide.id).limit(BATCH_SIZE).all())
+            if not pending:
+                break
+            # No database work while the requests are in flight
+            db.session.commit()
+            results = asyncio.run(_fetch_all(app, [url for _, url in pending]))
+            now = datetime.now(timezone.utc)
+            for (guide_id, _), (status, result) in zip(pending, results):
+                values = {'enrichment_status': status, 'enriched_at': now}
+                if status == 'done':
+                    values.update(result, enrichment_error=None)
+                else:
+                    values['enrichment_error'] = result[:255]
+                db.session.query(Guide).filter(Guide.id == guide_id).update(values)
+                counts[status] += 1
+            db.session.commit()
+            app.logger.info("Enriched guides", extra={"batch": len(pending), "counts": dict(counts)})
+    return counts
+
+
+class EnrichmentWorker(BackgroundWorker):
+    """Enriches pending guides when poked, and every POLL_SECONDS otherwise (see background.py)"""
+
+    def __init__(self, app, poll_seconds=POLL_SECONDS):
+        super().__init__('guide-enrichment', lambda: enrich_pending(app), poll_seconds, app.logger)
+
+
+def init_enrichment(app):
+    """Attach the (not yet started) worker to the app when enrichment is enabled"""
+    if enabled(app):
+        app.extensions['guide_enrichment'] = EnrichmentWorker(app)
+
+
+def notify(app):
+    worker = app.extensions.get('guide_enrichment')
+    if worker:
+        worker.notify()
+
+
+def main():
+    from app import create_app
+
+    app = create_app({'GUIDE_ENRICHMENT': 'off'})
+    print("🔎 Enriching pending guides...")
+    counts = enrich_pending(app)
+    print(f"✅ {counts['done']} enriched, {counts['failed']} failed")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
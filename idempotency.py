@@ -0,0 +1,187 @@
+"""
+Idempotency-Key support for the POST endpoints
+
+A client that retries a POST sends the same Idempotency-Key header with every
+attempt. The first attempt claims the key and runs the view. Its response
+(status, content type and body) is then stored against the key until
+IDEMPOTENCY_TTL seconds have passed, and later attempts get that stored response
+back without running the view. A replayed response carries an
+`Idempotent-Replayed: true` header.
+
+Keys live in the idempotency_keys table, so retries that reach another worker
+process are collapsed too. Each row is keyed by a SHA-256 of the endpoint and
+the client's key, and records a fingerprint of the request.
+
+- Same key, different request: 422. The key was reused for a different submission.
+- Same key while the first attempt is still running: a duplicate in the same
+  process waits for it on a per-key lock and then replays its response. One in
+  another process gets 409 with Retry-After. A claim older than
+  IDEMPOTENCY_PENDING seconds is treated as abandoned and taken over.
+- 5xx responses are not stored: the claim is released so a retry runs again.
+
+Expired rows are purged a few at a time whenever a key is claimed.
+
+Settings (environment variables, overridable through app.config):
+    IDEMPOTENCY_TTL         Seconds a stored response is replayed for (default: 86400)
+    IDEMPOTENCY_PENDING     Seconds before an unfinished claim is considered abandoned (default: 60)
+"""
+
+import functools
+import hashlib
+import os
+import threading
+from datetime import datetime, timedelta, timezone
+
+from flask import Response, current_app, jsonify, make_response, request
+
+DEFAULTS = {
+    'IDEMPOTENCY_TTL': 86400,
+    'IDEMPOTENCY_PENDING': 60,
+}
+
+HEADER = 'Idempotency-Key'
+REPLAYED_HEADER = 'Idempotent-Replayed'
+MAX_KEY_LENGTH = 255
+PURGE_BATCH = 100
+
+
+def _setting(app, key):
+    if key in app.config:
+        return app.config[key]
+    return type(DEFAULTS[key])(os.environ.get(key, DEFAULTS[key]))
+
+
+class KeyLocks:
+    """One lock per key in use, dropped when nobody holds or waits on it"""
+
+    def __init__(self):
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, key):
+        with self._lock:
+            lock, users = self._locks.get(key, (None, 0))
+            lock = lock or threading.Lock()
+            self._locks[key] = (lock, users + 1)
+        lock.acquire()
+
+    def release(self, key):
+        with self._lock:
+            lock, users = self._locks[key]
+            if users == 1:
+                del self._locks[key]
+            else:
+                self._locks[key] = (lock, users - 1)
+        lock.release()
+
+
+key_locks = KeyLocks()
+
+
+def _timestamp(moment):
+    return moment.strftime('%Y-%m-%d %H:%M:%S')
+
+
+def request_fingerprint():
+    """SHA-256 of what the request submits; form uploads hash fields and file contents, not the multipart framing"""
+    digest = hashlib.sha256(f'{request.method} {request.path}\n'.encode('utf-8'))
+    if request.mimetype == 'multipart/form-data':
+        for name, value in sorted(request.form.items(multi=True)):
+            digest.update(f'{name}={value}\n'.encode('utf-8'))
+        for name, upload in sorted(request.files.items(multi=True), key=lambda item: item[0]):
+            digest.update(f'{name}:{upload.filename}:'.encode('utf-8'))
+            digest.update(hashlib.sha256(upload.stream.read()).digest())
+            upload.stream.seek(0)
+    else:
+        digest.update(request.get_data(cache=True))
+    return digest.hexdigest()
+
+
+def _claim(key_hash, fingerprint, now, app):
+    """Claim the key for this request; returns None when claimed, else the existing row"""
+    from sqlalchemy import text
+    from models import db
+
+    expires = _timestamp(now + timedelta(seconds=int(_setting(app, 'IDEMPOTENCY_PENDING'))))
+    params = {'key_hash': key_hash, 'fingerprint': fingerprint, 'expires_at': expires, 'now': _timestamp(now)}
+    # A row whose stored response or abandoned claim has expired is taken over in place
+    claimed = db.session.execute(text(
+        'INSERT INTO idempotency_keys (key_hash, fingerprint, status_code, expires_at) '
+        'VALUES (:key_hash, :fingerprint, NULL, :expires_at) '
+        'ON CONFLICT(key_hash) DO UPDATE SET fingerprint = excluded.fingerprint, status_code = NULL, '
+        'content_type = NULL, body = NULL, expires_at = excluded.expires_at '
+        'WHERE idempotency_keys.expires_at <= :now RETURNING key_hash'), params).first()
+    if claimed:
+        db.session.execute(text(
+            'DELETE FROM idempotency_keys WHERE key_hash IN '
+            '(SELECT key_hash FROM idempotency_keys WHERE expires_at <= :now LIMIT :batch)'),
+            {'now': params['now'], 'batch': PURGE_BATCH})
+        db.session.commit()
+        return None
+    row = db.session.execute(text(
+        'SELECT fingerprint, status_code, content_type, body FROM idempotency_keys WHERE key_hash = :key_hash'),
+        {'key_hash': key_hash}).first()
+    db.session.commit()
+    return row
+
+
+def _store(key_hash, response, now, app):
+    from sqlalchemy import text
+    from models import db
+
+    db.session.rollback() # Whatever the view left open is not part of this write
+    if response.status_code >= 500:
+        db.session.execute(text('DELETE FROM idempotency_keys WHERE key_hash = :key_hash'), {'key_hash': key_hash})
+    else:
+        expires = _timestamp(now + timedelta(seconds=int(_setting(app, 'IDEMPOTENCY_TTL'))))
+        db.session.execute(text(
+            'UPDATE idempotency_keys SET status_code = :status, content_type = :content_type, body = :body, '
+            'expires_at = :expires_at WHERE key_hash = :key_hash'),
+            {'key_hash': key_hash, 'status': response.status_code, 'content_type': response.content_type,
+             'body': response.get_data(), 'expires_at': expires})
+    db.session.commit()
+
+
+def _replay(row):
+    response = Response(row.body, status=row.status_code, content_type=row.content_type)
+    response.headers[REPLAYED_HEADER] = 'true'
+    return response
+
+
+def idempotent(view):
+    """Honour an Idempotency-Key header on a POST view"""
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        key = request.headers.get(HEADER)
+        if key is None:
+            return view(*args, **kwargs)
+        if not key or len(key) > MAX_KEY_LENGTH:
+            return jsonify({"error": f"{HEADER} must be 1 to {MAX_KEY_LENGTH} characters"}), 400
+
+        app = current_app._get_current_object()
+        key_hash = hashlib.sha256(f'{request.endpoint}\n{key}'.encode('utf-8')).hexdigest()
+        fingerprint = request_fingerprint()
+        # Collapses concurrent duplicates in this process; other processes see the claim row
+        key_locks.acquire(key_hash)
+        try:
+            now = datetime.now(timezone.utc).replace(tzinfo=None)
+            existing = _claim(key_hash, fingerprint, now, app)
+            if existing is not None:
+                if existing.fingerprint != fingerprint:
+                    return jsonify({"error": f"This {HEADER} was already used for a different request"}), 422
+                if existing.status_code is None:
+                    response = jsonify({"error": f"A request with this {HEADER} is still being processed"})
+                    response.status_code = 409
+                    response.headers['Retry-After'] = '1'
+                    return response
+                return _replay(existing)
+            try:
+                response = make_response(view(*args, **kwargs))
+            except Exception:
+                _store(key_hash, make_response('', 500), now, app)
+                raise
+            _store(key_hash, response, now, app)
+            return response
+        finally:
+            key_locks.release(key_hash)
+    return wrapper
@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+"""
+Chunked NDJSON / CSV import into any table in models.py
+
+The file is read CHUNK_ROWS records at a time and every chunk is one
+transaction: a single executemany INSERT ... ON CONFLICT DO NOTHING plus the
+import's checkpoint (a row of ingest_checkpoints named after the table and the
+file). An interrupted import resumes after the last committed chunk, and rows
+that collide with a unique constraint (a guide's url_hash, a user's email, a
+product's SKU, ...) are counted as duplicates rather than failing the load.
+A record that can't be stored at all (a NOT NULL column left empty, a guide URL
+that doesn't parse) is reported by its record number and skipped.
+
+Records are written as SQLite stores them, so export_data.py output (plain or
+.gz) loads back unchanged. Empty CSV fields become NULL, missing columns take
+the model's default, ids are dropped unless --keep-ids is given, and guides get
+their url_hash recomputed so URL deduplication applies to imported guides too.
+
+--rebuild-indexes drops the table's non-unique indexes for the load and
+recreates them from models.py at the end, which also repairs them after an
+import that was interrupted mid-load. Unique indexes stay, since deduplication
+relies on them.
+
+Usage:
+    python import_data.py guides exports/guides.ndjson.gz
+    python import_data.py feedback feedback.csv --chunk-size 20000 --rebuild-indexes
+    python import_data.py prompts prompts.ndjson --restart    # ignore the saved checkpoint
+"""
+
+import argparse
+import csv
+import gzip
+import hashlib
+import json
+import os
+import sys
+import time
+from datetime import datetime, timezone
+
+from url_normalize import url_hash
+
+CHUNK_ROWS = 5000
+# Tables that only the app itself writes
+EXCLUDED_TABLES = {'ingest_checkpoints', 'alembic_version'}
+
+
+class ImportFailed(ValueError):
+    """A file or record that cannot be imported; the CLI reports it and exits"""
+
+
+def _prepare_guide(record):
+    # Always derived from the URL, so a stale or missing hash can't dodge deduplication
+    record['url_hash'] = url_hash(record['url']) if record.get('url') else None
+    return record
+
+
+# Per-table fix-ups applied to every record before it is inserted
+ROW_RULES = {
+    'guides': _prepare_guide,
+}
+
+
+def detect_format(path):
+    name = path[:-3] if path.endswith('.gz') else path
+    if name.endswith('.csv'):
+        return 'csv'
+    if name.endswith(('.ndjson', '.jsonl', '.json')):
+        return 'ndjson'
+    raise ImportFailed(f"Can't tell the format of {path}; pass --format")
+
+
+def read_records(path, fmt):
+    """Yield one dict per record; CSV fields that are empty become None"""
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rt', encoding='utf-8', newline='') as f:
+        if fmt == 'csv':
+            for row in csv.DictReader(f):
+                yield {key: (value if value != '' else None) for key, value in row.items()}
+        else:
+            for number, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError as e:
+                    raise ImportFailed(f'{path}:{number}: {e}')
+                if not isinstance(record, dict):
+                    raise ImportFailed(f'{path}:{number}: expected a JSON object')
+                yield record
+
+
+def checkpoint_name(table, path):
+    """Checkpoint key for importing `path` into `table`; changes when the file does"""
+    stat = os.stat(path)
+    fingerprint = f'{os.path.abspath(path)}:{stat.st_size}:{stat.st_mtime_ns}'
+    return f'import:{table}:{hashlib.sha1(fingerprint.encode()).hexdigest()[:12]}'
+
+
+def save_checkpoint(conn, name, position, segment=0):
+    """Upsert a row of ingest_checkpoints; call it in the transaction that did the work"""
+    from sqlalchemy import text
+
+    conn.execute(text(
+        'INSERT INTO ingest_checkpoints (name, segment, position, updated_at) '
+        'VALUES (:name, :segment, :position, CURRENT_TIMESTAMP) '
+        'ON CONFLICT(name) DO UPDATE SET segment = excluded.segment, position = excluded.position, '
+        'updated_at = excluded.updated_at'),
+        {'name': name, 'segment': segment, 'position': position})
+
+
+class TableLoader:
+    """Turns records into parameter tuples for one table and inserts them in chunks
+
+    Rows colliding with a unique constraint are skipped. Tables without one can
+    name a natural `key` instead: a row is skipped when one with the same key
+    values (NULLs matching NULLs) already exists.
+    """
+
+    def __init__(self, table, keep_ids=False, key=None):
+        self.table = table
+        self.columns = [c for c in table.columns if keep_ids or not c.primary_key]
+        self.rule = ROW_RULES.get(table.name)
+        # executemany needs every column in every row, so the defaults SQLite or the
+        # ORM would have applied to a missing value are filled in here
+        self.defaults = {c.name: c.default.arg for c in self.columns
+                         if c.default is not None and c.default.is_scalar}
+        # server_default is either a literal ('pending') or func.now()
+        self.server_defaults = {c.name: c.server_default.arg if isinstance(c.server_default.arg, str) else None
+                                for c in self.columns if c.server_default is not None}
+        names = ', '.join(c.name for c in self.columns)
+        marks = ', '.join('?' for _ in self.columns)
+        self.key = [[c.name for c in self.columns].index(name) for name in key or ()]
+        if self.key:
+            match = ' AND '.join(f'{name} IS ?' for name in key)
+            self.sql = (f'INSERT INTO {table.name} ({names}) SELECT {marks} '
+                        f'WHERE NOT EXISTS (SELECT 1 FROM {table.name} WHERE {match})')
+        else:
+            self.sql = f'INSERT INTO {table.name} ({names}) VALUES ({marks}) ON CONFLICT DO NOTHING'
+
+    def params(self, record, now):
+        if self.rule:
+            record = self.rule(dict(record))
+        values = []
+        for column in self.columns:
+            value = record.get(column.name)
+            if value is None:
+                value = self.defaults.get(column.name)
+            if value is None and column.name in self.server_defaults:
+                value = self.server_defaults[column.name] or now
+            values.append(value)
+        return tuple(values) + tuple(values[i] for i in self.key)
+
+    def insert(self, conn, records):
+        """Insert one chunk; returns how many rows were new"""
+        # Same text CURRENT_TIMESTAMP would have stored
+        now = datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+        # executemany's rowcount sums sqlite3_changes(), which leaves out rows written
+        # by triggers (the showcase search index) and rows ON CONFLICT skipped
+        return conn.exec_driver_sql(self.sql, [self.params(r, now) for r in records]).rowcount
+
+
+def droppable_indexes(table):
+    return [index for index in table.indexes if not index.unique]
+
+
+def import_file(app, table_name, path, fmt=None, chunk_rows=CHUNK_ROWS, keep_ids=False,
+                rebuild_indexes=False, restart=False, out=sys.stdout):
+    """Load `path` into `table_name`; returns {'read', 'inserted', 'duplicates', 'rejected', 'seconds'}"""
+    from sqlalchemy import text
+    from sqlalchemy.exc import IntegrityError, ProgrammingError
+    from models import db
+
+    # What a record's own values can raise (bad URLs, unbindable types, constraint failures),
+    # as opposed to errors that should stop the import
+    rejections = (ValueError, TypeError, OverflowError, IntegrityError, ProgrammingError)
+    table = db.Model.metadata.tables.get(table_name)
+    if table is None or table_name in EXCLUDED_TABLES:
+        raise ImportFailed(f'Unknown table: {table_name}')
+    fmt = fmt or detect_format(path)
+    loader = TableLoader(table, keep_ids)
+    name = checkpoint_name(table_name, path)
+    counts = {'read': 0, 'inserted': 0, 'duplicates': 0, 'rejected': 0}
+
+    with app.app_context(), db.engine.connect() as conn:
+        with conn.begin():
+            if restart:
+                conn.execute(text('DELETE FROM ingest_checkpoints WHERE name = :name'), {'name': name})
+            done = conn.execute(text('SELECT position FROM ingest_checkpoints WHERE name = :name'),
+                                {'name': name}).scalar() or 0
+        if done:
+            print(f"⏩ Resuming after record {done} (checkpoint {name})", file=out)
+
+        if rebuild_indexes:
+            with conn.begin():
+                for index in droppable_indexes(table):
+                    index.drop(conn, checkfirst=True)
+
+        started = time.perf_counter()
+        records = read_records(path, fmt)
+        position = 0
+        for _ in range(done):
+            if next(records, None) is None:
+                break
+            position += 1
+        chunk = []
+        while True:
+            record = next(records, None)
+            if record is not None:
+                chunk.append(record)
+                if len(chunk) < chunk_rows:
+                    continue
+            if not chunk:
+                break
+            try:
+                with conn.begin():
+                    inserted = loader.insert(conn, chunk)
+                    save_checkpoint(conn, name, position + len(chunk))
+                rejected = 0
+            except rejections:
+                # One bad record fails the whole executemany; load the chunk again row by row
+                # so only that record is skipped and the checkpoint still moves past it
+                inserted = rejected = 0
+                with conn.begin():
+                    for number, record in enumerate(chunk, position + 1):
+                        try:
+                            inserted += loader.insert(conn, [record])
+                        except rejections as e:
+                            rejected += 1
+                            print(f"⚠️  Record {number} rejected: {getattr(e, 'orig', None) or e}", file=out)
+                    save_checkpoint(conn, name, position + len(chunk))
+            position += len(chunk)
+            counts['read'] += len(chunk)
+            counts['inserted'] += inserted
+            counts['rejected'] += rejected
+            counts['duplicates'] += len(chunk) - inserted - rejected
+            elapsed = time.perf_counter() - started
+            print(f"   {position:>10} records  {counts['read'] / max(elapsed, 1e-9):>10,.0f} rows/s", file=out)
+            chunk = []
+            if record is None:
+                break
+
+        if rebuild_indexes:
+            index_started = time.perf_counter()
+            with conn.begin():
+                for index in droppable_indexes(table):
+                    index.create(conn, checkfirst=True)
+            print(f"🗂️  Rebuilt {len(droppable_indexes(table))} indexes in {time.perf_counter() - index_started:.1f}s", file=out)
+
+    counts['seconds'] = round(time.perf_counter() - started, 3)
+    return counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Import an NDJSON or CSV file into a table, in resumable chunks')
+    parser.add_argument('table', help='Table name from models.py, e.g. guides or feedback')
+    parser.add_argument('path', help='.ndjson/.jsonl or .csv file, optionally gzipped')
+    parser.add_argument('--format', choices=['ndjson', 'csv'], help='Override the format taken from the file name')
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_ROWS, help='Records per transaction (default: %(default)s)')
+    parser.add_argument('--keep-ids', action='store_true', help='Insert the ids from the file instead of assigning new ones')
+    parser.add_argument('--rebuild-indexes', action='store_true', help='Drop non-unique indexes for the load and rebuild them after')
+    parser.add_argument('--restart', action='store_true', help='Ignore the saved checkpoint and start from the first record')
+    args = parser.parse_args(argv)
+
+    from app import create_app
+
+    print(f"📥 Importing {args.path} into {args.table}...")
+    try:
+        counts = import_file(create_app(), args.table, args.path, args.format, args.chunk_size,
+                             args.keep_ids, args.rebuild_indexes, args.restart)
+    except ImportFailed as e:
+        print(f"❌ {e}", file=sys.stderr)
+        print("   Earlier chunks are committed; rerunning on the unchanged file resumes after them.", file=sys.stderr)
+        return 1
+    except KeyboardInterrupt:
+        print("⏸️  Interrupted; run the same command again to resume from the last checkpoint.", file=sys.stderr)
+        return 130
+    rate = counts['read'] / max(counts['seconds'], 1e-9)
+    print(f"✅ {counts['inserted']} rows inserted, {counts['duplicates']} duplicates skipped, "
+          f"{counts['rejected']} rejected, {counts['read']} records in {counts['seconds']:.1f}s ({rate:,.0f} rows/s)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
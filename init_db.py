@@ -1,8 +1,9 @@
-from app import app
+from app import create_app
 from models import db, User, ApplicationSetting, Product, Prompt, Guide, ShowcaseProject, Project
 from decimal import Decimal
 
 def initialize_database():
+    app = create_app()
     with app.app_context():
         print("Initializing database...")
         # The table creation is now handled by Flask-Migrate, so create_all() is not needed.
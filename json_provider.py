@@ -0,0 +1,34 @@
+"""
+jsonify() and request.get_json() through serializers.dumps/loads
+
+With orjson installed, encoding and decoding run in native code; without it
+they fall back to the standard library. Output matches Flask's defaults apart
+from two things. Keys keep their insertion order, so responses list the fields
+in the order serializers.py declares them. Non-ASCII text is sent as UTF-8
+rather than as \\u escapes. Debug mode still pretty-prints through Flask's own
+provider.
+"""
+
+from flask.json.provider import DefaultJSONProvider
+
+import serializers
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    sort_keys = False
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        if (self.compact is None and self._app.debug) or self.compact is False:
+            return super().response(obj)
+        return self._app.response_class(serializers.dumps(obj, self.default, self.sort_keys) + b'\n',
+                                        mimetype=self.mimetype)
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return serializers.loads(s)
+
+
+def configure_json(app):
+    app.json = FastJSONProvider(app)
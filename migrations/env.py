@@ -51,6 +51,21 @@ def get_metadata():
     return target_db.metadata
 
 
+# Schema kept outside models.py that autogenerate can't compare: the FTS5 search
+# table with its shadow tables (see showcase_query.SEARCH_DDL), and the
+# expression index behind the catalog's case-insensitive name sort
+UNMODELED_TABLE_PREFIX = 'showcase_projects_fts'
+EXPRESSION_INDEXES = {'ix_products_name_nocase'}
+
+
+def include_object(object, name, type_, reflected, compare_to):
+    if type_ == 'table' and name.startswith(UNMODELED_TABLE_PREFIX):
+        return False
+    if type_ == 'index' and name in EXPRESSION_INDEXES:
+        return False
+    return True
+
+
 def run_migrations_offline():
     """Run migrations in 'offline' mode.
 
@@ -65,7 +80,8 @@ def run_migrations_offline():
     """
     url = config.get_main_option("sqlalchemy.url")
     context.configure(
-        url=url, target_metadata=get_metadata(), literal_binds=True
+        url=url, target_metadata=get_metadata(), literal_binds=True,
+        include_object=include_object
     )
 
     with context.begin_transaction():
@@ -93,6 +109,7 @@ def run_migrations_online():
     conf_args = current_app.extensions['migrate'].configure_args
     if conf_args.get("process_revision_directives") is None:
         conf_args["process_revision_directives"] = process_revision_directives
+    conf_args.setdefault("include_object", include_object)
 
     connectable = get_engine()
 
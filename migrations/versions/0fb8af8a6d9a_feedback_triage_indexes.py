@@ -0,0 +1,31 @@
+"""Feedback triage listing indexes
+
+Revision ID: 0fb8af8a6d9a
+Revises: c90eb6976c63
+Create Date: 2026-10-19 18:47:05.311462
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0fb8af8a6d9a'
+down_revision = 'c90eb6976c63'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Newest first, optionally by status or type (see feedback_query.py)
+    with op.batch_alter_table('feedback', schema=None) as batch_op:
+        batch_op.create_index('ix_feedback_submitted_at', ['submitted_at'], unique=False)
+        batch_op.create_index('ix_feedback_status_submitted_at', ['status', 'submitted_at'], unique=False)
+        batch_op.create_index('ix_feedback_type_submitted_at', ['feedback_type', 'submitted_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('feedback', schema=None) as batch_op:
+        batch_op.drop_index('ix_feedback_type_submitted_at')
+        batch_op.drop_index('ix_feedback_status_submitted_at')
+        batch_op.drop_index('ix_feedback_submitted_at')
@@ -0,0 +1,51 @@
+"""Change log for the /changes feed
+
+Revision ID: 727e58a0dbb9
+Revises: a122cb14583c
+Create Date: 2026-10-19 20:14:09.553270
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '727e58a0dbb9'
+down_revision = 'a122cb14583c'
+branch_labels = None
+depends_on = None
+
+TABLES = ['prompts', 'guides', 'showcase_projects', 'projects_data']
+
+
+def upgrade():
+    op.create_table('change_log',
+    sa.Column('seq', sa.Integer(), nullable=False),
+    sa.Column('table_name', sa.String(length=30), nullable=False),
+    sa.Column('row_id', sa.Integer(), nullable=False),
+    sa.Column('deleted', sa.Boolean(), server_default='0', nullable=False),
+    sa.PrimaryKeyConstraint('seq'),
+    sqlite_autoincrement=True
+    )
+    with op.batch_alter_table('change_log', schema=None) as batch_op:
+        batch_op.create_index('ix_change_log_table_row', ['table_name', 'row_id'], unique=True)
+
+    # Existing rows come first in the feed, so since=0 returns the whole data set
+    for table in TABLES:
+        op.execute(f"INSERT INTO change_log (table_name, row_id, deleted) SELECT '{table}', id, 0 FROM {table} ORDER BY id")
+        # Each change replaces the row's entry, so seq only grows (see change_feed.py)
+        for event, ref, deleted in (('INSERT', 'new', 0), ('UPDATE', 'new', 0), ('DELETE', 'old', 1)):
+            op.execute(
+                f"CREATE TRIGGER {table}_change_log_{event[0].lower()} AFTER {event} ON {table} BEGIN "
+                f"DELETE FROM change_log WHERE table_name = '{table}' AND row_id = {ref}.id; "
+                f"INSERT INTO change_log (table_name, row_id, deleted) VALUES ('{table}', {ref}.id, {deleted}); END")
+
+
+def downgrade():
+    for table in TABLES:
+        for event in 'iud':
+            op.execute(f'DROP TRIGGER IF EXISTS {table}_change_log_{event}')
+    with op.batch_alter_table('change_log', schema=None) as batch_op:
+        batch_op.drop_index('ix_change_log_table_row')
+
+    op.drop_table('change_log')
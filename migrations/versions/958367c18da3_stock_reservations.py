@@ -0,0 +1,41 @@
+"""Stock reservations
+
+Revision ID: 958367c18da3
+Revises: a59131204fd9
+Create Date: 2026-10-19 22:14:08.316527
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '958367c18da3'
+down_revision = 'a59131204fd9'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('stock_reservations',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('token', sa.String(length=32), nullable=False),
+    sa.Column('product_id', sa.Integer(), nullable=False),
+    sa.Column('quantity', sa.Integer(), nullable=False),
+    sa.Column('status', sa.String(length=20), server_default='held', nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+    sa.Column('expires_at', sa.DateTime(timezone=True), nullable=False),
+    sa.ForeignKeyConstraint(['product_id'], ['products.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('stock_reservations', schema=None) as batch_op:
+        batch_op.create_index('ix_stock_reservations_status_expires_at', ['status', 'expires_at'], unique=False)
+        batch_op.create_index(batch_op.f('ix_stock_reservations_token'), ['token'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('stock_reservations', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_stock_reservations_token'))
+        batch_op.drop_index('ix_stock_reservations_status_expires_at')
+
+    op.drop_table('stock_reservations')
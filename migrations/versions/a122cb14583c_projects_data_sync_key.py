@@ -0,0 +1,27 @@
+"""Index the projects_data sync key
+
+Revision ID: a122cb14583c
+Revises: 0fb8af8a6d9a
+Create Date: 2026-10-19 19:32:41.208135
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a122cb14583c'
+down_revision = '0fb8af8a6d9a'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Looked up for every row merged from a Netlify snapshot (see sync_community_db.py)
+    with op.batch_alter_table('projects_data', schema=None) as batch_op:
+        batch_op.create_index('ix_projects_data_name_url', ['name', 'url'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('projects_data', schema=None) as batch_op:
+        batch_op.drop_index('ix_projects_data_name_url')
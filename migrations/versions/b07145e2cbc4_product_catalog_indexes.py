@@ -0,0 +1,30 @@
+"""Product catalog indexes
+
+Revision ID: b07145e2cbc4
+Revises: 958367c18da3
+Create Date: 2026-10-19 23:02:41.907113
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b07145e2cbc4'
+down_revision = '958367c18da3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('products', schema=None) as batch_op:
+        batch_op.create_index('ix_products_name_nocase', [sa.text('name COLLATE NOCASE')], unique=False)
+        batch_op.create_index('ix_products_price', ['price'], unique=False)
+        batch_op.create_index('ix_products_created_at', ['created_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('products', schema=None) as batch_op:
+        batch_op.drop_index('ix_products_created_at')
+        batch_op.drop_index('ix_products_price')
+        batch_op.drop_index('ix_products_name_nocase')
@@ -0,0 +1,47 @@
+"""Feedback table and ingest checkpoints for the feedback queue
+
+Revision ID: c90eb6976c63
+Revises: d123fb653cf5
+Create Date: 2026-10-19 18:02:37.550281
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c90eb6976c63'
+down_revision = 'd123fb653cf5'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # The feedback model never got a migration; databases built with
+    # db.create_all() already have the table
+    if not sa.inspect(op.get_bind()).has_table('feedback'):
+        op.create_table('feedback',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('feedback_type', sa.String(length=20), nullable=False),
+        sa.Column('summary', sa.String(length=200), nullable=False),
+        sa.Column('details', sa.Text(), nullable=False),
+        sa.Column('email', sa.String(length=120), nullable=True),
+        sa.Column('status', sa.String(length=20), nullable=True),
+        sa.Column('submitted_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+        )
+        with op.batch_alter_table('feedback', schema=None) as batch_op:
+            batch_op.create_index(batch_op.f('ix_feedback_id'), ['id'], unique=False)
+
+    op.create_table('ingest_checkpoints',
+    sa.Column('name', sa.String(length=50), nullable=False),
+    sa.Column('segment', sa.Integer(), nullable=False),
+    sa.Column('position', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+    sa.PrimaryKeyConstraint('name')
+    )
+
+
+def downgrade():
+    # feedback is left in place: it may hold submissions from before this revision
+    op.drop_table('ingest_checkpoints')
@@ -0,0 +1,41 @@
+"""Link preview columns for guides
+
+Revision ID: d123fb653cf5
+Revises: ef433b85ba48
+Create Date: 2026-10-19 17:21:48.905114
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd123fb653cf5'
+down_revision = 'ef433b85ba48'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Existing guides start out pending, so the worker backfills them
+    with op.batch_alter_table('guides', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('title', sa.String(length=300), nullable=True))
+        batch_op.add_column(sa.Column('description', sa.Text(), nullable=True))
+        batch_op.add_column(sa.Column('favicon_url', sa.String(length=500), nullable=True))
+        batch_op.add_column(sa.Column('canonical_url', sa.String(length=500), nullable=True))
+        batch_op.add_column(sa.Column('enrichment_status', sa.String(length=20), server_default='pending', nullable=False))
+        batch_op.add_column(sa.Column('enrichment_error', sa.String(length=255), nullable=True))
+        batch_op.add_column(sa.Column('enriched_at', sa.DateTime(timezone=True), nullable=True))
+        batch_op.create_index(batch_op.f('ix_guides_enrichment_status'), ['enrichment_status'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('guides', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_guides_enrichment_status'))
+        batch_op.drop_column('enriched_at')
+        batch_op.drop_column('enrichment_error')
+        batch_op.drop_column('enrichment_status')
+        batch_op.drop_column('canonical_url')
+        batch_op.drop_column('favicon_url')
+        batch_op.drop_column('description')
+        batch_op.drop_column('title')
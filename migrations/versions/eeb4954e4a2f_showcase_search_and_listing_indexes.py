@@ -0,0 +1,57 @@
+"""Showcase full-text search and listing indexes
+
+Revision ID: eeb4954e4a2f
+Revises: b125ffd51589
+Create Date: 2026-10-19 09:12:40.118203
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'eeb4954e4a2f'
+down_revision = 'b125ffd51589'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('showcase_projects', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_showcase_projects_category'))
+        batch_op.create_index('ix_showcase_projects_submitted_at', ['submitted_at'], unique=False)
+        batch_op.create_index('ix_showcase_projects_category_submitted_at', ['category', 'submitted_at'], unique=False)
+
+    # FTS5 index over title/description, kept in sync by triggers (see showcase_query.py)
+    op.execute(
+        "CREATE VIRTUAL TABLE showcase_projects_fts USING fts5("
+        "title, description, content='showcase_projects', content_rowid='id', tokenize='porter unicode61')"
+    )
+    op.execute(
+        "CREATE TRIGGER showcase_projects_fts_ai AFTER INSERT ON showcase_projects BEGIN "
+        "INSERT INTO showcase_projects_fts(rowid, title, description) VALUES (new.id, new.title, new.description); END"
+    )
+    op.execute(
+        "CREATE TRIGGER showcase_projects_fts_ad AFTER DELETE ON showcase_projects BEGIN "
+        "INSERT INTO showcase_projects_fts(showcase_projects_fts, rowid, title, description) "
+        "VALUES ('delete', old.id, old.title, old.description); END"
+    )
+    op.execute(
+        "CREATE TRIGGER showcase_projects_fts_au AFTER UPDATE OF title, description ON showcase_projects BEGIN "
+        "INSERT INTO showcase_projects_fts(showcase_projects_fts, rowid, title, description) "
+        "VALUES ('delete', old.id, old.title, old.description); "
+        "INSERT INTO showcase_projects_fts(rowid, title, description) VALUES (new.id, new.title, new.description); END"
+    )
+    op.execute("INSERT INTO showcase_projects_fts(showcase_projects_fts) VALUES ('rebuild')")
+
+
+def downgrade():
+    op.execute('DROP TRIGGER IF EXISTS showcase_projects_fts_au')
+    op.execute('DROP TRIGGER IF EXISTS showcase_projects_fts_ad')
+    op.execute('DROP TRIGGER IF EXISTS showcase_projects_fts_ai')
+    op.execute('DROP TABLE IF EXISTS showcase_projects_fts')
+
+    with op.batch_alter_table('showcase_projects', schema=None) as batch_op:
+        batch_op.drop_index('ix_showcase_projects_category_submitted_at')
+        batch_op.drop_index('ix_showcase_projects_submitted_at')
+        batch_op.create_index(batch_op.f('ix_showcase_projects_category'), ['category'], unique=False)
@@ -0,0 +1,49 @@
+"""Deduplicate guides on a hash of the canonical URL
+
+Revision ID: ef433b85ba48
+Revises: eeb4954e4a2f
+Create Date: 2026-10-19 16:05:12.402917
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from url_normalize import URL_HASH_LENGTH, url_hash
+
+
+# revision identifiers, used by Alembic.
+revision = 'ef433b85ba48'
+down_revision = 'eeb4954e4a2f'
+branch_labels = None
+depends_on = None
+
+# The initial migration left the url unique constraint unnamed
+NAMING_CONVENTION = {'uq': 'uq_%(table_name)s_%(column_0_name)s'}
+
+
+def upgrade():
+    with op.batch_alter_table('guides', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('url_hash', sa.String(length=URL_HASH_LENGTH), nullable=True))
+
+    # Backfill, then keep only the first submission of every canonical URL
+    conn = op.get_bind()
+    guides = sa.table('guides', sa.column('id', sa.Integer), sa.column('url', sa.String), sa.column('url_hash', sa.String))
+    rows = conn.execute(sa.select(guides.c.id, guides.c.url)).fetchall()
+    if rows:
+        conn.execute(
+            guides.update().where(guides.c.id == sa.bindparam('guide_id')).values(url_hash=sa.bindparam('hash')),
+            [{'guide_id': id, 'hash': url_hash(url)} for id, url in rows],
+        )
+    op.execute('DELETE FROM guides WHERE id NOT IN (SELECT MIN(id) FROM guides GROUP BY url_hash)')
+
+    with op.batch_alter_table('guides', schema=None, naming_convention=NAMING_CONVENTION) as batch_op:
+        batch_op.alter_column('url_hash', existing_type=sa.String(length=URL_HASH_LENGTH), nullable=False)
+        batch_op.drop_constraint('uq_guides_url', type_='unique')
+        batch_op.create_index('ix_guides_url_hash', ['url_hash'], unique=True)
+
+
+def downgrade():
+    with op.batch_alter_table('guides', schema=None, naming_convention=NAMING_CONVENTION) as batch_op:
+        batch_op.drop_index('ix_guides_url_hash')
+        batch_op.create_unique_constraint('uq_guides_url', ['url'])
+        batch_op.drop_column('url_hash')
@@ -1,8 +1,14 @@
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import DDL, event
 from sqlalchemy.sql import func
 from decimal import Decimal # For Numeric types if used by existing models
+from showcase_query import SEARCH_DDL, DROP_SEARCH_DDL
+from change_feed import CHANGE_LOG_INDEX, CHANGE_TABLES, trigger_ddl
+from url_normalize import URL_HASH_LENGTH, url_hash
+from read_routing import RoutingSession
 
-db = SQLAlchemy()
+# GET routes marked @read_only query through the read pool (see read_routing.py)
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 
 # --- Model Definitions ---
 
@@ -17,6 +23,12 @@ class User(db.Model):
 
 class Product(db.Model):
     __tablename__ = "products"
+    __table_args__ = (
+        # One per catalog sort, each walked with a keyset on (key, id) (see product_query.py)
+        db.Index('ix_products_name_nocase', db.text('name COLLATE NOCASE')),
+        db.Index('ix_products_price', 'price'),
+        db.Index('ix_products_created_at', 'created_at'),
+    )
     id = db.Column(db.Integer, primary_key=True, index=True)
     name = db.Column(db.String(100), index=True, nullable=False)
     description = db.Column(db.Text, nullable=True)
@@ -50,24 +62,51 @@ class Prompt(db.Model):
 
 class ShowcaseProject(db.Model):
     __tablename__ = "showcase_projects"
+    __table_args__ = (
+        # Listing is newest first, optionally within one category (see showcase_query.py)
+        db.Index('ix_showcase_projects_submitted_at', 'submitted_at'),
+        db.Index('ix_showcase_projects_category_submitted_at', 'category', 'submitted_at'),
+    )
     id = db.Column(db.Integer, primary_key=True, index=True)
     title = db.Column(db.String(150), nullable=False, index=True)
-    category = db.Column(db.String(50), index=True)
+    category = db.Column(db.String(50))
     description = db.Column(db.Text, nullable=False)
     link = db.Column(db.String(255), nullable=True)
     image_filename = db.Column(db.String(255), nullable=True)
     submitted_at = db.Column(db.DateTime(timezone=True), server_default=func.now())
 
+# The FTS5 index over title/description is kept in sync by triggers
+for _statement in SEARCH_DDL:
+    event.listen(ShowcaseProject.__table__, 'after_create', DDL(_statement))
+event.listen(ShowcaseProject.__table__, 'before_drop', DDL(DROP_SEARCH_DDL))
+
 class Guide(db.Model):
     __tablename__ = "guides"
     id = db.Column(db.Integer, primary_key=True, index=True)
-    url = db.Column(db.String(255), nullable=False, unique=True)
+    url = db.Column(db.String(255), nullable=False) # As submitted
+    # Hash of the canonical URL; duplicates and lookups go through this index (see url_normalize.py)
+    url_hash = db.Column(db.String(URL_HASH_LENGTH), nullable=False, unique=True, index=True,
+                         default=lambda context: url_hash(context.get_current_parameters()['url']))
     category = db.Column(db.String(50), index=True, nullable=False)
     submitted_at = db.Column(db.DateTime(timezone=True), server_default=func.now())
+    # Link preview, filled in by the background worker (see guide_enrichment.py)
+    title = db.Column(db.String(300), nullable=True)
+    description = db.Column(db.Text, nullable=True)
+    favicon_url = db.Column(db.String(500), nullable=True)
+    canonical_url = db.Column(db.String(500), nullable=True)
+    enrichment_status = db.Column(db.String(20), nullable=False, server_default='pending', index=True) # pending, done, failed
+    enrichment_error = db.Column(db.String(255), nullable=True)
+    enriched_at = db.Column(db.DateTime(timezone=True), nullable=True)
 
 # Feedback model for user feedback submissions
 class Feedback(db.Model):
     __tablename__ = "feedback"
+    __table_args__ = (
+        # Triage lists newest first, optionally by status or type (see feedback_query.py)
+        db.Index('ix_feedback_submitted_at', 'submitted_at'),
+        db.Index('ix_feedback_status_submitted_at', 'status', 'submitted_at'),
+        db.Index('ix_feedback_type_submitted_at', 'feedback_type', 'submitted_at'),
+    )
     id = db.Column(db.Integer, primary_key=True, index=True)
     feedback_type = db.Column(db.String(20), nullable=False)  # bug, feature, suggestion, general, kudos
     summary = db.Column(db.String(200), nullable=False)
@@ -76,9 +115,62 @@ class Feedback(db.Model):
     status = db.Column(db.String(20), default='submitted')  # submitted, under_review, resolved
     submitted_at = db.Column(db.DateTime(timezone=True), server_default=func.now())
 
+# Where a background applier has got to in its append-only log (see feedback_queue.py).
+# Updated in the same transaction as the rows it applied, so a restart replays
+# exactly the records that were not yet committed.
+class IngestCheckpoint(db.Model):
+    __tablename__ = "ingest_checkpoints"
+    name = db.Column(db.String(50), primary_key=True)
+    segment = db.Column(db.Integer, nullable=False, default=0)
+    position = db.Column(db.Integer, nullable=False, default=0) # Byte offset into the segment
+    updated_at = db.Column(db.DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+# Stock held for a client until it is committed, released or expires (see stock_reservations.py).
+# A multi-SKU reservation is one row per product, sharing a token.
+class StockReservation(db.Model):
+    __tablename__ = "stock_reservations"
+    __table_args__ = (
+        # Every reserve, commit and release first expires held rows past expires_at
+        db.Index('ix_stock_reservations_status_expires_at', 'status', 'expires_at'),
+    )
+    id = db.Column(db.Integer, primary_key=True)
+    token = db.Column(db.String(32), nullable=False, index=True)
+    product_id = db.Column(db.Integer, db.ForeignKey('products.id'), nullable=False)
+    quantity = db.Column(db.Integer, nullable=False)
+    status = db.Column(db.String(20), nullable=False, server_default='held') # held, committed, released, expired
+    created_at = db.Column(db.DateTime(timezone=True), server_default=func.now())
+    expires_at = db.Column(db.DateTime(timezone=True), nullable=False)
+
+# Responses stored for Idempotency-Key retries of POST requests (see idempotency.py)
+class IdempotencyKey(db.Model):
+    __tablename__ = "idempotency_keys"
+    key_hash = db.Column(db.String(64), primary_key=True) # SHA-256 of the endpoint and the client's key
+    fingerprint = db.Column(db.String(64), nullable=False) # SHA-256 of the request it was first used for
+    status_code = db.Column(db.Integer, nullable=True) # NULL while the first attempt is running
+    content_type = db.Column(db.String(100), nullable=True)
+    body = db.Column(db.LargeBinary, nullable=True)
+    expires_at = db.Column(db.DateTime(timezone=True), nullable=False, index=True)
+
+# The latest change of every row in CHANGE_TABLES, for the /changes feed (see change_feed.py).
+# Written only by triggers on those tables; seq never goes backwards.
+class ChangeLog(db.Model):
+    __tablename__ = "change_log"
+    __table_args__ = (
+        db.Index(CHANGE_LOG_INDEX, 'table_name', 'row_id', unique=True),
+        {'sqlite_autoincrement': True},
+    )
+    seq = db.Column(db.Integer, primary_key=True)
+    table_name = db.Column(db.String(30), nullable=False)
+    row_id = db.Column(db.Integer, nullable=False)
+    deleted = db.Column(db.Boolean, nullable=False, server_default='0')
+
 # This is the new Project model for the original request
 class Project(db.Model): # Renamed from the original plan to avoid conflict if a 'Project' model already existed.
     __tablename__ = "projects_data" # Using a more specific name to avoid conflict
+    __table_args__ = (
+        # Natural key sync_community_db.py merges Netlify submissions on
+        db.Index('ix_projects_data_name_url', 'name', 'url'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
     description = db.Column(db.Text, nullable=False)
@@ -86,3 +178,8 @@ class Project(db.Model): # Renamed from the original plan to avoid conflict if a
 
     def __repr__(self):
         return f'<ProjectData {self.name}>'
+
+# Every insert, update and delete on the change feed tables is logged by triggers
+for _table in CHANGE_TABLES:
+    for _statement in trigger_ddl(_table):
+        event.listen(db.Model.metadata.tables[_table], 'after_create', DDL(_statement))
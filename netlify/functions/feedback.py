@@ -1,8 +1,19 @@
 import json
 import sqlite3
 import os
+import sys
 from datetime import datetime
 
+# Shared query and pagination helpers live at the repository root (see netlify.toml included_files)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+from pagination import NEXT_CURSOR_HEADER, PaginationError
+from feedback_query import FeedbackQuery, ensure_feedback_indexes, feedback_counts
+from compression import compress_handler
+
+# Override with COMMUNITY_DB_PATH to point the functions at another database
+DB_PATH = os.environ.get('COMMUNITY_DB_PATH', '/tmp/community.db')
+
+@compress_handler(gzip=4, br=4) # gzip or brotli as Accept-Encoding allows (see compression.py)
 def handler(event, context):
     """
     Netlify Function to handle feedback submissions and retrieval
@@ -12,7 +23,8 @@ def handler(event, context):
     headers = {
         'Access-Control-Allow-Origin': '*',
         'Access-Control-Allow-Headers': 'Content-Type',
-        'Access-Control-Allow-Methods': 'GET, POST, OPTIONS'
+        'Access-Control-Allow-Methods': 'GET, POST, OPTIONS',
+        'Access-Control-Expose-Headers': NEXT_CURSOR_HEADER
     }
     
     # Handle preflight request
@@ -26,6 +38,8 @@ def handler(event, context):
     try:
         if event['httpMethod'] == 'POST':
             return handle_submit_feedback(event, headers)
+        elif event['httpMethod'] == 'GET' and event.get('path', '').rstrip('/').endswith('/counts'):
+            return handle_get_counts(event, headers)
         elif event['httpMethod'] == 'GET':
             return handle_get_feedback(event, headers)
         else:
@@ -59,7 +73,7 @@ def handle_submit_feedback(event, headers):
             }
         
         # Connect to database
-        db_path = '/tmp/community.db'
+        db_path = DB_PATH
         conn = sqlite3.connect(db_path)
         cursor = conn.cursor()
         
@@ -75,6 +89,7 @@ def handle_submit_feedback(event, headers):
                 submitted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
             )
         ''')
+        ensure_feedback_indexes(conn)
         
         # Insert new feedback
         cursor.execute(
@@ -85,6 +100,7 @@ def handle_submit_feedback(event, headers):
         feedback_id = cursor.lastrowid
         conn.commit()
         conn.close()
+        feedback_counts.invalidate()
         
         return {
             'statusCode': 201,
@@ -110,10 +126,10 @@ def handle_submit_feedback(event, headers):
         }
 
 def handle_get_feedback(event, headers):
-    """Handle feedback retrieval"""
+    """Handle feedback retrieval, one page at a time"""
     try:
         # Connect to database
-        db_path = '/tmp/community.db'
+        db_path = DB_PATH
         
         if not os.path.exists(db_path):
             return {
@@ -122,43 +138,62 @@ def handle_get_feedback(event, headers):
                 'body': json.dumps([])
             }
         
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-        
-        # Get feedback with optional filtering
+        # Filters, summary mode and the cursor are parsed in feedback_query.py
         query_params = event.get('queryStringParameters') or {}
-        feedback_type = query_params.get('type')
-        
-        if feedback_type:
-            cursor.execute('SELECT id, feedback_type, summary, details, email, status, submitted_at FROM feedback WHERE feedback_type = ? ORDER BY id DESC', (feedback_type,))
-        else:
-            cursor.execute('SELECT id, feedback_type, summary, details, email, status, submitted_at FROM feedback ORDER BY id DESC')
+        feedback_query = FeedbackQuery.from_args(query_params)
+        sql, params = feedback_query.sql()
         
-        feedback_list = cursor.fetchall()
+        conn = sqlite3.connect(db_path)
+        rows = conn.execute(sql, params).fetchall()
         conn.close()
         
-        # Format response
-        formatted_feedback = []
-        for feedback in feedback_list:
-            formatted_feedback.append({
-                'id': feedback[0],
-                'feedback_type': feedback[1],
-                'summary': feedback[2],
-                'details': feedback[3],
-                'email': feedback[4],
-                'status': feedback[5],
-                'submitted_at': feedback[6]
-            })
+        feedback_list, next_cursor = feedback_query.paginate(rows)
+        if next_cursor:
+            headers = dict(headers, **{NEXT_CURSOR_HEADER: next_cursor})
         
         return {
             'statusCode': 200,
             'headers': headers,
-            'body': json.dumps(formatted_feedback)
+            'body': json.dumps(feedback_list)
         }
         
+    except PaginationError as e:
+        return {
+            'statusCode': 400,
+            'headers': headers,
+            'body': json.dumps({'error': str(e)})
+        }
     except Exception as e:
         return {
             'statusCode': 500,
             'headers': headers,
             'body': json.dumps({'error': f'Error fetching feedback: {str(e)}'})
         }
+
+def handle_get_counts(event, headers):
+    """Handle per-status and per-type counts for the triage dashboard"""
+    try:
+        db_path = DB_PATH
+        
+        if not os.path.exists(db_path):
+            counts = {'by_status': {}, 'by_type': {}, 'total': 0}
+        else:
+            conn = sqlite3.connect(db_path)
+            try:
+                # Kept while the function instance stays warm, see feedback_query.py
+                counts = feedback_counts.get(lambda sql: conn.execute(sql).fetchall())
+            finally:
+                conn.close()
+        
+        return {
+            'statusCode': 200,
+            'headers': headers,
+            'body': json.dumps(counts)
+        }
+        
+    except Exception as e:
+        return {
+            'statusCode': 500,
+            'headers': headers,
+            'body': json.dumps({'error': f'Error counting feedback: {str(e)}'})
+        }
@@ -1,8 +1,23 @@
 import json
 import sqlite3
 import os
+import sys
 from datetime import datetime
 
+# Shared helpers live at the repository root (see netlify.toml included_files)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+from url_normalize import InvalidURL, ensure_guides_url_hash, url_hash, validate_url
+from serializers import SERIALIZERS
+from response_formats import netlify_response
+from compression import compress_handler
+
+# The Netlify guides table has no link preview columns
+GUIDE_COLUMNS = ('id', 'url', 'category', 'submitted_at')
+
+# Override with COMMUNITY_DB_PATH to point the functions at another database
+DB_PATH = os.environ.get('COMMUNITY_DB_PATH', '/tmp/community.db')
+
+@compress_handler(gzip=9, br=9) # gzip or brotli as Accept-Encoding allows (see compression.py)
 def handler(event, context):
     """
     Netlify Function to handle guide submissions and retrieval
@@ -11,7 +26,7 @@ def handler(event, context):
     # Handle CORS
     headers = {
         'Access-Control-Allow-Origin': '*',
-        'Access-Control-Allow-Headers': 'Content-Type',
+        'Access-Control-Allow-Headers': 'Content-Type, Accept',
         'Access-Control-Allow-Methods': 'GET, POST, OPTIONS'
     }
     
@@ -46,6 +61,8 @@ def handle_submit_guide(event, headers):
     try:
         # Parse request body
         body = json.loads(event['body'])
+        if not isinstance(body, dict):
+            body = {}
         url = body.get('url') or body.get('guide-url')
         category = body.get('category') or body.get('guide-category')
         
@@ -55,9 +72,25 @@ def handle_submit_guide(event, headers):
                 'headers': headers,
                 'body': json.dumps({'error': 'Missing required fields: url or category'})
             }
+        if not isinstance(url, str) or not isinstance(category, str):
+            return {
+                'statusCode': 400,
+                'headers': headers,
+                'body': json.dumps({'error': 'URL and category must be strings'})
+            }
+        # The same rule as the Flask app's create_guide
+        url = url.strip()
+        try:
+            validate_url(url)
+        except InvalidURL:
+            return {
+                'statusCode': 400,
+                'headers': headers,
+                'body': json.dumps({'error': 'URL must start with http:// or https://'})
+            }
         
         # Connect to database
-        db_path = '/tmp/community.db'
+        db_path = DB_PATH
         conn = sqlite3.connect(db_path)
         cursor = conn.cursor()
         
@@ -65,15 +98,21 @@ def handle_submit_guide(event, headers):
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS guides (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
-                url TEXT NOT NULL UNIQUE,
+                url TEXT NOT NULL,
+                url_hash TEXT NOT NULL,
                 category TEXT NOT NULL,
                 submitted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
             )
         ''')
+        # Adds the url_hash index (and upgrades databases created before it)
+        ensure_guides_url_hash(conn)
         
-        # Check if URL already exists
-        cursor.execute('SELECT id FROM guides WHERE url = ?', (url,))
-        if cursor.fetchone():
+        # Insert unless the canonical URL is already known, in one indexed statement
+        cursor.execute(
+            'INSERT INTO guides (url, url_hash, category) VALUES (?, ?, ?) ON CONFLICT(url_hash) DO NOTHING',
+            (url, url_hash(url), category)
+        )
+        if cursor.rowcount == 0:
             conn.close()
             return {
                 'statusCode': 409,
@@ -81,12 +120,6 @@ def handle_submit_guide(event, headers):
                 'body': json.dumps({'error': 'This guide URL has already been submitted'})
             }
         
-        # Insert new guide
-        cursor.execute(
-            'INSERT INTO guides (url, category) VALUES (?, ?)',
-            (url, category)
-        )
-        
         guide_id = cursor.lastrowid
         conn.commit()
         conn.close()
@@ -121,7 +154,7 @@ def handle_get_guides(event, headers):
     """Handle guide retrieval with filtering"""
     try:
         # Connect to database
-        db_path = '/tmp/community.db'
+        db_path = DB_PATH
         
         if not os.path.exists(db_path):
             return {
@@ -136,32 +169,34 @@ def handle_get_guides(event, headers):
         # Get query parameters
         query_params = event.get('queryStringParameters') or {}
         category = query_params.get('category')
+        url = query_params.get('url')
         
         # Build query
+        where, params = [], []
         if category and category != 'all':
-            cursor.execute('SELECT id, url, category, submitted_at FROM guides WHERE category = ? ORDER BY submitted_at DESC', (category,))
-        else:
-            cursor.execute('SELECT id, url, category, submitted_at FROM guides ORDER BY submitted_at DESC')
+            where.append('category = ?')
+            params.append(category)
+        if url:
+            # Finds the guide under any spelling of its URL
+            ensure_guides_url_hash(conn)
+            where.append('url_hash = ?')
+            params.append(url_hash(url))
+        where_clause = f"WHERE {' AND '.join(where)}" if where else ''
+        cursor.execute(f"SELECT {', '.join(GUIDE_COLUMNS)} FROM guides {where_clause} ORDER BY submitted_at DESC", params)
         
         guides = cursor.fetchall()
         conn.close()
         
-        # Format response
-        formatted_guides = []
-        for guide in guides:
-            formatted_guides.append({
-                'id': guide[0],
-                'url': guide[1],
-                'category': guide[2],
-                'submitted_at': guide[3]
-            })
+        # JSON, columnar JSON or MessagePack, as the Accept header prefers (see response_formats.py)
+        return netlify_response(headers, (event.get('headers') or {}).get('accept'),
+                                SERIALIZERS['guides'].subset(GUIDE_COLUMNS), guides)
         
+    except InvalidURL as e:
         return {
-            'statusCode': 200,
+            'statusCode': 400,
             'headers': headers,
-            'body': json.dumps(formatted_guides)
+            'body': json.dumps({'error': str(e)})
         }
-        
     except Exception as e:
         return {
             'statusCode': 500,
@@ -1,17 +1,29 @@
 import json
 import sqlite3
 import os
+import sys
 
+# Shared query and pagination helpers live at the repository root (see netlify.toml included_files)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+from pagination import NEXT_CURSOR_HEADER, PaginationError
+from project_feed import PROJECT_COLUMNS, ProjectFeedQuery
+from compression import compress_handler
+
+# Override with COMMUNITY_DB_PATH to point the functions at another database
+DB_PATH = os.environ.get('COMMUNITY_DB_PATH', '/tmp/community.db')
+
+@compress_handler() # gzip or brotli as Accept-Encoding allows (see compression.py)
 def handler(event, context):
     """
-    Netlify Function to list all project data (main projects on homepage)
+    Netlify Function to list project data (main projects on homepage), one page at a time
     """
     
     # Handle CORS
     headers = {
         'Access-Control-Allow-Origin': '*',
         'Access-Control-Allow-Headers': 'Content-Type',
-        'Access-Control-Allow-Methods': 'GET, POST, OPTIONS'
+        'Access-Control-Allow-Methods': 'GET, POST, OPTIONS',
+        'Access-Control-Expose-Headers': NEXT_CURSOR_HEADER
     }
     
     # Handle preflight request
@@ -31,7 +43,7 @@ def handler(event, context):
     
     try:
         # Connect to database
-        db_path = '/tmp/community.db'
+        db_path = DB_PATH
         
         if not os.path.exists(db_path):
             return {
@@ -40,25 +52,17 @@ def handler(event, context):
                 'body': json.dumps([])  # Return empty array if no database
             }
         
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-        
-        # Get all projects
-        cursor.execute('SELECT id, name, description, url, created_at FROM projects_data ORDER BY id DESC')
-        projects = cursor.fetchall()
+        query_params = event.get('queryStringParameters') or {}
+        feed_query = ProjectFeedQuery.from_args(query_params, columns=PROJECT_COLUMNS + ('created_at',))
+        sql, params = feed_query.sql()
         
+        conn = sqlite3.connect(db_path)
+        rows = conn.execute(sql, params).fetchall()
         conn.close()
         
-        # Format response
-        project_list = []
-        for project in projects:
-            project_list.append({
-                'id': project[0],
-                'name': project[1],
-                'description': project[2],
-                'url': project[3],
-                'created_at': project[4]
-            })
+        project_list, next_cursor = feed_query.paginate(rows)
+        if next_cursor:
+            headers = dict(headers, **{NEXT_CURSOR_HEADER: next_cursor})
         
         return {
             'statusCode': 200,
@@ -66,6 +70,12 @@ def handler(event, context):
             'body': json.dumps(project_list)
         }
         
+    except PaginationError as e:
+        return {
+            'statusCode': 400,
+            'headers': headers,
+            'body': json.dumps({'error': str(e)})
+        }
     except Exception as e:
         return {
             'statusCode': 500,
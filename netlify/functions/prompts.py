@@ -1,8 +1,19 @@
 import json
 import sqlite3
 import os
+import sys
 from datetime import datetime
 
+# Shared serializers live at the repository root (see netlify.toml included_files)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+from serializers import SERIALIZERS
+from response_formats import netlify_response
+from compression import compress_handler
+
+# Override with COMMUNITY_DB_PATH to point the functions at another database
+DB_PATH = os.environ.get('COMMUNITY_DB_PATH', '/tmp/community.db')
+
+@compress_handler(gzip=9, br=9) # gzip or brotli as Accept-Encoding allows (see compression.py)
 def handler(event, context):
     """
     Netlify Function to handle prompt submissions and retrieval
@@ -11,7 +22,7 @@ def handler(event, context):
     # Handle CORS
     headers = {
         'Access-Control-Allow-Origin': '*',
-        'Access-Control-Allow-Headers': 'Content-Type',
+        'Access-Control-Allow-Headers': 'Content-Type, Accept',
         'Access-Control-Allow-Methods': 'GET, POST, OPTIONS'
     }
     
@@ -60,7 +71,7 @@ def handle_submit_prompt(event, headers):
             }
         
         # Connect to database
-        db_path = '/tmp/community.db'
+        db_path = DB_PATH
         conn = sqlite3.connect(db_path)
         cursor = conn.cursor()
         
@@ -118,7 +129,7 @@ def handle_get_prompts(event, headers):
     """Handle prompt retrieval with filtering and sorting"""
     try:
         # Connect to database
-        db_path = '/tmp/community.db'
+        db_path = DB_PATH
         
         if not os.path.exists(db_path):
             return {
@@ -160,31 +171,15 @@ def handle_get_prompts(event, headers):
         else:  # default to date
             order_by = 'ORDER BY created_at DESC'
         
-        query = f'SELECT id, title, category, description, prompt_text, rating, usage_count, created_at FROM prompts {where_clause} {order_by}'
+        serializer = SERIALIZERS['prompts']
+        query = f"SELECT {', '.join(serializer.columns)} FROM prompts {where_clause} {order_by}"
         
         cursor.execute(query, params)
         prompts = cursor.fetchall()
         conn.close()
         
-        # Format response
-        formatted_prompts = []
-        for prompt in prompts:
-            formatted_prompts.append({
-                'id': prompt[0],
-                'title': prompt[1],
-                'category': prompt[2],
-                'description': prompt[3],
-                'prompt_text': prompt[4],
-                'rating': prompt[5],
-                'usage_count': prompt[6],
-                'created_at': prompt[7]
-            })
-        
-        return {
-            'statusCode': 200,
-            'headers': headers,
-            'body': json.dumps(formatted_prompts)
-        }
+        # JSON, columnar JSON or MessagePack, as the Accept header prefers (see response_formats.py)
+        return netlify_response(headers, (event.get('headers') or {}).get('accept'), serializer, prompts)
         
     except Exception as e:
         return {
@@ -1,9 +1,20 @@
 import json
 import sqlite3
 import os
+import sys
 import base64
 from datetime import datetime
 
+# Shared query and pagination helpers live at the repository root (see netlify.toml included_files)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+from pagination import NEXT_CURSOR_HEADER, PaginationError
+from showcase_query import ShowcaseQuery, ensure_showcase_search
+from compression import compress_handler
+
+# Override with COMMUNITY_DB_PATH to point the functions at another database
+DB_PATH = os.environ.get('COMMUNITY_DB_PATH', '/tmp/community.db')
+
+@compress_handler() # gzip or brotli as Accept-Encoding allows (see compression.py)
 def handler(event, context):
     """
     Netlify Function to handle showcase project submissions and retrieval
@@ -13,7 +24,8 @@ def handler(event, context):
     headers = {
         'Access-Control-Allow-Origin': '*',
         'Access-Control-Allow-Headers': 'Content-Type',
-        'Access-Control-Allow-Methods': 'GET, POST, OPTIONS'
+        'Access-Control-Allow-Methods': 'GET, POST, OPTIONS',
+        'Access-Control-Expose-Headers': NEXT_CURSOR_HEADER
     }
     
     # Handle preflight request
@@ -61,7 +73,7 @@ def handle_submit_project(event, headers):
             }
         
         # Connect to database
-        db_path = '/tmp/community.db'
+        db_path = DB_PATH
         conn = sqlite3.connect(db_path)
         cursor = conn.cursor()
         
@@ -78,6 +90,7 @@ def handle_submit_project(event, headers):
                 submitted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
             )
         ''')
+        ensure_showcase_search(conn)
         
         # Handle image data (if provided as base64)
         image_filename = None
@@ -122,7 +135,7 @@ def handle_get_projects(event, headers):
     """Handle showcase project retrieval with filtering"""
     try:
         # Connect to database
-        db_path = '/tmp/community.db'
+        db_path = DB_PATH
         
         if not os.path.exists(db_path):
             return {
@@ -132,46 +145,26 @@ def handle_get_projects(event, headers):
             }
         
         conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
+        if not conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'showcase_projects'").fetchone():
+            conn.close()
+            return {
+                'statusCode': 200,
+                'headers': headers,
+                'body': json.dumps([])
+            }
+        ensure_showcase_search(conn)
         
-        # Get query parameters
+        # Same query specification as the Flask route (see showcase_query.py)
         query_params = event.get('queryStringParameters') or {}
-        category = query_params.get('category')
-        search_term = query_params.get('search')
-        
-        # Build query
-        where_conditions = []
-        params = []
-        
-        if category and category != 'all':
-            where_conditions.append('category = ?')
-            params.append(category)
-        
-        if search_term:
-            where_conditions.append('(title LIKE ? OR description LIKE ?)')
-            params.extend([f'%{search_term}%', f'%{search_term}%'])
-        
-        where_clause = 'WHERE ' + ' AND '.join(where_conditions) if where_conditions else ''
-        
-        query = f'SELECT id, title, category, description, link, image_filename, submitted_at FROM showcase_projects {where_clause} ORDER BY submitted_at DESC'
-        
-        cursor.execute(query, params)
-        projects = cursor.fetchall()
+        showcase_query = ShowcaseQuery.from_args(query_params)
+        sql, params = showcase_query.sql()
+        rows = conn.execute(sql, params).fetchall()
+        conn.commit()
         conn.close()
         
-        # Format response
-        formatted_projects = []
-        for project in projects:
-            formatted_projects.append({
-                'id': project[0],
-                'title': project[1],
-                'category': project[2],
-                'description': project[3],
-                'link': project[4],
-                'image_url': f"/uploads/showcase_images/{project[5]}" if project[5] else None,
-                'image_filename': project[5],
-                'submitted_at': project[6]
-            })
+        formatted_projects, next_cursor = showcase_query.paginate(rows)
+        if next_cursor:
+            headers = dict(headers, **{NEXT_CURSOR_HEADER: next_cursor})
         
         return {
             'statusCode': 200,
@@ -179,6 +172,12 @@ def handle_get_projects(event, headers):
             'body': json.dumps(formatted_projects)
         }
         
+    except PaginationError as e:
+        return {
+            'statusCode': 400,
+            'headers': headers,
+            'body': json.dumps({'error': str(e)})
+        }
     except Exception as e:
         return {
             'statusCode': 500,
@@ -3,6 +3,9 @@ import sqlite3
 import os
 from datetime import datetime
 
+# Override with COMMUNITY_DB_PATH to point the functions at another database
+DB_PATH = os.environ.get('COMMUNITY_DB_PATH', '/tmp/community.db')
+
 def handler(event, context):
     """
     Netlify Function to handle project data submissions (main projects on homepage)
@@ -45,7 +48,7 @@ def handler(event, context):
             }
         
         # Connect to database
-        db_path = '/tmp/community.db'
+        db_path = DB_PATH
         conn = sqlite3.connect(db_path)
         cursor = conn.cursor()
         
@@ -0,0 +1,97 @@
+"""
+In-process cache for rendered HTML pages
+
+Pages are rendered once, stored together with a gzip copy and an ETag, and
+served from memory after that. Template-only pages are never re-rendered, so
+they render once per process (i.e. once per deploy). A data-backed page is
+served with a `version()` callable, a cheap query whose result changes whenever
+the page's data does; it runs on every request, and a page rendered at another
+version is rendered again. That catches writes made by any process: other
+workers, the sync and import tools, cron jobs.
+"""
+
+import hashlib
+import threading
+import time
+
+from flask import make_response, request
+
+from compression import choose_encoding, encode_all
+
+
+class CachedPage:
+    def __init__(self, html, version=None):
+        self.body = html.encode('utf-8')
+        # Every stored encoding of the page (gzip, and brotli when installed), keyed by Content-Encoding
+        self.encodings = encode_all(self.body)
+        self.etag = hashlib.sha1(self.body).hexdigest()
+        self.rendered_at = time.time()
+        self.version = version
+
+
+class PageCache:
+    def __init__(self):
+        self._pages = {}
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def _stat(self, name):
+        return self._stats.setdefault(name, {'hits': 0, 'misses': 0, 'stale': 0})
+
+    def get_page(self, name, render, version=None):
+        """Return the cached page `name`, rendering it with `render()` on a miss or when `version()` moved on"""
+        # Read before rendering: a write landing in between leaves the page a version behind, not ahead
+        current = version() if version else None
+        with self._lock:
+            page = self._pages.get(name)
+            stat = self._stat(name)
+            if page and page.version != current:
+                stat['stale'] += 1
+                page = None
+            stat['hits' if page else 'misses'] += 1
+        if page:
+            return page
+        page = CachedPage(render(), current)
+        with self._lock:
+            self._pages[name] = page
+        return page
+
+    def respond(self, name, render, version=None):
+        """Serve a cached page, honouring If-None-Match and Accept-Encoding"""
+        page = self.get_page(name, render, version)
+        if request.if_none_match.contains_weak(page.etag):
+            response = make_response('', 304)
+        else:
+            encoding = choose_encoding(request.headers.get('Accept-Encoding'), page.encodings)
+            response = make_response(page.encodings[encoding] if encoding else page.body)
+            response.mimetype = 'text/html'
+            if encoding:
+                response.headers['Content-Encoding'] = encoding
+        response.set_etag(page.etag, weak=True)
+        response.headers['Vary'] = 'Accept-Encoding'
+        # Browsers may keep the page but must revalidate it with the ETag
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
+
+    def clear(self):
+        with self._lock:
+            self._pages.clear()
+            self._stats.clear()
+
+    def stats(self):
+        with self._lock:
+            report = {}
+            for name, stat in self._stats.items():
+                lookups = stat['hits'] + stat['misses']
+                page = self._pages.get(name)
+                report[name] = dict(
+                    stat,
+                    hit_rate=round(stat['hits'] / lookups, 4) if lookups else None,
+                    cached=page is not None,
+                    bytes=len(page.body) if page else None,
+                    encoded_bytes={e: len(b) for e, b in page.encodings.items()} if page else None,
+                )
+            return report
+
+
+page_cache = PageCache()
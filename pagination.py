@@ -0,0 +1,72 @@
+"""
+Keyset pagination helpers shared by the Flask app and the Netlify functions
+
+List endpoints accept `limit` and an opaque `cursor`, return a JSON array and,
+when more rows exist, the cursor for the next page in the X-Next-Cursor header.
+A cursor is the sort key of the last row returned, so fetching the next page
+is an index seek rather than an OFFSET scan.
+"""
+
+import base64
+import json
+from datetime import datetime, timezone
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 200
+NEXT_CURSOR_HEADER = 'X-Next-Cursor'
+
+
+class PaginationError(ValueError):
+    """Raised for a malformed limit or cursor; endpoints answer it with a 400"""
+
+
+def parse_limit(value, default=DEFAULT_LIMIT, maximum=MAX_LIMIT):
+    if value in (None, ''):
+        return default
+    try:
+        limit = int(value)
+    except (TypeError, ValueError):
+        raise PaginationError('limit must be an integer')
+    if limit < 1:
+        raise PaginationError('limit must be positive')
+    return min(limit, maximum)
+
+
+def encode_cursor(values):
+    raw = json.dumps(list(values), separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token, size=None):
+    """Decode a cursor into its list of key values, optionally checking its length"""
+    if not token:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        values = json.loads(raw)
+    except (ValueError, TypeError):
+        raise PaginationError('Invalid cursor')
+    if not isinstance(values, list) or (size is not None and len(values) != size):
+        raise PaginationError('Invalid cursor')
+    return values
+
+
+def split_page(rows, limit, key):
+    """Split `limit + 1` fetched rows into the page and the next cursor (or None)"""
+    if len(rows) <= limit:
+        return rows, None
+    page = rows[:limit]
+    return page, encode_cursor(key(page[-1]))
+
+
+def parse_bound(name, value):
+    """An ISO 8601 date or datetime as the UTC 'YYYY-MM-DD HH:MM:SS' text SQLite stores"""
+    if not value:
+        return None
+    try:
+        moment = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        raise PaginationError(f'{name} must be an ISO 8601 date or datetime')
+    if moment.tzinfo:
+        moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return moment.isoformat(sep=' ')
@@ -0,0 +1,222 @@
+"""
+Product catalog query specification
+
+GET /products filters, sorts and pages the catalog; GET /products/lookup
+fetches a known list of products in one query. Rows are formatted with the
+products serializer (see serializers.py).
+
+Every sort walks its own index, with a keyset on (sort key, id) for the next
+page: ix_products_name_nocase, ix_products_price or ix_products_created_at.
+The name prefix is a range on the same NOCASE index (ASCII letters match
+either case). A price range is a range on ix_products_price when sorting by
+price, or when a quick count on that index finds it narrow; a wide one is
+checked, like the stock filter, on the rows the sort's index walk visits.
+
+Supported parameters:
+    min_price  lowest price, inclusive
+    max_price  highest price, inclusive
+    name       name prefix, case-insensitive
+    in_stock   'true' for products with stock_quantity > 0, 'false' for the rest
+    sort       'name' (default), 'price' or 'created_at'; a leading '-' sorts descending
+    limit      page size, see pagination.py
+    cursor     opaque keyset cursor from the previous page's X-Next-Cursor
+
+Lookup parameters (repeated, or comma separated; at most MAX_LOOKUP in all):
+    sku        SKUs to fetch
+    id         product ids to fetch
+"""
+
+import sys
+from decimal import Decimal, InvalidOperation
+
+from pagination import MAX_LIMIT, PaginationError, decode_cursor, parse_limit, split_page
+from serializers import SERIALIZERS
+
+PRODUCT_COLUMNS = SERIALIZERS['products'].columns
+MAX_LOOKUP = MAX_LIMIT
+MIN_ID, MAX_ID = -2 ** 63, 2 ** 63 - 1  # SQLite INTEGER range
+
+# Sort name -> the expression ordered by, matching the index that serves it
+SORTS = {
+    'name': 'name COLLATE NOCASE',
+    'price': 'price',
+    'created_at': 'created_at',
+}
+
+# A price range under another sort is served from ix_products_price and sorted when it
+# matches fewer products than this, and by walking the sort's index otherwise
+PRICE_RANGE_SORT_ROWS = 5000
+
+TRUE_VALUES = ('1', 'true', 'yes')
+FALSE_VALUES = ('0', 'false', 'no')
+
+
+def _price(name, value):
+    if value in (None, ''):
+        return None
+    try:
+        price = Decimal(value)
+    except InvalidOperation:
+        raise PaginationError(f'{name} must be a number')
+    if not price.is_finite() or price < 0:
+        raise PaginationError(f'{name} must be a non-negative number')
+    return float(price)
+
+
+def _ascii_lower(text):
+    # NOCASE folds ASCII letters only, so the bounds must be folded the same way
+    return ''.join(chr(ord(c) + 32) if 'A' <= c <= 'Z' else c for c in text)
+
+
+def prefix_bounds(prefix):
+    """[low, high) bounds that match every name starting with `prefix` under NOCASE; high is None if unbounded"""
+    low = _ascii_lower(prefix)
+    # Nothing follows the last code point, so the character before it is the one to raise
+    head = low.rstrip(chr(sys.maxunicode))
+    if not head:
+        return low, None
+    following = chr(ord(head[-1]) + 1)
+    if 'A' <= following <= 'Z':
+        following = '[' # NOCASE reads 'A'..'Z' as 'a'..'z', so the next character after '@' is '['
+    elif '\ud800' <= following <= '\udfff':
+        following = '\ue000' # Surrogates can't be encoded
+    return low, head[:-1] + following
+
+
+class ProductQuery:
+    """A parsed catalog listing request that renders to SQL with named parameters"""
+
+    def __init__(self, min_price=None, max_price=None, name=None, in_stock=None, sort=None, limit=None, cursor=None):
+        self.min_price = _price('min_price', min_price)
+        self.max_price = _price('max_price', max_price)
+        if self.min_price is not None and self.max_price is not None and self.min_price > self.max_price:
+            raise PaginationError('min_price must not be above max_price')
+        self.name = name or None
+        in_stock = (in_stock or '').lower()
+        if in_stock and in_stock not in TRUE_VALUES + FALSE_VALUES:
+            raise PaginationError("in_stock must be 'true' or 'false'")
+        self.in_stock = (in_stock in TRUE_VALUES) if in_stock else None
+        sort = sort or 'name'
+        self.descending = sort.startswith('-')
+        self.sort = sort.lstrip('-')
+        if self.sort not in SORTS:
+            raise PaginationError(f"sort must be one of {', '.join(SORTS)}, optionally prefixed with '-'")
+        self.limit = parse_limit(limit)
+        self.cursor = decode_cursor(cursor, size=3)
+        if self.cursor and self.cursor[0] != sort:
+            raise PaginationError('Cursor does not match the requested sort order')
+        if self.cursor and not (_is_scalar(self.cursor[1]) and _is_integer(self.cursor[2])):
+            raise PaginationError('Invalid cursor')
+
+    @classmethod
+    def from_args(cls, args):
+        """Build from a request.args-like mapping"""
+        return cls(args.get('min_price'), args.get('max_price'), args.get('name'), args.get('in_stock'),
+                   args.get('sort'), args.get('limit'), args.get('cursor'))
+
+    def sql(self, count=None):
+        """SQL and parameters for a page; `count(sql, params)` -> int lets it pick the index for a price range"""
+        where, params = [], {'limit': self.limit + 1}
+        source, price_range = 'products', []
+        if self.min_price is not None:
+            price_range.append('price >= :min_price')
+            params['min_price'] = self.min_price
+        if self.max_price is not None:
+            price_range.append('price <= :max_price')
+            params['max_price'] = self.max_price
+        if price_range and self.sort != 'price' and count:
+            # Counted up to the threshold on ix_products_price alone. SQLite can't tell a narrow
+            # range from a wide one, so it is told: a narrow range is read from ix_products_price
+            # and sorted, and a wide one is checked while walking the sort's index (the unary +
+            # keeps SQLite off ix_products_price), which stops after a page.
+            probe = (f"SELECT COUNT(*) FROM (SELECT 1 FROM products WHERE {' AND '.join(price_range)} "
+                     f"LIMIT {PRICE_RANGE_SORT_ROWS})")
+            if count(probe, params) < PRICE_RANGE_SORT_ROWS:
+                source = 'products INDEXED BY ix_products_price'
+            else:
+                price_range = ['+' + condition for condition in price_range]
+        where += price_range
+        if self.name:
+            params['name_low'], name_high = prefix_bounds(self.name)
+            where.append('name COLLATE NOCASE >= :name_low')
+            if name_high is not None:
+                where.append('name COLLATE NOCASE < :name_high')
+                params['name_high'] = name_high
+        if self.in_stock is not None:
+            where.append('stock_quantity > 0' if self.in_stock else 'COALESCE(stock_quantity, 0) <= 0')
+
+        key = SORTS[self.sort]
+        after, direction = ('<', 'DESC') if self.descending else ('>', 'ASC')
+        if self.cursor:
+            # Not a row value: SQLite only seeks the index for the leading comparison written out
+            where.append(f'{key} {after}= :cursor_key AND ({key} {after} :cursor_key OR id {after} :cursor_id)')
+            params['cursor_key'], params['cursor_id'] = self.cursor[1], self.cursor[2]
+
+        where_clause = f"WHERE {' AND '.join(where)}" if where else ''
+        sql = (f"SELECT {', '.join(PRODUCT_COLUMNS)} FROM {source} {where_clause} "
+               f"ORDER BY {key} {direction}, id {direction} LIMIT :limit")
+        return sql, params
+
+    def paginate(self, rows):
+        """Return (formatted page, next cursor) from the rows fetched with `sql()`"""
+        sort = f"{'-' if self.descending else ''}{self.sort}"
+        key_index = PRODUCT_COLUMNS.index(self.sort)
+        page, next_cursor = split_page(list(rows), self.limit, lambda row: [sort, row[key_index], row[0]])
+        return SERIALIZERS['products'].rows(page), next_cursor
+
+
+def _is_integer(value):
+    return isinstance(value, int) and not isinstance(value, bool) and MIN_ID <= value <= MAX_ID
+
+
+def _is_scalar(value):
+    return isinstance(value, (str, float)) or _is_integer(value)
+
+
+def _split(values):
+    return [part.strip() for value in values for part in value.split(',') if part.strip()]
+
+
+class ProductLookup:
+    """Several products by SKU and/or id in one query, returned in the order asked for"""
+
+    def __init__(self, skus=(), ids=()):
+        self.skus = list(dict.fromkeys(_split(skus)))
+        try:
+            self.ids = list(dict.fromkeys(int(value) for value in _split(ids)))
+        except ValueError:
+            raise PaginationError('id must be an integer')
+        if not all(MIN_ID <= value <= MAX_ID for value in self.ids):
+            raise PaginationError('id is out of range')
+        if not self.skus and not self.ids:
+            raise PaginationError('Pass at least one sku or id')
+        if len(self.skus) + len(self.ids) > MAX_LOOKUP:
+            raise PaginationError(f'At most {MAX_LOOKUP} skus and ids per lookup')
+
+    @classmethod
+    def from_args(cls, args):
+        """Build from a request.args-like MultiDict"""
+        return cls(args.getlist('sku'), args.getlist('id'))
+
+    def sql(self):
+        where, params = [], {}
+        for column, values in (('sku', self.skus), ('id', self.ids)):
+            if values:
+                names = [f'{column}_{n}' for n in range(len(values))]
+                where.append(f"{column} IN ({', '.join(':' + name for name in names)})")
+                params.update(zip(names, values))
+        return f"SELECT {', '.join(PRODUCT_COLUMNS)} FROM products WHERE {' OR '.join(where)}", params
+
+    def respond(self, rows):
+        """{"products": [...], "missing": {"skus": [...], "ids": [...]}} in request order"""
+        sku_index, rows = PRODUCT_COLUMNS.index('sku'), list(rows)
+        by_sku = {row[sku_index]: row for row in rows}
+        by_id = {row[0]: row for row in rows}
+        found = [by_sku[sku] for sku in self.skus if sku in by_sku]
+        found += [by_id[product_id] for product_id in self.ids if product_id in by_id]
+        found = list({row[0]: row for row in found}.values()) # A product asked for by both SKU and id once
+        return {
+            "products": SERIALIZERS['products'].rows(found),
+            "missing": {"skus": [sku for sku in self.skus if sku not in by_sku],
+                        "ids": [product_id for product_id in self.ids if product_id not in by_id]},
+        }
@@ -0,0 +1,50 @@
+"""
+Homepage project feed query
+
+The homepage renders the first page of submitted projects and script.js pulls
+the following pages from `list_project_data` as the visitor scrolls. Flask and
+the Netlify function both build their SQL here, newest first with a keyset on
+id, so a cursor issued by one backend is valid on the other.
+
+Supported parameters:
+    limit      page size, see pagination.py
+    cursor     opaque keyset cursor from the previous page's X-Next-Cursor
+"""
+
+from pagination import PaginationError, decode_cursor, parse_limit, split_page
+from serializers import SERIALIZERS
+
+PROJECT_COLUMNS = SERIALIZERS['projects_data'].columns
+
+# Projects rendered into the homepage before the feed takes over
+FIRST_PAGE_SIZE = 12
+
+
+class ProjectFeedQuery:
+    """A parsed feed request that renders to SQL with named parameters"""
+
+    def __init__(self, limit=None, cursor=None, columns=PROJECT_COLUMNS):
+        self.limit = parse_limit(limit)
+        self.cursor = decode_cursor(cursor, size=1)
+        if self.cursor and not isinstance(self.cursor[0], int):
+            raise PaginationError('Invalid cursor')
+        self.columns = columns
+        self.serializer = SERIALIZERS['projects_data'].subset(columns)
+
+    @classmethod
+    def from_args(cls, args, columns=PROJECT_COLUMNS):
+        """Build from a request.args-like mapping"""
+        return cls(args.get('limit'), args.get('cursor'), columns)
+
+    def sql(self):
+        where, params = '', {'limit': self.limit + 1}
+        if self.cursor:
+            where = 'WHERE id < :cursor_id'
+            params['cursor_id'] = self.cursor[0]
+        sql = f"SELECT {', '.join(self.columns)} FROM projects_data {where} ORDER BY id DESC LIMIT :limit"
+        return sql, params
+
+    def paginate(self, rows):
+        """Return (formatted page, next cursor) from the rows fetched with `sql()`"""
+        page, next_cursor = split_page(list(rows), self.limit, lambda row: [row[0]])
+        return self.serializer.rows(page), next_cursor
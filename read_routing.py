@@ -0,0 +1,192 @@
+"""
+Read-only connections for GET routes
+
+Views marked `@read_only` run their queries on a second engine with its own
+connection pool. Its connections open the same SQLite file with `mode=ro` and
+`PRAGMA query_only = ON`, so they cannot take a write lock even by mistake. The
+primary database is switched to WAL, so a list scan on the read pool never
+waits behind a writer and never holds one up. Everything else uses the primary
+engine as before. That includes writes, unmarked GETs, the background workers
+and scripts outside a request.
+
+The choice is made per request in a before_request hook and kept in the WSGI
+environ. `RoutingSession.get_bind` (the session class of models.db) returns
+that engine for every query the request makes through db.session. A view that
+needs a connection of its own, like /export, takes `db.session.get_bind()`.
+
+Read-your-writes: a successful POST, PUT, PATCH or DELETE sets a short-lived
+cookie, and while the client sends it back its marked GETs stay on the primary.
+With the default read path, the same file, a new read already sees every
+commit, so the pin only matters when READ_DATABASE_URL names a replica that
+lags behind. Sub-requests of a /batch always stay on the primary, because they
+read through the batch's own snapshot (see batch.py).
+
+Settings (environment variables, overridable through app.config):
+    READ_ROUTING              Send @read_only GETs to the read pool (default: on)
+    READ_DATABASE_URL         Database for reads (default: the primary file, opened read-only)
+    READ_POOL_SIZE            Connections kept in the read pool (default: 5)
+    READ_AFTER_WRITE_SECONDS  How long a client's reads stay on the primary after its write (default: 5)
+    SQLITE_JOURNAL_MODE       Journal mode set on the primary SQLite file (default: wal, '' leaves it)
+"""
+
+import collections
+import os
+import threading
+from urllib.parse import quote
+
+from flask_sqlalchemy.session import Session
+
+DEFAULTS = {
+    'READ_ROUTING': 'on',
+    'READ_DATABASE_URL': '',
+    'READ_POOL_SIZE': 5,
+    'READ_AFTER_WRITE_SECONDS': 5,
+    'SQLITE_JOURNAL_MODE': 'wal',
+}
+
+READ_METHODS = ('GET', 'HEAD')
+WRITE_METHODS = ('POST', 'PUT', 'PATCH', 'DELETE')
+PIN_COOKIE = 'read_primary'
+# WSGI environ keys: the engine chosen for the request, and "stay on the primary"
+ENGINE_ENVIRON_KEY = 'read_routing.engine'
+PIN_ENVIRON_KEY = 'read_routing.pin'
+
+
+def _setting(app, key):
+    if key in app.config:
+        return app.config[key]
+    return type(DEFAULTS[key])(os.environ.get(key, DEFAULTS[key]))
+
+
+def enabled(app):
+    return str(_setting(app, 'READ_ROUTING')).lower() not in ('', '0', 'false', 'no', 'off')
+
+
+def read_only(view):
+    """Mark a GET view as safe to run on the read pool"""
+    view.read_only = True
+    return view
+
+
+def is_file_database(url):
+    # In-memory databases have no file for a second connection to open
+    return url.get_backend_name() == 'sqlite' and url.database not in (None, '', ':memory:') \
+        and not url.query.get('uri')
+
+
+def read_url(url):
+    """`url` of a SQLite file database, reopened read-only; None when it can't be"""
+    if not is_file_database(url):
+        return None
+    return url.set(database='file:' + quote(os.path.abspath(url.database)), query={'mode': 'ro', 'uri': 'true'})
+
+
+class RoutingSession(Session):
+    """Binds everything a request does to the engine its route was given, if any"""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None:
+            from flask import has_request_context, request
+
+            engine = request.environ.get(ENGINE_ENVIRON_KEY) if has_request_context() else None
+            if engine is not None:
+                return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+class ReadRouter:
+    """The read engine, created on first use, and counts of where marked GETs went"""
+
+    def __init__(self, app, url):
+        self.url = url
+        self.pool_size = int(_setting(app, 'READ_POOL_SIZE'))
+        self.pin_seconds = int(_setting(app, 'READ_AFTER_WRITE_SECONDS'))
+        self._engine = None
+        self._lock = threading.Lock()
+        self._counts = collections.Counter()
+
+    @property
+    def engine(self):
+        if self._engine is None:
+            from sqlalchemy import create_engine, event, make_url
+
+            with self._lock:
+                if self._engine is None:
+                    engine = create_engine(self.url, pool_size=self.pool_size)
+                    if make_url(self.url).get_backend_name() == 'sqlite':
+                        event.listen(engine, 'connect', _query_only)
+                    self._engine = engine
+        return self._engine
+
+    def count(self, target):
+        with self._lock:
+            self._counts[target] += 1
+
+    def stats(self):
+        with self._lock:
+            return {target: self._counts[target] for target in ('read', 'pinned')}
+
+    def dispose(self):
+        if self._engine is not None:
+            self._engine.dispose()
+
+
+def _query_only(dbapi_connection, connection_record):
+    dbapi_connection.execute('PRAGMA query_only = ON')
+
+
+def _journal_mode(mode):
+    def set_journal_mode(dbapi_connection, connection_record):
+        import sqlite3
+
+        try:
+            dbapi_connection.execute(f'PRAGMA journal_mode = {mode}')
+        except sqlite3.OperationalError:
+            pass # Another process holds the file; it stays in its current mode and reads may wait
+    return set_journal_mode
+
+
+# --- Flask ---
+
+def init_read_routing(app):
+    """Attach the router to the app when reads can be routed; call after db.init_app"""
+    if not enabled(app):
+        return
+    from sqlalchemy import event
+    from models import db
+
+    with app.app_context():
+        primary = db.engine
+    mode = _setting(app, 'SQLITE_JOURNAL_MODE')
+    if mode and is_file_database(primary.url):
+        event.listen(primary, 'connect', _journal_mode(mode))
+    url = _setting(app, 'READ_DATABASE_URL') or read_url(primary.url)
+    if url is None:
+        return
+    app.extensions['read_router'] = ReadRouter(app, url)
+    app.before_request(route_request)
+    app.after_request(pin_after_write)
+
+
+def route_request():
+    from flask import current_app, request
+
+    router = current_app.extensions['read_router']
+    view = current_app.view_functions.get(request.endpoint)
+    if request.method not in READ_METHODS or not getattr(view, 'read_only', False):
+        return
+    if request.environ.get(PIN_ENVIRON_KEY) or request.cookies.get(PIN_COOKIE):
+        router.count('pinned')
+        return
+    request.environ[ENGINE_ENVIRON_KEY] = router.engine
+    router.count('read')
+
+
+def pin_after_write(response):
+    from flask import current_app, request
+
+    router = current_app.extensions['read_router']
+    if (request.method in WRITE_METHODS and response.status_code < 400 and router.pin_seconds > 0
+            and not request.environ.get(PIN_ENVIRON_KEY)):
+        response.set_cookie(PIN_COOKIE, '1', max_age=router.pin_seconds, httponly=True, samesite='Lax')
+    return response
@@ -0,0 +1,219 @@
+"""
+Content negotiation for list responses
+
+GET /prompts and GET /guides answer in the format the Accept header prefers:
+
+    application/json                     (default) an array of objects
+    application/vnd.jules.columns+json   {"columns": [...], "rows": [[...], ...]},
+                                         each key named once instead of once per row
+    application/msgpack                  the same array of objects as MessagePack,
+                                         also accepted as application/x-msgpack
+
+An Accept header that names none of them (or none at all) gets JSON, as before,
+and every response carries `Vary: Accept` so caches keep the formats apart.
+Rows come from the model's serializer (see serializers.py), so all three carry
+the same values.
+
+MessagePack goes through the msgpack package when it is installed and through
+the small encoder and decoder below otherwise. They cover the types the
+serializers produce (None, bool, int, float, str, bytes, lists and dicts). Only
+the standard library is needed, so the Netlify functions negotiate the same way;
+they return binary bodies base64-encoded, as Lambda requires.
+"""
+
+import base64
+import struct
+
+from serializers import dumps
+
+try:
+    import msgpack
+except ImportError: # Optional: `pip install msgpack` for native (de)serialization
+    msgpack = None
+
+JSON = 'application/json'
+COLUMNAR = 'application/vnd.jules.columns+json'
+MSGPACK = 'application/msgpack'
+# In order of preference when the client likes several equally
+OFFERED = (JSON, COLUMNAR, MSGPACK)
+ALIASES = {'application/x-msgpack': MSGPACK}
+
+
+def parse_accept(accept):
+    """[(media range, q)] from an Accept header value"""
+    ranges = []
+    for item in (accept or '').split(','):
+        media_range, *params = [part.strip() for part in item.split(';')]
+        if not media_range:
+            continue
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        ranges.append((ALIASES.get(media_range.lower(), media_range.lower()), q))
+    return ranges
+
+
+def negotiate(accept):
+    """The offered media type `accept` prefers, or JSON when it names none of them"""
+    best, best_key = JSON, None
+    ranges = parse_accept(accept)
+    for preference, offered in enumerate(OFFERED):
+        # The most specific range that matches decides the type's q (RFC 9110, section 12.5.1)
+        matches = [(specificity, q) for media_range, q in ranges
+                   for specificity, pattern in ((2, offered), (1, offered.split('/')[0] + '/*'), (0, '*/*'))
+                   if media_range == pattern]
+        if not matches:
+            continue
+        specificity, q = max(matches)
+        key = (q, specificity, -preference)
+        if q > 0 and (best_key is None or key > best_key):
+            best, best_key = offered, key
+    return best
+
+
+def encode(mimetype, serializer, rows):
+    """The body for `rows` (tuples in the serializer's column order) as `mimetype`"""
+    if mimetype == COLUMNAR:
+        return dumps({'columns': list(serializer.fields), 'rows': list(map(serializer.values, rows))})
+    if mimetype == MSGPACK:
+        return packb(serializer.rows(rows))
+    return dumps(serializer.rows(rows))
+
+
+def netlify_response(headers, accept, serializer, rows, status=200):
+    """A Netlify function response for `rows`, in the format `accept` prefers"""
+    mimetype = negotiate(accept)
+    body = encode(mimetype, serializer, rows)
+    response = {'statusCode': status, 'headers': dict(headers, **{'Content-Type': mimetype, 'Vary': 'Accept'})}
+    if mimetype == MSGPACK:
+        return dict(response, body=base64.b64encode(body).decode('ascii'), isBase64Encoded=True)
+    return dict(response, body=body.decode('utf-8'))
+
+
+# --- MessagePack ---
+
+def packb(obj):
+    if msgpack is not None:
+        return msgpack.packb(obj)
+    out = bytearray()
+    _pack(obj, out)
+    return bytes(out)
+
+
+def _pack_header(out, length, fixed, fixed_limit, codes):
+    """Type and length; `codes` are the 8, 16 and 32 bit length forms, None where there is no 8 bit one"""
+    if length < fixed_limit:
+        out.append(fixed | length)
+    elif length < 0x100 and codes[0] is not None:
+        out += struct.pack('>BB', codes[0], length)
+    elif length < 0x10000:
+        out += struct.pack('>BH', codes[1], length)
+    else:
+        out += struct.pack('>BI', codes[2], length)
+
+
+def _pack(obj, out):
+    if obj is None:
+        out.append(0xc0)
+    elif obj is True or obj is False:
+        out.append(0xc3 if obj else 0xc2)
+    elif isinstance(obj, int):
+        if 0 <= obj < 0x80 or -0x20 <= obj < 0:
+            out += struct.pack('>b' if obj < 0 else '>B', obj)
+        elif obj >= 0:
+            for code, fmt, limit in ((0xcc, '>BB', 0x100), (0xcd, '>BH', 0x10000), (0xce, '>BI', 0x100000000),
+                                     (0xcf, '>BQ', 0x10000000000000000)):
+                if obj < limit:
+                    out += struct.pack(fmt, code, obj)
+                    return
+            raise OverflowError('Integer too large for MessagePack')
+        else:
+            for code, fmt, limit in ((0xd0, '>Bb', 0x80), (0xd1, '>Bh', 0x8000), (0xd2, '>Bi', 0x80000000),
+                                     (0xd3, '>Bq', 0x8000000000000000)):
+                if obj >= -limit:
+                    out += struct.pack(fmt, code, obj)
+                    return
+            raise OverflowError('Integer too large for MessagePack')
+    elif isinstance(obj, float):
+        out += struct.pack('>Bd', 0xcb, obj)
+    elif isinstance(obj, str):
+        data = obj.encode('utf-8')
+        _pack_header(out, len(data), 0xa0, 32, (0xd9, 0xda, 0xdb))
+        out += data
+    elif isinstance(obj, (bytes, bytearray)):
+        _pack_header(out, len(obj), 0, 0, (0xc4, 0xc5, 0xc6))
+        out += obj
+    elif isinstance(obj, (list, tuple)):
+        _pack_header(out, len(obj), 0x90, 16, (None, 0xdc, 0xdd))
+        for item in obj:
+            _pack(item, out)
+    elif isinstance(obj, dict):
+        _pack_header(out, len(obj), 0x80, 16, (None, 0xde, 0xdf))
+        for key, value in obj.items():
+            _pack(key, out)
+            _pack(value, out)
+    else:
+        raise TypeError(f'Cannot encode {type(obj).__name__} as MessagePack')
+
+
+def unpackb(data):
+    if msgpack is not None:
+        return msgpack.unpackb(data)
+    obj, end = _unpack(memoryview(data), 0)
+    if end != len(data):
+        raise ValueError('Extra data after the MessagePack object')
+    return obj
+
+
+# Type code -> (struct format of the value or length that follows, kind)
+_SIZED = {
+    0xcc: ('>B', 'number'), 0xcd: ('>H', 'number'), 0xce: ('>I', 'number'), 0xcf: ('>Q', 'number'),
+    0xd0: ('>b', 'number'), 0xd1: ('>h', 'number'), 0xd2: ('>i', 'number'), 0xd3: ('>q', 'number'),
+    0xca: ('>f', 'number'), 0xcb: ('>d', 'number'),
+    0xd9: ('>B', 'str'), 0xda: ('>H', 'str'), 0xdb: ('>I', 'str'),
+    0xc4: ('>B', 'bin'), 0xc5: ('>H', 'bin'), 0xc6: ('>I', 'bin'),
+    0xdc: ('>H', 'array'), 0xdd: ('>I', 'array'),
+    0xde: ('>H', 'map'), 0xdf: ('>I', 'map'),
+}
+
+
+def _unpack(data, offset):
+    code = data[offset]
+    offset += 1
+    if code < 0x80:
+        return code, offset
+    if code >= 0xe0:
+        return code - 0x100, offset
+    if 0xa0 <= code < 0xc0:
+        kind, length = 'str', code & 0x1f
+    elif 0x90 <= code < 0xa0:
+        kind, length = 'array', code & 0x0f
+    elif 0x80 <= code < 0x90:
+        kind, length = 'map', code & 0x0f
+    elif code in (0xc0, 0xc2, 0xc3):
+        return {0xc0: None, 0xc2: False, 0xc3: True}[code], offset
+    elif code in _SIZED:
+        fmt, kind = _SIZED[code]
+        (length,) = struct.unpack_from(fmt, data, offset)
+        offset += struct.calcsize(fmt)
+        if kind == 'number':
+            return length, offset
+    else:
+        raise ValueError(f'Unsupported MessagePack type 0x{code:02x}')
+
+    if kind == 'str':
+        return str(data[offset:offset + length], 'utf-8'), offset + length
+    if kind == 'bin':
+        return bytes(data[offset:offset + length]), offset + length
+    items = []
+    for _ in range(length * 2 if kind == 'map' else length):
+        item, offset = _unpack(data, offset)
+        items.append(item)
+    if kind == 'map':
+        return dict(zip(items[::2], items[1::2])), offset
+    return items, offset
@@ -385,51 +385,127 @@ document.addEventListener('DOMContentLoaded', () => {
         });
     }
 
-    // Placeholder for the function to fetch and display projects (will be implemented next)
+    // The newest page is fetched first; older pages follow the keyset cursor in
+    // X-Next-Cursor as the visitor scrolls, like the homepage project feed
+    let showcaseSentinel = null;
+    let showcaseObserver = null;
+
+    function renderShowcaseCard(project) {
+        const card = document.createElement('div');
+        card.className = 'card project-card'; // Ensure new global card style is applied
+
+        let imageHtml = `<img src="placeholder.jpg" alt="${escapeHtml(project.title)}">`; // Default placeholder
+        if (project.image_url) {
+            // The image_url from backend is like "/uploads/showcase_images/filename.jpg"
+            imageHtml = `<img src="${escapeHtml(project.image_url)}" alt="${escapeHtml(project.title)}">`;
+        }
+
+        const linkHtml = project.link
+            ? `<a href="${escapeHtml(project.link)}" target="_blank" rel="noopener noreferrer">View Project Details/Repo</a>`
+            : '<span>No link provided</span>';
+
+        card.innerHTML = `
+            ${imageHtml}
+            <h3>${escapeHtml(project.title)}</h3>
+            <p><strong>Category:</strong> ${escapeHtml(project.category)}</p>
+            <p>${escapeHtml(project.description)}</p>
+            <p><em>Submitted: ${new Date(project.submitted_at).toLocaleDateString()}</em></p>
+            ${linkHtml}
+        `;
+        return card;
+    }
+
+    // Returns the page's projects and the cursor of the one after it ('' on the last page)
+    async function fetchShowcasePage(cursor) {
+        const params = cursor ? `?${new URLSearchParams({ cursor: cursor })}` : '';
+        const response = await fetch(`/showcase/projects${params}`);
+        if (!response.ok) {
+            const errorData = await response.json().catch(() => ({})); // Try to get error details
+            throw new Error(errorData.error || `HTTP error! status: ${response.status}`);
+        }
+        const projects = await response.json();
+        return { projects: projects, nextCursor: response.headers.get('X-Next-Cursor') || '' };
+    }
+
+    function stopShowcaseFeed() {
+        if (showcaseObserver) {
+            showcaseObserver.disconnect();
+            showcaseObserver = null;
+        }
+        if (showcaseSentinel) {
+            showcaseSentinel.remove();
+            showcaseSentinel = null;
+        }
+    }
+
+    async function loadMoreShowcaseProjects() {
+        const cursor = showcaseGallery.dataset.nextCursor;
+        if (!cursor || showcaseGallery.dataset.loading) {
+            return;
+        }
+        showcaseGallery.dataset.loading = 'true';
+        try {
+            const page = await fetchShowcasePage(cursor);
+            if (showcaseGallery.dataset.nextCursor !== cursor) {
+                return; // The gallery was reloaded meanwhile
+            }
+            showcaseGallery.append(...page.projects.map(renderShowcaseCard));
+            showcaseGallery.dataset.nextCursor = page.nextCursor;
+        } catch (error) {
+            console.error('Error loading more showcase projects:', error);
+        } finally {
+            delete showcaseGallery.dataset.loading;
+        }
+        if (!showcaseGallery.dataset.nextCursor) {
+            stopShowcaseFeed();
+        }
+    }
+
+    function followShowcaseCursor() {
+        stopShowcaseFeed();
+        if (!showcaseGallery.dataset.nextCursor) {
+            return; // Everything fit on the first page
+        }
+        showcaseSentinel = document.createElement('div');
+        showcaseSentinel.className = 'projects-feed-sentinel';
+        showcaseGallery.after(showcaseSentinel);
+
+        if (!('IntersectionObserver' in window)) {
+            // Older browsers get a button instead of infinite scroll
+            showcaseSentinel.innerHTML = '<button type="button" class="button button-secondary">Load more projects</button>';
+            showcaseSentinel.querySelector('button').addEventListener('click', loadMoreShowcaseProjects);
+            return;
+        }
+
+        showcaseSentinel.setAttribute('aria-hidden', 'true');
+        showcaseObserver = new IntersectionObserver((entries) => {
+            if (entries.some(entry => entry.isIntersecting)) {
+                loadMoreShowcaseProjects();
+            }
+        }, { rootMargin: '400px 0px' });
+        showcaseObserver.observe(showcaseSentinel);
+    }
+
     async function fetchAndDisplayShowcaseProjects() {
         if (!showcaseGallery) return; // Only run if the gallery element exists
 
+        stopShowcaseFeed();
+        showcaseGallery.dataset.nextCursor = '';
         showcaseGallery.innerHTML = '<p>Loading projects...</p>'; // Show loading message
 
         try {
-            const response = await fetch('/showcase/projects');
-            if (!response.ok) {
-                const errorData = await response.json().catch(() => ({})); // Try to get error details
-                throw new Error(errorData.error || `HTTP error! status: ${response.status}`);
-            }
-            const projects = await response.json();
+            const page = await fetchShowcasePage();
 
             showcaseGallery.innerHTML = ''; // Clear loading message or old projects
 
-            if (projects.length === 0) {
+            if (page.projects.length === 0) {
                 showcaseGallery.innerHTML = '<p>No projects submitted yet. Be the first!</p>';
                 return;
             }
 
-            projects.forEach(project => {
-                const card = document.createElement('div');
-                card.className = 'card project-card'; // Ensure new global card style is applied
-
-                let imageHtml = `<img src="placeholder.jpg" alt="${escapeHtml(project.title)}">`; // Default placeholder
-                if (project.image_url) {
-                    // The image_url from backend is like "/uploads/showcase_images/filename.jpg"
-                    imageHtml = `<img src="${escapeHtml(project.image_url)}" alt="${escapeHtml(project.title)}">`;
-                }
-
-                const linkHtml = project.link
-                    ? `<a href="${escapeHtml(project.link)}" target="_blank" rel="noopener noreferrer">View Project Details/Repo</a>`
-                    : '<span>No link provided</span>';
-
-                card.innerHTML = `
-                    ${imageHtml}
-                    <h3>${escapeHtml(project.title)}</h3>
-                    <p><strong>Category:</strong> ${escapeHtml(project.category)}</p>
-                    <p>${escapeHtml(project.description)}</p>
-                    <p><em>Submitted: ${new Date(project.submitted_at).toLocaleDateString()}</em></p>
-                    ${linkHtml}
-                `;
-                showcaseGallery.appendChild(card);
-            });
+            showcaseGallery.append(...page.projects.map(renderShowcaseCard));
+            showcaseGallery.dataset.nextCursor = page.nextCursor;
+            followShowcaseCursor();
 
         } catch (error) {
             console.error('Failed to fetch or display showcase projects:', error);
@@ -551,6 +627,12 @@ document.addEventListener('DOMContentLoaded', () => {
                 const urlObject = new URL(guide.url);
                 displayTitle = urlObject.hostname + (urlObject.pathname !== '/' ? urlObject.pathname : '');
             } catch (e) { /* Use safeUrl if URL parsing fails */ }
+            // Link preview fields are filled in by the server shortly after submission
+            if (guide.title) displayTitle = guide.title;
+            const faviconHtml = guide.favicon_url
+                ? `<img class="guide-favicon" src="${escapeHtml(guide.favicon_url)}" alt="" width="16" height="16" onerror="this.remove();"> `
+                : '';
+            const descriptionHtml = guide.description ? `<p class="guide-description">${escapeHtml(guide.description)}</p>` : '';
 
 
             const thumbnailUrl = getThumbnailUrl(guide.url, guide.category);
@@ -560,7 +642,8 @@ document.addEventListener('DOMContentLoaded', () => {
                     <img src="${escapeHtml(thumbnailUrl)}" alt="Thumbnail for ${escapeHtml(displayTitle)}" onerror="this.onerror=null;this.src='placeholder.jpg';">
                 </div>
                 <div class="guide-card-content">
-                    <h3><a href="${safeUrl}" target="_blank" rel="noopener noreferrer">${escapeHtml(displayTitle)}</a></h3>
+                    <h3>${faviconHtml}<a href="${safeUrl}" target="_blank" rel="noopener noreferrer">${escapeHtml(displayTitle)}</a></h3>
+                    ${descriptionHtml}
                     <p><strong>Category:</strong> ${escapeHtml(guide.category)}</p>
                     <p class="guide-submitted-date">Submitted: ${new Date(guide.submitted_at).toLocaleDateString()}</p>
                 </div>
@@ -857,46 +940,83 @@ function initializeShowcaseForm() {
 // PROJECT DATA HANDLING (Homepage)
 // ==========================================
 
-async function loadProjectData() {
+// The server renders the first page of projects; the rest of the feed is
+// fetched page by page (keyset cursor in X-Next-Cursor) as the visitor scrolls.
+// /projects/feed is served by Flask and redirected to list_project_data on Netlify
+const PROJECT_FEED_PAGE_SIZE = 12;
+
+// Built with DOM APIs so submitted text is never parsed as HTML
+function renderProjectCard(project) {
+    const card = document.createElement('div');
+    card.className = 'project-card';
+    const title = document.createElement('h3');
+    title.textContent = project.name;
+    const description = document.createElement('p');
+    description.textContent = project.description;
+    const link = document.createElement('a');
+    link.href = project.url;
+    link.target = '_blank';
+    link.className = 'button';
+    link.textContent = 'View Project';
+    card.append(title, description, link);
+    return card;
+}
+
+async function loadProjectFeedPage(projectsGrid) {
+    const cursor = projectsGrid.dataset.nextCursor;
+    if (!cursor || projectsGrid.dataset.loading) {
+        return null;
+    }
+    projectsGrid.dataset.loading = 'true';
     try {
-        const result = await fetchFromNetlifyFunction('/.netlify/functions/list_project_data');
-        
-        if (result.success && result.data.length > 0) {
-            const projectsSection = document.getElementById('submitted-projects');
-            if (projectsSection) {
-                const projectsGrid = projectsSection.querySelector('.projects-grid');
-                if (projectsGrid) {
-                    projectsGrid.innerHTML = result.data.map(project => `
-                        <div class="project-card">
-                            <h3>${escapeHtml(project.name)}</h3>
-                            <p>${escapeHtml(project.description)}</p>
-                            <a href="${escapeHtml(project.url)}" target="_blank" class="button button-secondary button-small">View Project</a>
-                        </div>
-                    `).join('');
-                } else {
-                    // Create projects grid if it doesn't exist
-                    const container = projectsSection.querySelector('.container');
-                    if (container) {
-                        const projectsGrid = document.createElement('div');
-                        projectsGrid.className = 'projects-grid';
-                        projectsGrid.innerHTML = result.data.map(project => `
-                            <div class="project-card">
-                                <h3>${escapeHtml(project.name)}</h3>
-                                <p>${escapeHtml(project.description)}</p>
-                                <a href="${escapeHtml(project.url)}" target="_blank" class="button button-secondary button-small">View Project</a>
-                            </div>
-                        `).join('');
-                        container.appendChild(projectsGrid);
-                    }
-                }
-            }
+        const params = new URLSearchParams({ limit: PROJECT_FEED_PAGE_SIZE, cursor: cursor });
+        const response = await fetch(`/projects/feed?${params}`);
+        const projects = await response.json();
+        if (!response.ok) {
+            throw new Error(projects.error || 'Fetch failed');
         }
-        
-        return result.data || [];
+        projectsGrid.append(...projects.map(renderProjectCard));
+        projectsGrid.dataset.nextCursor = response.headers.get('X-Next-Cursor') || '';
+        return projectsGrid.dataset.nextCursor;
     } catch (error) {
         console.error('Error loading projects:', error);
-        return [];
+        return null;
+    } finally {
+        delete projectsGrid.dataset.loading;
+    }
+}
+
+function loadProjectData() {
+    const projectsGrid = document.querySelector('#community-projects .projects-grid');
+    const sentinel = document.querySelector('#community-projects .projects-feed-sentinel');
+    if (!projectsGrid || !sentinel) {
+        return; // Everything fit on the first page
     }
+
+    if (!('IntersectionObserver' in window)) {
+        // Older browsers get a button instead of infinite scroll
+        sentinel.innerHTML = '<button type="button" class="button button-secondary">Load more projects</button>';
+        sentinel.removeAttribute('aria-hidden');
+        sentinel.querySelector('button').addEventListener('click', async () => {
+            await loadProjectFeedPage(projectsGrid);
+            if (!projectsGrid.dataset.nextCursor) {
+                sentinel.remove();
+            }
+        });
+        return;
+    }
+
+    const observer = new IntersectionObserver(async (entries) => {
+        if (!entries.some(entry => entry.isIntersecting)) {
+            return;
+        }
+        await loadProjectFeedPage(projectsGrid);
+        if (!projectsGrid.dataset.nextCursor) {
+            observer.disconnect();
+            sentinel.remove();
+        }
+    }, { rootMargin: '400px 0px' });
+    observer.observe(sentinel);
 }
 
 // ==========================================
@@ -0,0 +1,153 @@
+"""
+Serializers for the JSON list and detail responses
+
+Every model the API returns has one RowSerializer in SERIALIZERS, keyed by table
+name like CHANGE_TABLES and SYNC_TABLES. It names the fields the API returns, in
+order, plus a converter for each field that JSON can't carry as-is:
+
+    timestamp       DateTime  -> '2024-05-01T12:00:00'
+    decimal_text(n) Numeric   -> '4.50' (a string, so no precision is lost)
+    flag            Boolean   -> true / false
+
+Converters accept the values SQLite returns (text timestamps, REAL numbers, 0/1)
+as well as the datetime and Decimal objects SQLAlchemy builds. So a list
+endpoint can select the columns with `select_columns()`, which skips
+SQLAlchemy's result processing, and turn the row tuples straight into dicts,
+without building ORM objects. `obj()` serializes a model instance to the same
+shape, and `values()` a row to a list in `fields` order for the columnar
+formats (see response_formats.py). Each is compiled once into a function that
+builds its result in one expression.
+
+`dumps()` encodes with orjson when it is installed and with the standard
+library otherwise; JSON_BACKEND=json forces the standard library. json_provider.py
+plugs it into jsonify. Only the standard library is needed, so the query modules
+and the Netlify bundle can import this module.
+"""
+
+import json
+import os
+
+try:
+    import orjson
+except ImportError: # Optional: `pip install orjson` for faster responses
+    orjson = None
+
+JSON_BACKEND = 'orjson' if orjson is not None and os.environ.get('JSON_BACKEND', 'orjson') == 'orjson' else 'json'
+
+
+def timestamp(value):
+    """A DateTime column as ISO 8601, whether SQLite returned text or SQLAlchemy a datetime"""
+    if value is None:
+        return None
+    if not isinstance(value, str):
+        value = value.isoformat()
+    return value.replace(' ', 'T')
+
+
+def decimal_text(scale):
+    """A Numeric column as a string with `scale` decimals, like str() of the Decimal SQLAlchemy returns"""
+    template = f'{{:.{scale}f}}'
+
+    def convert(value):
+        return None if value is None else template.format(value)
+    return convert
+
+
+def flag(value):
+    return None if value is None else bool(value)
+
+
+def showcase_image_url(image_filename):
+    return f'/uploads/showcase_images/{image_filename}' if image_filename else None
+
+
+class RowSerializer:
+    """Turns row tuples (columns in `columns` order) or model instances into response dicts"""
+
+    def __init__(self, columns, converters=None, computed=None):
+        self.columns = tuple(columns)
+        self.converters = converters or {}
+        # Extra output field -> (column it is computed from, function)
+        self.computed = computed or {}
+        self.fields = self.columns + tuple(self.computed)
+        self.row = self._compile(lambda index, name: f'row[{index}]')
+        self.obj = self._compile(lambda index, name: f'row.{name}')
+        self.values = self._compile(lambda index, name: f'row[{index}]', as_list=True)
+        self._subsets = {}
+
+    def _compile(self, access, as_list=False):
+        namespace, fields = {}, []
+
+        def convert(function, value):
+            name = f'_f{len(namespace)}'
+            namespace[name] = function
+            return f'{name}({value})'
+
+        for index, name in enumerate(self.columns):
+            value = access(index, name)
+            fields.append((name, convert(self.converters[name], value) if name in self.converters else value))
+        for name, (source, function) in self.computed.items():
+            fields.append((name, convert(function, access(self.columns.index(source), source))))
+        if as_list:
+            body = f"[{', '.join(value for name, value in fields)}]"
+        else:
+            body = f"{{{', '.join(f'{name!r}: {value}' for name, value in fields)}}}"
+        exec(f"def serialize(row):\n    return {body}", namespace)
+        return namespace['serialize']
+
+    def rows(self, rows):
+        return list(map(self.row, rows))
+
+    def subset(self, columns):
+        """A serializer for some of the columns, e.g. a listing that leaves out large fields"""
+        columns = tuple(columns)
+        if columns not in self._subsets:
+            self._subsets[columns] = RowSerializer(
+                columns, {name: self.converters[name] for name in columns if name in self.converters},
+                {name: field for name, field in self.computed.items() if field[0] in columns})
+        return self._subsets[columns]
+
+    def select_columns(self, table):
+        """SQLAlchemy column expressions for `columns` of `table`, returned as stored in SQLite"""
+        from sqlalchemy import type_coerce
+        from sqlalchemy.types import NullType
+
+        return [type_coerce(table.c[name], NullType()).label(name) for name in self.columns]
+
+
+SERIALIZERS = {
+    'prompts': RowSerializer(
+        ('id', 'title', 'category', 'description', 'prompt_text', 'rating', 'usage_count', 'is_featured',
+         'created_at', 'updated_at'),
+        {'rating': decimal_text(2), 'is_featured': flag, 'created_at': timestamp, 'updated_at': timestamp}),
+    'guides': RowSerializer(
+        ('id', 'url', 'category', 'submitted_at', 'title', 'description', 'favicon_url', 'canonical_url'),
+        {'submitted_at': timestamp}),
+    'showcase_projects': RowSerializer(
+        ('id', 'title', 'category', 'description', 'link', 'image_filename', 'submitted_at'),
+        {'submitted_at': timestamp}, {'image_url': ('image_filename', showcase_image_url)}),
+    'feedback': RowSerializer(
+        ('id', 'feedback_type', 'summary', 'details', 'email', 'status', 'submitted_at'),
+        {'submitted_at': timestamp}),
+    'projects_data': RowSerializer(('id', 'name', 'description', 'url')),
+    'products': RowSerializer(
+        ('id', 'name', 'description', 'price', 'sku', 'stock_quantity', 'created_at'),
+        {'price': decimal_text(2), 'created_at': timestamp}),
+}
+
+
+def dumps(obj, default=None, sort_keys=False):
+    """Encode `obj` as compact UTF-8 JSON bytes; `default(value)` converts what JSON doesn't support"""
+    if JSON_BACKEND == 'orjson':
+        # Datetimes go through `default` too, so both backends encode them alike
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        try:
+            return orjson.dumps(obj, default=default, option=option | (orjson.OPT_SORT_KEYS if sort_keys else 0))
+        except TypeError:
+            pass # e.g. integers wider than 64 bits, which the standard library handles
+    return json.dumps(obj, default=default, sort_keys=sort_keys, ensure_ascii=False,
+                      separators=(',', ':')).encode('utf-8')
+
+
+def loads(data):
+    return orjson.loads(data) if JSON_BACKEND == 'orjson' else json.loads(data)
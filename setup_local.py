@@ -4,11 +4,12 @@ Local development setup script
 Creates database tables and sample data for testing
 """
 
+import argparse
 import os
 import sys
 from flask import Flask
 from models import db, User, Product, ApplicationSetting, Prompt, ShowcaseProject, Guide, Project as ProjectData, Feedback
-from app import app
+from app import create_app
 from decimal import Decimal
 
 def create_sample_data():
@@ -166,7 +167,7 @@ def create_sample_data():
     
     return True
 
-def setup_database():
+def setup_database(app):
     """Initialize database and create tables"""
     
     print("🗄️  Setting up database...")
@@ -191,7 +192,26 @@ def setup_database():
         print(f"❌ Error setting up database: {e}")
         return False
 
-def run_tests():
+def generate_synthetic_data(app, scale, seed):
+    """Bulk load synthetic rows on top of the sample data (see generate_data.py)"""
+
+    from generate_data import generate
+
+    print(f"🧬 Generating {scale} synthetic rows per table (seed {seed})...")
+
+    try:
+        with app.app_context():
+            db_path = db.engine.url.database
+            db.engine.dispose()
+        inserted = generate(db_path, scale, seed)
+        print(f"✅ Synthetic data created: {sum(inserted.values())} rows")
+        return True
+
+    except Exception as e:
+        print(f"❌ Error generating synthetic data: {e}")
+        return False
+
+def run_tests(app):
     """Run basic tests to verify setup"""
     
     print("🧪 Running basic tests...")
@@ -226,16 +246,28 @@ def run_tests():
 def main():
     """Main setup function"""
     
+    parser = argparse.ArgumentParser(description='Set up the local development database')
+    parser.add_argument('--scale', type=int, help='Also generate this many synthetic rows per table')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed for synthetic data')
+    args = parser.parse_args()
+    
     print("🚀 Starting local development setup...")
     print("=" * 50)
     
+    app = create_app()
+    
     # Setup database
-    if not setup_database():
+    if not setup_database(app):
         print("❌ Database setup failed!")
         sys.exit(1)
     
+    # Optionally load production-scale synthetic data
+    if args.scale and not generate_synthetic_data(app, args.scale, args.seed):
+        print("❌ Synthetic data generation failed!")
+        sys.exit(1)
+    
     # Run tests
-    if not run_tests():
+    if not run_tests(app):
         print("❌ Tests failed!")
         sys.exit(1)
     
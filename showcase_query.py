@@ -0,0 +1,128 @@
+"""
+Showcase project query specification
+
+The Flask route and the Netlify function both build their SQL here and format
+rows with the showcase serializer (see serializers.py), so the same parameters return the same
+results from either backend. Only the standard library is used so the Netlify
+bundle can import this module.
+
+Supported parameters:
+    category   exact match, 'all' or empty for every category
+    search     full-text search over title and description (SQLite FTS5)
+    sort       'relevance' (default when searching) or 'date' (newest first)
+    limit      page size, see pagination.py
+    cursor     opaque keyset cursor from the previous page's X-Next-Cursor
+"""
+
+import re
+
+from pagination import PaginationError, decode_cursor, parse_limit, split_page
+from serializers import SERIALIZERS
+
+SHOWCASE_COLUMNS = SERIALIZERS['showcase_projects'].columns
+
+# Title matches count ten times as much as description matches
+RELEVANCE = 'bm25(showcase_projects_fts, 10.0, 1.0)'
+
+SEARCH_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS showcase_projects_fts USING fts5("
+    "title, description, content='showcase_projects', content_rowid='id', tokenize='porter unicode61')",
+    "CREATE TRIGGER IF NOT EXISTS showcase_projects_fts_ai AFTER INSERT ON showcase_projects BEGIN "
+    "INSERT INTO showcase_projects_fts(rowid, title, description) VALUES (new.id, new.title, new.description); END",
+    "CREATE TRIGGER IF NOT EXISTS showcase_projects_fts_ad AFTER DELETE ON showcase_projects BEGIN "
+    "INSERT INTO showcase_projects_fts(showcase_projects_fts, rowid, title, description) "
+    "VALUES ('delete', old.id, old.title, old.description); END",
+    "CREATE TRIGGER IF NOT EXISTS showcase_projects_fts_au AFTER UPDATE OF title, description ON showcase_projects BEGIN "
+    "INSERT INTO showcase_projects_fts(showcase_projects_fts, rowid, title, description) "
+    "VALUES ('delete', old.id, old.title, old.description); "
+    "INSERT INTO showcase_projects_fts(rowid, title, description) VALUES (new.id, new.title, new.description); END",
+]
+
+INDEX_DDL = [
+    'CREATE INDEX IF NOT EXISTS ix_showcase_projects_submitted_at ON showcase_projects (submitted_at)',
+    'CREATE INDEX IF NOT EXISTS ix_showcase_projects_category_submitted_at ON showcase_projects (category, submitted_at)',
+]
+
+DROP_SEARCH_DDL = 'DROP TABLE IF EXISTS showcase_projects_fts'
+
+
+def ensure_showcase_search(conn):
+    """Create the FTS index, its sync triggers and the listing indexes on a sqlite3 connection"""
+    existed = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE name = 'showcase_projects_fts'").fetchone()
+    for statement in SEARCH_DDL + INDEX_DDL:
+        conn.execute(statement)
+    if not existed:
+        # Index rows that were inserted before the FTS table existed
+        conn.execute("INSERT INTO showcase_projects_fts(showcase_projects_fts) VALUES ('rebuild')")
+
+
+def fts_match_expression(search):
+    """Turn free text into a safe FTS5 query: every word must match, as a prefix"""
+    tokens = re.findall(r'\w+', search or '')
+    return ' '.join(f'"{token}"*' for token in tokens) or None
+
+
+class ShowcaseQuery:
+    """A parsed showcase listing request that renders to SQL with named parameters"""
+
+    def __init__(self, category=None, search=None, sort=None, limit=None, cursor=None):
+        self.category = category if category and category.lower() != 'all' else None
+        self.match = fts_match_expression(search)
+        self.sort = sort or ('relevance' if self.match else 'date')
+        if self.sort not in ('relevance', 'date'):
+            raise PaginationError("sort must be 'relevance' or 'date'")
+        if self.sort == 'relevance' and not self.match:
+            self.sort = 'date'
+        self.limit = parse_limit(limit)
+        self.cursor = decode_cursor(cursor, size=3)
+        if self.cursor and self.cursor[0] != self.sort:
+            raise PaginationError('Cursor does not match the requested sort order')
+
+    @classmethod
+    def from_args(cls, args):
+        """Build from a request.args-like mapping"""
+        return cls(args.get('category'), args.get('search'), args.get('sort'), args.get('limit'), args.get('cursor'))
+
+    def sql(self):
+        columns = ', '.join(f'p.{c}' for c in SHOWCASE_COLUMNS)
+        where, params = [], {'limit': self.limit + 1}
+        if self.category:
+            where.append('p.category = :category')
+            params['category'] = self.category
+
+        if self.match:
+            source = 'showcase_projects_fts f JOIN showcase_projects p ON p.id = f.rowid'
+            where.append('showcase_projects_fts MATCH :match')
+            params['match'] = self.match
+            score = RELEVANCE
+        else:
+            source = 'showcase_projects p'
+            score = 'NULL'
+
+        if self.sort == 'relevance':
+            order = 'score, p.id DESC'
+            if self.cursor:
+                # Lower bm25 scores are better matches
+                where.append(f'({RELEVANCE} > :cursor_key OR ({RELEVANCE} = :cursor_key AND p.id < :cursor_id))')
+        else:
+            order = 'p.submitted_at DESC, p.id DESC'
+            if self.cursor:
+                where.append('(p.submitted_at, p.id) < (:cursor_key, :cursor_id)')
+        if self.cursor:
+            params['cursor_key'], params['cursor_id'] = self.cursor[1], self.cursor[2]
+
+        where_clause = f"WHERE {' AND '.join(where)}" if where else ''
+        sql = f'SELECT {columns}, {score} AS score FROM {source} {where_clause} ORDER BY {order} LIMIT :limit'
+        return sql, params
+
+    def paginate(self, rows):
+        """Return (formatted page, next cursor) from the rows fetched with `sql()`"""
+        date_index = SHOWCASE_COLUMNS.index('submitted_at')
+        if self.sort == 'relevance':
+            key = lambda row: ['relevance', row[-1], row[0]]
+        else:
+            key = lambda row: ['date', row[date_index], row[0]]
+        page, next_cursor = split_page(list(rows), self.limit, key)
+        # The trailing score column is not part of the response
+        return SERIALIZERS['showcase_projects'].rows(page), next_cursor
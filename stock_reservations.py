@@ -0,0 +1,234 @@
+"""
+Stock reservations for products
+
+A client reserves stock for one or more SKUs, then commits the reservation (the
+sale went through) or releases it (it didn't):
+
+    POST /stock/reservations                  {"items": [{"sku": "A-1", "quantity": 2}, ...],
+                                               "ttl_seconds": 600}   -> 201, or 409 when short
+    POST /stock/reservations/<token>/commit   -> 200, the stock stays taken
+    POST /stock/reservations/<token>/release  -> 200, the stock is put back
+
+Stock is never read into Python and written back. Every SKU is taken with one
+conditional UPDATE:
+
+    UPDATE products SET stock_quantity = stock_quantity - :quantity
+    WHERE sku = :sku AND stock_quantity >= :quantity
+
+It either succeeds whole or matches no row, however many requests race. All
+the SKUs of a reservation are taken in one transaction, so when any of them is
+short the others are rolled back and nothing is held. Releasing, committing and
+expiring flip the reservation's status with a conditional UPDATE on
+`status = 'held'`. Only one of them can win, so stock is never put back twice.
+
+A reservation that is neither committed nor released by its expires_at is
+expired and its stock put back. This happens at the start of every reserve,
+commit and release, in the same transaction.
+
+Settings (environment variables, overridable through app.config):
+    RESERVATION_TTL          Seconds a reservation holds its stock by default (default: 900)
+    RESERVATION_MAX_TTL      Longest ttl_seconds a client may ask for (default: 3600)
+    RESERVATION_MAX_ITEMS    SKUs per reservation (default: 50)
+"""
+
+import os
+import secrets
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+
+DEFAULTS = {
+    'RESERVATION_TTL': 900,
+    'RESERVATION_MAX_TTL': 3600,
+    'RESERVATION_MAX_ITEMS': 50,
+}
+
+
+class ReservationError(ValueError):
+    """A request that can't be honoured; endpoints answer with `status` and `details()`"""
+    status = 400
+
+    def details(self):
+        return {"error": str(self)}
+
+
+class UnknownProduct(ReservationError):
+    status = 404
+
+    def __init__(self, sku):
+        super().__init__(f'No product with SKU {sku}')
+        self.sku = sku
+
+    def details(self):
+        return {"error": str(self), "sku": self.sku}
+
+
+class OutOfStock(ReservationError):
+    status = 409
+
+    def __init__(self, sku, requested, available):
+        super().__init__(f'Only {available} of {sku} left, {requested} requested')
+        self.sku, self.requested, self.available = sku, requested, available
+
+    def details(self):
+        return {"error": str(self), "sku": self.sku, "requested": self.requested, "available": self.available}
+
+
+class ReservationNotFound(ReservationError):
+    status = 404
+
+
+class ReservationClosed(ReservationError):
+    """The reservation was already committed, released or expired"""
+    status = 409
+
+    def __init__(self, token, status):
+        super().__init__(f'Reservation {token} is {status}')
+        self.reservation_status = status
+
+    def details(self):
+        return {"error": str(self), "status": self.reservation_status}
+
+
+def _setting(app, key):
+    if key in app.config:
+        return app.config[key]
+    return type(DEFAULTS[key])(os.environ.get(key, DEFAULTS[key]))
+
+
+def _timestamp(moment):
+    return moment.strftime('%Y-%m-%d %H:%M:%S')
+
+
+def utcnow():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def parse_reservation(payload, app):
+    """Validate a reserve request; returns ([(sku, quantity)] sorted by SKU, ttl seconds)"""
+    items = payload.get('items') if isinstance(payload, dict) else None
+    if not isinstance(items, list) or not items:
+        raise ReservationError('Body must be {"items": [{"sku": ..., "quantity": ...}]} with at least one item')
+    quantities = Counter()
+    for number, item in enumerate(items):
+        sku = item.get('sku') if isinstance(item, dict) else None
+        quantity = item.get('quantity', 1) if isinstance(item, dict) else None
+        if not isinstance(sku, str) or not sku:
+            raise ReservationError(f'Item {number} needs a sku')
+        if not isinstance(quantity, int) or isinstance(quantity, bool) or quantity < 1:
+            raise ReservationError(f'Item {number} quantity must be a positive integer')
+        quantities[sku] += quantity # The same SKU twice is one larger hold
+    max_items = int(_setting(app, 'RESERVATION_MAX_ITEMS'))
+    if len(quantities) > max_items:
+        raise ReservationError(f'At most {max_items} SKUs per reservation')
+
+    ttl = payload.get('ttl_seconds', int(_setting(app, 'RESERVATION_TTL')))
+    if not isinstance(ttl, int) or isinstance(ttl, bool) or ttl < 1:
+        raise ReservationError('ttl_seconds must be a positive integer')
+    # Sorted, so concurrent multi-SKU reservations take their rows in the same order
+    return sorted(quantities.items()), min(ttl, int(_setting(app, 'RESERVATION_MAX_TTL')))
+
+
+def _restock(session, rows):
+    """Put back the (product_id, quantity) of reservation rows that just stopped holding"""
+    from sqlalchemy import text
+
+    totals = Counter()
+    for product_id, quantity in rows:
+        totals[product_id] += quantity
+    if totals:
+        session.execute(text('UPDATE products SET stock_quantity = stock_quantity + :quantity WHERE id = :id'),
+                        [{'id': product_id, 'quantity': quantity} for product_id, quantity in totals.items()])
+
+
+def expire_reservations(session, now):
+    """Expire held reservations past their expires_at and put their stock back; returns the rows expired"""
+    from sqlalchemy import text
+
+    rows = session.execute(text(
+        "UPDATE stock_reservations SET status = 'expired' WHERE status = 'held' AND expires_at <= :now "
+        "RETURNING product_id, quantity"), {'now': _timestamp(now)}).fetchall()
+    _restock(session, rows)
+    return len(rows)
+
+
+def _describe(session, token):
+    from sqlalchemy import text
+
+    rows = session.execute(text(
+        'SELECT r.status, r.expires_at, p.sku, r.quantity FROM stock_reservations r '
+        'JOIN products p ON p.id = r.product_id WHERE r.token = :token ORDER BY p.sku'), {'token': token}).fetchall()
+    if not rows:
+        return None
+    return {
+        "token": token,
+        "status": rows[0].status,
+        "expires_at": str(rows[0].expires_at).replace(' ', 'T'),
+        "items": [{"sku": row.sku, "quantity": row.quantity} for row in rows],
+    }
+
+
+def reserve(session, items, ttl, now=None):
+    """Hold `items` ([(sku, quantity)]) for `ttl` seconds, all or nothing; returns the reservation"""
+    from sqlalchemy import text
+
+    now = now or utcnow()
+    token = secrets.token_hex(16)
+    expires_at = _timestamp(now + timedelta(seconds=ttl))
+    try:
+        # A write first, so the transaction holds SQLite's write lock from here to the commit
+        expire_reservations(session, now)
+        held = []
+        for sku, quantity in items:
+            product = session.execute(text(
+                'UPDATE products SET stock_quantity = stock_quantity - :quantity '
+                'WHERE sku = :sku AND stock_quantity >= :quantity RETURNING id'),
+                {'sku': sku, 'quantity': quantity}).first()
+            if product is None:
+                available = session.execute(text('SELECT stock_quantity FROM products WHERE sku = :sku'),
+                                            {'sku': sku}).first()
+                if available is None:
+                    raise UnknownProduct(sku)
+                raise OutOfStock(sku, quantity, available.stock_quantity or 0)
+            held.append({'token': token, 'product_id': product.id, 'quantity': quantity,
+                         'expires_at': expires_at, 'now': _timestamp(now)})
+        session.execute(text(
+            "INSERT INTO stock_reservations (token, product_id, quantity, status, created_at, expires_at) "
+            "VALUES (:token, :product_id, :quantity, 'held', :now, :expires_at)"), held)
+        reservation = _describe(session, token)
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+    return reservation
+
+
+def _close(session, token, status, restock, now):
+    from sqlalchemy import text
+
+    try:
+        expire_reservations(session, now)
+        rows = session.execute(text(
+            "UPDATE stock_reservations SET status = :status WHERE token = :token AND status = 'held' "
+            "RETURNING product_id, quantity"), {'token': token, 'status': status}).fetchall()
+        reservation = _describe(session, token)
+        if reservation is None:
+            raise ReservationNotFound(f'No reservation {token}')
+        if not rows:
+            raise ReservationClosed(token, reservation['status'])
+        if restock:
+            _restock(session, rows)
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+    return reservation
+
+
+def commit(session, token, now=None):
+    """Make a held reservation final; its stock stays taken"""
+    return _close(session, token, 'committed', False, now or utcnow())
+
+
+def release(session, token, now=None):
+    """Give up a held reservation and put its stock back"""
+    return _close(session, token, 'released', True, now or utcnow())
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Incremental sync of a Netlify community.db snapshot into the main database
+
+The Netlify functions write to an ephemeral SQLite file (/tmp/community.db, or
+COMMUNITY_DB_PATH) that is lost whenever the container recycles. This merges
+the rows added since the last run into the database models.py describes, so it
+can run from cron every few minutes:
+
+- Each table's high-water mark is the last source id merged, kept in
+  ingest_checkpoints as 'sync:<table>' and advanced in the same transaction as
+  the batch it covers. Nothing new costs one indexed query per table.
+- A recycled container starts its ids from 1 again. The checkpoint also keeps a
+  fingerprint of the table's first row, and a different first row means a new
+  file, which is read from the start.
+- Conflicts are skipped, so replaying a batch is harmless: guides by their
+  url_hash, the other tables by a natural key (see SYNC_TABLES).
+- Schema differences are mapped: showcase image_data (base64) is written to
+  UPLOAD_FOLDER under a content-addressed name, other columns models.py does
+  not have are dropped and reported, and missing ones take the model default.
+- The running app picks the new rows up by itself: the cached homepage is
+  checked against the change log on every request (see page_cache.py) and the
+  feedback counts expire after COUNTS_TTL_SECONDS (see feedback_query.py).
+
+Usage:
+    python sync_community_db.py                                  # /tmp/community.db
+    python sync_community_db.py snapshots/community.db --tables feedback guides
+"""
+
+import argparse
+import base64
+import binascii
+import hashlib
+import os
+import sqlite3
+import sys
+import time
+import zlib
+
+from import_data import TableLoader, save_checkpoint
+
+DEFAULT_SNAPSHOT = os.environ.get('COMMUNITY_DB_PATH', '/tmp/community.db')
+SYNC_BATCH_ROWS = 1000
+IMAGE_EXTENSIONS = {'image/png': 'png', 'image/jpeg': 'jpg', 'image/gif': 'gif'}
+
+# Table -> natural key used to skip rows that were already merged (None: a unique constraint does it)
+SYNC_TABLES = {
+    'prompts': ('title', 'created_at'),
+    'guides': None,
+    'showcase_projects': ('title', 'submitted_at'),
+    'feedback': ('summary', 'email', 'submitted_at'),
+    'projects_data': ('name', 'url'),
+}
+
+
+def open_snapshot(path):
+    """Read-only connection to a community.db file"""
+    if not os.path.exists(path):
+        raise FileNotFoundError(path)
+    return sqlite3.connect(f'file:{os.path.abspath(path)}?mode=ro', uri=True)
+
+
+def source_columns(snapshot, table):
+    """Column names of `table` in the snapshot, or None if the functions never created it"""
+    return [row[1] for row in snapshot.execute(f'PRAGMA table_info({table})')] or None
+
+
+def fingerprint(snapshot, table):
+    """CRC of the table's first row, which identifies the file it came from"""
+    row = snapshot.execute(f'SELECT * FROM {table} ORDER BY id LIMIT 1').fetchone()
+    return zlib.crc32(repr(row).encode('utf-8')) if row else None
+
+
+def save_image(record, upload_dir):
+    """Move a showcase row's base64 image_data into a file, as app.py's uploads are stored"""
+    data = record.pop('image_data', None)
+    if not data:
+        return record
+    extension = (record.get('image_filename') or '').rsplit('.', 1)[-1].lower() or 'jpg'
+    if data.startswith('data:'):
+        header, _, data = data.partition(',')
+        extension = IMAGE_EXTENSIONS.get(header[5:].split(';')[0], extension)
+    try:
+        image = base64.b64decode(data, validate=True)
+    except (binascii.Error, ValueError):
+        record['image_filename'] = None
+        return record
+    filename = f'community_{hashlib.sha1(image).hexdigest()[:16]}.{extension}'
+    path = os.path.join(upload_dir, filename)
+    if not os.path.exists(path):
+        os.makedirs(upload_dir, exist_ok=True)
+        with open(path + '.tmp', 'wb') as f:
+            f.write(image)
+        os.replace(path + '.tmp', path)
+    record['image_filename'] = filename
+    return record
+
+
+def sync_table(conn, snapshot, table_name, batch_rows=SYNC_BATCH_ROWS, upload_dir=None):
+    """Merge `table_name` rows past its high-water mark; returns counts, or None if the snapshot lacks it"""
+    from sqlalchemy import text
+    from models import db
+
+    columns = source_columns(snapshot, table_name)
+    if columns is None:
+        return None
+    table = db.Model.metadata.tables[table_name]
+    loader = TableLoader(table, key=SYNC_TABLES[table_name])
+    target = {column.name for column in table.columns}
+    counts = {'read': 0, 'inserted': 0, 'duplicates': 0,
+              'dropped_columns': sorted(set(columns) - target - {'image_data'})}
+
+    name = f'sync:{table_name}'
+    generation = fingerprint(snapshot, table_name)
+    with conn.begin():
+        saved = conn.execute(text('SELECT segment, position FROM ingest_checkpoints WHERE name = :name'),
+                             {'name': name}).first()
+    mark = saved.position if saved and saved.segment == generation else 0
+    id_index = columns.index('id')
+
+    while generation is not None:
+        rows = snapshot.execute(f'SELECT * FROM {table_name} WHERE id > ? ORDER BY id LIMIT ?',
+                                (mark, batch_rows)).fetchall()
+        if not rows:
+            break
+        records = [dict(zip(columns, row)) for row in rows]
+        if table_name == 'showcase_projects':
+            records = [save_image(record, upload_dir) for record in records]
+        with conn.begin():
+            inserted = loader.insert(conn, records)
+            mark = rows[-1][id_index]
+            save_checkpoint(conn, name, mark, generation)
+        counts['read'] += len(rows)
+        counts['inserted'] += inserted
+        counts['duplicates'] += len(rows) - inserted
+    return counts
+
+
+def sync_snapshot(app, path=DEFAULT_SNAPSHOT, tables=None, batch_rows=SYNC_BATCH_ROWS):
+    """Merge every table of the snapshot at `path`; returns {table: counts or None}"""
+    from models import db
+
+    results = {}
+    snapshot = open_snapshot(path)
+    try:
+        with app.app_context(), db.engine.connect() as conn:
+            for table in tables or SYNC_TABLES:
+                results[table] = sync_table(conn, snapshot, table, batch_rows, app.config['UPLOAD_FOLDER'])
+    finally:
+        snapshot.close()
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Merge new rows from a Netlify community.db into the main database')
+    parser.add_argument('snapshot', nargs='?', default=DEFAULT_SNAPSHOT, help='community.db file (default: %(default)s)')
+    parser.add_argument('--tables', nargs='+', choices=list(SYNC_TABLES), help='Only these tables (default: all)')
+    parser.add_argument('--batch-size', type=int, default=SYNC_BATCH_ROWS, help='Rows per transaction (default: %(default)s)')
+    args = parser.parse_args(argv)
+
+    from app import create_app
+
+    started = time.perf_counter()
+    try:
+        results = sync_snapshot(create_app(), args.snapshot, args.tables, args.batch_size)
+    except FileNotFoundError:
+        print(f"⚠️  No snapshot at {args.snapshot}; nothing to sync")
+        return 0
+    for table, counts in results.items():
+        if counts is None:
+            print(f"⏭️  {table:<18} not in the snapshot")
+            continue
+        print(f"🔄 {table:<18} {counts['inserted']:>7} new, {counts['duplicates']:>5} already present")
+        if counts['dropped_columns']:
+            print(f"   Not in models.py, dropped: {', '.join(counts['dropped_columns'])}")
+    print(f"✅ Synced {args.snapshot} in {time.perf_counter() - started:.2f}s")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
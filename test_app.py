@@ -1,38 +1,169 @@
 import unittest
+import base64
+import csv
+import gzip
+import importlib.util
+import io
 import json
 import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from unittest import mock
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 
-# Configure app for testing BEFORE importing app and db
-# This is crucial for Flask-SQLAlchemy
-TEST_DB_FILE = 'test_app.db'
-os.environ['FLASK_APP_TEST_DB_URI'] = f'sqlite:///{TEST_DB_FILE}'
+import logging
+from app import create_app
+from app_logging import SamplingFilter, shutdown_logging
+from page_cache import page_cache
+from template_cache import warm_templates
+from url_normalize import normalize_url
+from guide_enrichment import EnrichmentWorker, enrich_pending
+from feedback_queue import FeedbackQueue, apply_pending
+from export_data import export_tables
+from import_data import ImportFailed, TableLoader, import_file
+from sync_community_db import sync_snapshot
+from event_stream import EventBroker
+from models import db, User, Product, ApplicationSetting, Prompt, ShowcaseProject, Guide, Feedback, IngestCheckpoint, ChangeLog, IdempotencyKey, StockReservation, Project as ProjectData # Import ProjectData
 
-from app import app
-from models import db, User, Product, ApplicationSetting, Project as ProjectData # Import ProjectData
+TEST_DB_FILE = os.path.abspath('test_app.db')
+TEST_LOG_FILE = 'test_app.log'
+TEST_QUEUE_DIR = tempfile.mkdtemp(prefix='jules_feedback_queue_')
+app = create_app({
+    'SQLALCHEMY_DATABASE_URI': f'sqlite:///{TEST_DB_FILE}',
+    'LOG_FILE': TEST_LOG_FILE,
+    'TESTING': True,
+    'WTF_CSRF_ENABLED': False, # Disable CSRF for testing forms if any
+    'GUIDE_ENRICHMENT': 'off', # Tests that need the worker attach one to a stub server
+    'FEEDBACK_QUEUE_DIR': TEST_QUEUE_DIR,
+    'FEEDBACK_QUEUE_APPLIER': 'off', # Tests apply the queue themselves
+    'EVENT_STREAM_HEARTBEAT': 0.2, # Idle /events streams yield often enough for tests to read them
+})
+
+def load_netlify_function(name, db_path):
+    """Import a Netlify function module pointed at a private community database"""
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'netlify', 'functions', f'{name}.py')
+    spec = importlib.util.spec_from_file_location(f'netlify_{name}', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    module.DB_PATH = db_path
+    return module
+
+SHOWCASE_FIXTURES = [
+    # (title, category, description, submitted_at)
+    ("Code Review Bot", "Automation", "Reviews pull requests automatically", "2025-01-01 10:00:00"),
+    ("Task Planner", "Productivity", "Plans your day with Jules", "2025-01-02 10:00:00"),
+    ("Review Dashboard", "Productivity", "Tracks code review metrics", "2025-01-03 10:00:00"),
+    ("Docs Writer", "Automation", "Writes documentation and reviews it", "2025-01-04 10:00:00"),
+    ("Deploy Monitor", "DevOps", "Watches deployments", "2025-01-04 10:00:00"),
+]
+
+def insert_showcase_fixtures(execute):
+    for title, category, description, submitted_at in SHOWCASE_FIXTURES:
+        execute("INSERT INTO showcase_projects (title, category, description, submitted_at) VALUES (:title, :category, :description, :submitted_at)",
+                {"title": title, "category": category, "description": description, "submitted_at": submitted_at})
+
+FEEDBACK_FIXTURES = [
+    # (feedback_type, summary, status, submitted_at)
+    ("bug", "Crash on save", "submitted", "2025-02-01 09:00:00"),
+    ("feature", "Dark mode", "under_review", "2025-02-02 09:00:00"),
+    ("bug", "Typo in docs", "resolved", "2025-02-03 09:00:00"),
+    ("bug", "Slow search", "submitted", "2025-02-03 09:00:00"),
+    ("kudos", "Love it", "submitted", "2025-02-05 09:00:00"),
+]
+
+def insert_feedback_fixtures(execute):
+    for feedback_type, summary, status, submitted_at in FEEDBACK_FIXTURES:
+        execute("INSERT INTO feedback (feedback_type, summary, details, status, submitted_at) "
+                "VALUES (:feedback_type, :summary, :details, :status, :submitted_at)",
+                {"feedback_type": feedback_type, "summary": summary, "details": f"Details of {summary}",
+                 "status": status, "submitted_at": submitted_at})
+
+class StubSite:
+    """Local HTTP server with canned pages for the guide enrichment tests"""
+
+    PAGES = {
+        '/article': ('text/html', '<html><head><title> Jules Tips </title>'
+                     '<meta name="description" content="Ten tips for Jules.">'
+                     '<link rel="icon" href="/static/icon.png"><link rel="canonical" href="/articles/jules-tips">'
+                     '</head><body><title>Not this one</title></body></html>'),
+        '/plain': ('text/plain', 'just text'),
+    }
+
+    def __init__(self):
+        self.hits = {}
+        self.in_flight = self.max_in_flight = 0
+        self.lock = threading.Lock()
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                path = self.path.split('?')[0]
+                with site.lock:
+                    site.hits[path] = site.hits.get(path, 0) + 1
+                    hits = site.hits[path]
+                    site.in_flight += 1
+                    site.max_in_flight = max(site.max_in_flight, site.in_flight)
+                try:
+                    if path == '/to-ftp':
+                        self.send_response(302)
+                        self.send_header('Location', 'ftp://127.0.0.1/secret')
+                        return self.end_headers()
+                    if path == '/slow':
+                        time.sleep(0.3)
+                    if path == '/flaky' and hits == 1:
+                        return self.send_error(503)
+                    if path in ('/slow', '/flaky'):
+                        path = '/article'
+                    if path not in site.PAGES:
+                        return self.send_error(404)
+                    content_type, body = site.PAGES[path]
+                    self.send_response(200)
+                    self.send_header('Content-Type', f'{content_type}; charset=utf-8')
+                    self.end_headers()
+                    self.wfile.write(body.encode('utf-8'))
+                finally:
+                    with site.lock:
+                        site.in_flight -= 1
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f'http://127.0.0.1:{self.server.server_port}'
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
 
 class AppTestCase(unittest.TestCase):
     @classmethod
     def setUpClass(cls):
         """Set up for all tests once."""
         cls.test_db_file = TEST_DB_FILE
-        app.config['SQLALCHEMY_DATABASE_URI'] = os.environ['FLASK_APP_TEST_DB_URI']
-        app.config['TESTING'] = True
-        app.config['WTF_CSRF_ENABLED'] = False # Disable CSRF for testing forms if any
-
         with app.app_context():
             db.create_all()
 
     @classmethod
     def tearDownClass(cls):
         """Tear down after all tests once."""
+        app.extensions['event_poller'].stop(5)
         with app.app_context():
             db.drop_all()
+            db.engine.dispose()
+        app.extensions['read_router'].dispose()
 
-        if os.path.exists(cls.test_db_file):
-            os.remove(cls.test_db_file)
-        # Clean up environment variable
-        if 'FLASK_APP_TEST_DB_URI' in os.environ:
-            del os.environ['FLASK_APP_TEST_DB_URI']
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(cls.test_db_file + suffix):
+                os.remove(cls.test_db_file + suffix)
+        shutdown_logging(app)
+        shutil.rmtree(TEST_QUEUE_DIR, ignore_errors=True)
+        if os.path.exists(TEST_LOG_FILE):
+            os.remove(TEST_LOG_FILE)
 
 
     def setUp(self):
@@ -43,10 +174,18 @@ class AppTestCase(unittest.TestCase):
 
         # Clean data from tables before each test to ensure test isolation
         db.session.query(User).delete()
+        db.session.query(StockReservation).delete()
         db.session.query(Product).delete()
         db.session.query(ApplicationSetting).delete()
         db.session.query(ProjectData).delete() # Clean ProjectData table
-        # Add other models here if they need cleaning: Prompt, ShowcaseProject, Guide
+        db.session.query(ShowcaseProject).delete()
+        db.session.query(Guide).delete()
+        db.session.query(Feedback).delete()
+        db.session.query(IngestCheckpoint).delete()
+        db.session.query(Prompt).delete()
+        db.session.query(IdempotencyKey).delete()
+        db.session.query(ChangeLog).delete() # Last: the deletes above logged tombstones
+        page_cache.clear() # Rows were removed behind the homepage cache's back
         db.session.commit()
 
         # If specific tests need specific pre-existing data, add it here.
@@ -256,6 +395,1168 @@ class AppTestCase(unittest.TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertIn(b"No community projects submitted yet", response.data)
 
+    # --- Tests for logging ---
+
+    def test_16_submission_is_logged_as_truncated_json(self):
+        """Test that submission payloads reach the log file as JSON with long fields truncated"""
+        payload = {"title": "Log Test", "category": "Testing", "prompt_text": "x" * 10000}
+        response = self.client.post('/prompts', data=json.dumps(payload), content_type='application/json')
+        self.assertEqual(response.status_code, 201, response.data.decode())
+
+        app.extensions['log_listener'].queue.join() # Wait for the writer thread
+        with open(TEST_LOG_FILE, encoding='utf-8') as f:
+            entries = [json.loads(line) for line in f if line.strip()]
+        received = [e for e in entries if e['message'] == 'Received prompt submission']
+        self.assertTrue(received, "Submission log entry not found")
+        entry = received[-1]
+        self.assertEqual(entry['request'], {'method': 'POST', 'path': '/prompts'})
+        self.assertEqual(entry['payload']['title'], 'Log Test')
+        self.assertLess(len(entry['payload']['prompt_text']), 1000)
+        self.assertIn('more chars', entry['payload']['prompt_text'])
+
+    def test_17_hot_path_info_sampling(self):
+        """Test that sampling only drops hot-path INFO records"""
+        sampler = SamplingFilter(0.0)
+        def record(level, hot_path):
+            rec = logging.LogRecord('app', level, __file__, 1, 'msg', None, None)
+            if hot_path:
+                rec.hot_path = True
+            return rec
+        self.assertFalse(sampler.filter(record(logging.INFO, True)))
+        self.assertTrue(sampler.filter(record(logging.INFO, False)))
+        self.assertTrue(sampler.filter(record(logging.ERROR, True)))
+        self.assertTrue(SamplingFilter(1.0).filter(record(logging.INFO, True)))
+
+    # --- Tests for the rendered page cache ---
+
+    def test_20_homepage_cache_etag_and_invalidation(self):
+        """Test that the homepage is served from cache with an ETag until project data changes"""
+        first = self.client.get('/', headers={'Accept-Encoding': 'gzip'})
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first.headers['Content-Encoding'], 'gzip')
+        etag = first.headers['ETag']
+
+        not_modified = self.client.get('/', headers={'If-None-Match': etag})
+        self.assertEqual(not_modified.status_code, 304)
+
+        self.client.post('/submit_project_data',
+                         data=json.dumps({"name": "Cache Buster", "description": "New row", "url": "http://example.com/cb"}),
+                         content_type='application/json')
+        fresh = self.client.get('/', headers={'If-None-Match': etag})
+        self.assertEqual(fresh.status_code, 200)
+        self.assertIn(b"Cache Buster", fresh.data)
+
+        # A write from another process, which can't reach this one's cache
+        conn = sqlite3.connect(self.test_db_file)
+        with conn:
+            conn.execute("INSERT INTO projects_data (name, description, url) VALUES ('Other Worker', 'x', 'http://example.com/ow')")
+        conn.close()
+        self.assertIn(b"Other Worker", self.client.get('/').data)
+
+        stats = json.loads(self.client.get('/cache/stats').data)['index']
+        self.assertEqual(stats['misses'], 3)
+        self.assertEqual(stats['hits'], 1)
+        self.assertEqual(stats['stale'], 2)
+
+    def test_21_static_pages_render_once(self):
+        """Test that template-only pages are rendered once and then served from cache"""
+        for _ in range(3):
+            response = self.client.get('/docs.html')
+            self.assertEqual(response.status_code, 200)
+        stats = json.loads(self.client.get('/cache/stats').data)['docs.html']
+        self.assertEqual((stats['misses'], stats['hits']), (1, 2))
+        self.assertAlmostEqual(stats['hit_rate'], 2 / 3, places=3)
+
+    # --- Tests for showcase listing ---
+
+    def fetch_all_pages(self, url):
+        items, pages, cursor = [], 0, None
+        while True:
+            page_url = url + (f"&cursor={cursor}" if cursor else "")
+            response = self.client.get(page_url)
+            self.assertEqual(response.status_code, 200, response.data.decode())
+            items.extend(json.loads(response.data))
+            pages += 1
+            cursor = response.headers.get('X-Next-Cursor')
+            if not cursor:
+                return items, pages
+
+    def test_18_showcase_filter_search_and_pagination(self):
+        """Test category filtering, full-text search and keyset pagination of showcase projects"""
+        insert_showcase_fixtures(lambda sql, params: db.session.execute(db.text(sql), params))
+        db.session.commit()
+
+        items, pages = self.fetch_all_pages('/showcase/projects?limit=2')
+        self.assertEqual(pages, 3)
+        self.assertEqual([p['title'] for p in items],
+                         ["Deploy Monitor", "Docs Writer", "Review Dashboard", "Task Planner", "Code Review Bot"])
+
+        items, _ = self.fetch_all_pages('/showcase/projects?category=Productivity&limit=1')
+        self.assertEqual([p['title'] for p in items], ["Review Dashboard", "Task Planner"])
+
+        # Title matches rank above description matches; "review" also matches "reviews"
+        items, _ = self.fetch_all_pages('/showcase/projects?search=review&limit=1')
+        self.assertEqual([p['title'] for p in items][2:], ["Docs Writer"])
+        self.assertEqual(set(p['title'] for p in items[:2]), {"Code Review Bot", "Review Dashboard"})
+
+        response = self.client.get('/showcase/projects?cursor=not-a-cursor')
+        self.assertEqual(response.status_code, 400)
+
+    def test_19_showcase_matches_netlify_function(self):
+        """Test that the Flask route and the Netlify function return identical results"""
+        insert_showcase_fixtures(lambda sql, params: db.session.execute(db.text(sql), params))
+        db.session.commit()
+        with tempfile.TemporaryDirectory() as tmp:
+            function = load_netlify_function('showcase_projects', os.path.join(tmp, 'community.db'))
+            function.handler({'httpMethod': 'POST', 'body': json.dumps({'title': 'x', 'category': 'x', 'description': 'x'})}, None)
+            conn = function.sqlite3.connect(function.DB_PATH)
+            conn.execute("DELETE FROM showcase_projects")
+            conn.execute("DELETE FROM sqlite_sequence")
+            insert_showcase_fixtures(conn.execute)
+            conn.commit()
+            conn.close()
+
+            for params in [{}, {'limit': '2'}, {'category': 'Automation'}, {'search': 'review docs'},
+                           {'search': 'review', 'sort': 'date', 'limit': '2'}]:
+                query = '&'.join(f'{k}={v}' for k, v in params.items())
+                flask_response = self.client.get(f'/showcase/projects?{query}')
+                netlify_response = function.handler({'httpMethod': 'GET', 'queryStringParameters': params}, None)
+                self.assertEqual(json.loads(flask_response.data), json.loads(netlify_response['body']), params)
+                self.assertEqual(flask_response.headers.get('X-Next-Cursor'),
+                                 netlify_response['headers'].get('X-Next-Cursor'), params)
+
+
+    # --- Tests for the homepage project feed ---
+
+    def test_22_project_feed_pagination(self):
+        """Test keyset pagination of list_project_data and its /projects/feed alias"""
+        for i in range(5):
+            db.session.add(ProjectData(name=f"Feed {i}", description="d", url=f"http://example.com/{i}"))
+        db.session.commit()
+
+        items, pages = self.fetch_all_pages('/list_project_data?limit=2')
+        self.assertEqual(pages, 3)
+        self.assertEqual([p['name'] for p in items], [f"Feed {i}" for i in range(4, -1, -1)])
+
+        first = self.client.get('/projects/feed?limit=2')
+        cursor = first.headers['X-Next-Cursor']
+        second = self.client.get(f'/projects/feed?limit=2&cursor={cursor}')
+        self.assertEqual([p['name'] for p in json.loads(second.data)], ["Feed 2", "Feed 1"])
+
+        self.assertEqual(self.client.get('/list_project_data?cursor=not-a-cursor').status_code, 400)
+        self.assertEqual(self.client.get('/list_project_data?limit=0').status_code, 400)
+
+    def test_23_homepage_renders_first_feed_page(self):
+        """Test that the homepage renders only the first page of projects plus a cursor for the rest"""
+        for i in range(15):
+            db.session.add(ProjectData(name=f"Homepage Project {i:02d}", description="d", url="http://example.com"))
+        db.session.commit()
+
+        response = self.client.get('/')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b"Homepage Project 14", response.data)
+        self.assertIn(b"Homepage Project 03", response.data)
+        self.assertNotIn(b"Homepage Project 02", response.data)
+        self.assertIn(b"projects-feed-sentinel", response.data)
+
+        cursor = response.data.decode().split('data-next-cursor="')[1].split('"')[0]
+        rest = json.loads(self.client.get(f'/projects/feed?cursor={cursor}').data)
+        self.assertEqual([p['name'] for p in rest], [f"Homepage Project {i:02d}" for i in (2, 1, 0)])
+
+    def test_24_project_feed_matches_netlify_function(self):
+        """Test that the Netlify list_project_data function pages the same way as Flask"""
+        for i in range(5):
+            db.session.add(ProjectData(name=f"Feed {i}", description="d", url=f"http://example.com/{i}"))
+        db.session.commit()
+        with tempfile.TemporaryDirectory() as tmp:
+            submit = load_netlify_function('submit_project_data', os.path.join(tmp, 'community.db'))
+            for i in range(5):
+                submit.handler({'httpMethod': 'POST', 'body': json.dumps(
+                    {'name': f"Feed {i}", 'description': "d", 'url': f"http://example.com/{i}"})}, None)
+            function = load_netlify_function('list_project_data', submit.DB_PATH)
+
+            cursor = None
+            while True:
+                params = {'limit': '2', **({'cursor': cursor} if cursor else {})}
+                query = '&'.join(f'{k}={v}' for k, v in params.items())
+                flask_response = self.client.get(f'/list_project_data?{query}')
+                netlify_response = function.handler({'httpMethod': 'GET', 'queryStringParameters': params}, None)
+                netlify_items = json.loads(netlify_response['body'])
+                self.assertEqual([p['name'] for p in json.loads(flask_response.data)], [p['name'] for p in netlify_items])
+                self.assertTrue(all(p['created_at'] for p in netlify_items))
+                cursor = flask_response.headers.get('X-Next-Cursor')
+                self.assertEqual(cursor, netlify_response['headers'].get('X-Next-Cursor'))
+                if not cursor:
+                    break
+
+    # --- Tests for the template bytecode cache ---
+
+    def test_25_template_bytecode_cache(self):
+        """Test that warmed templates are loaded from the bytecode cache by the next process"""
+        with tempfile.TemporaryDirectory() as tmp:
+            config = {'TEMPLATE_CACHE_DIR': tmp, 'LOG_FILE': os.path.join(tmp, 'app.log')}
+            first_app = create_app(config)
+            first = warm_templates(first_app)
+            shutdown_logging(first_app)
+            self.assertIn('index.html', first)
+            self.assertFalse(any(entry['from_cache'] for entry in first.values()))
+            self.assertTrue(all(entry['render_ms'] is not None for entry in first.values()), first)
+
+            second_app = create_app(config)
+            second = warm_templates(second_app)
+            shutdown_logging(second_app)
+            self.assertEqual(set(second), set(first))
+            self.assertTrue(all(entry['from_cache'] for entry in second.values()))
+
+    # --- Tests for guide deduplication ---
+
+    def test_26_guide_url_normalization_and_dedupe(self):
+        """Test that trivially different guide URLs are rejected as duplicates and found by lookup"""
+        self.assertEqual(normalize_url(' HTTP://Example.COM:80/Guide/?utm_source=x&b=2&a=1#top '),
+                         'https://example.com/Guide?a=1&b=2')
+        self.assertNotEqual(normalize_url('https://example.com/Guide'), normalize_url('https://example.com/guide'))
+
+        response = self.client.post('/guides', data=json.dumps({"url": "https://example.com/jules-guide", "category": "blogpost"}),
+                                    content_type='application/json')
+        self.assertEqual(response.status_code, 201, response.data.decode())
+        for duplicate in ["http://EXAMPLE.com/jules-guide/", "https://example.com/jules-guide?utm_campaign=launch#intro"]:
+            response = self.client.post('/guides', data=json.dumps({"url": duplicate, "category": "blogpost"}),
+                                        content_type='application/json')
+            self.assertEqual(response.status_code, 409, duplicate)
+        for payload in [{"url": ["https://example.com/other"], "category": "blogpost"},
+                        {"url": "https://example.com/other", "category": 7}, ["https://example.com/other"],
+                        {"url": "file:///etc/passwd", "category": "blogpost"},
+                        {"url": "example.com/other", "category": "blogpost"}]:
+            response = self.client.post('/guides', data=json.dumps(payload), content_type='application/json')
+            self.assertEqual(response.status_code, 400, payload)
+        self.assertEqual(db.session.query(Guide).count(), 1)
+
+        found = json.loads(self.client.get('/guides?url=example.com/jules-guide/').data)
+        self.assertEqual([g['url'] for g in found], ["https://example.com/jules-guide"])
+        self.assertEqual(self.client.get('/guides?url=http://[').status_code, 400)
+
+    def test_27_netlify_guides_upgrade_and_dedupe(self):
+        """Test that the Netlify guides function upgrades an old table, merging duplicates, and rejects new ones"""
+        with tempfile.TemporaryDirectory() as tmp:
+            function = load_netlify_function('guides', os.path.join(tmp, 'community.db'))
+            conn = function.sqlite3.connect(function.DB_PATH)
+            conn.execute("CREATE TABLE guides (id INTEGER PRIMARY KEY AUTOINCREMENT, url TEXT NOT NULL UNIQUE, "
+                         "category TEXT NOT NULL, submitted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)")
+            conn.executemany("INSERT INTO guides (url, category) VALUES (?, ?)",
+                             [("https://a.com/x", "blogpost"), ("http://a.com/x/", "blogpost"), ("https://b.com/y", "youtube")])
+            conn.commit()
+            conn.close()
+
+            def submit(url):
+                return function.handler({'httpMethod': 'POST', 'body': json.dumps({'url': url, 'category': 'blogpost'})}, None)
+
+            self.assertEqual(submit("https://A.com/x?utm_medium=social")['statusCode'], 409)
+            self.assertEqual(submit("https://c.com/z")['statusCode'], 201)
+            self.assertEqual(submit("http://C.com/z/")['statusCode'], 409)
+            # Held to the same rule as the Flask app
+            for bad in ["c.com/z/", "ftp://c.com/z", "http://[", ["https://c.com/w"]]:
+                self.assertEqual(submit(bad)['statusCode'], 400, bad)
+
+            listed = json.loads(function.handler({'httpMethod': 'GET', 'queryStringParameters': None}, None)['body'])
+            self.assertEqual(sorted(g['url'] for g in listed), ["https://a.com/x", "https://b.com/y", "https://c.com/z"])
+            found = function.handler({'httpMethod': 'GET', 'queryStringParameters': {'url': 'http://b.com/y/'}}, None)
+            malformed = function.handler({'httpMethod': 'GET', 'queryStringParameters': {'url': 'http://['}}, None)
+            self.assertEqual(malformed['statusCode'], 400)
+            self.assertEqual([g['url'] for g in json.loads(found['body'])], ["https://b.com/y"])
+
+    # --- Tests for guide link previews ---
+
+    def enrichment_config(self, tmp, **overrides):
+        config = {'ENRICHMENT_CACHE_DIR': tmp, 'ENRICHMENT_BACKOFF': 0.0, 'ENRICHMENT_TIMEOUT': 2.0,
+                  'ENRICHMENT_RETRIES': 1, 'ENRICHMENT_PER_HOST': 2, 'ENRICHMENT_ALLOW_PRIVATE': 'on'}
+        config.update(overrides)
+        previous = {key: app.config.get(key) for key in config}
+        app.config.update(config)
+        def restore():
+            for key, value in previous.items():
+                if value is None:
+                    app.config.pop(key, None)
+                else:
+                    app.config[key] = value
+        self.addCleanup(restore)
+
+    def test_28_guide_enrichment_against_stub_server(self):
+        """Test metadata extraction, retries, failures, per-host limits and the response cache"""
+        site = StubSite()
+        self.addCleanup(site.close)
+        with tempfile.TemporaryDirectory() as tmp:
+            self.enrichment_config(tmp, ENRICHMENT_PER_HOST=1)
+            paths = ['/article', '/flaky', '/missing', '/plain', '/slow?a', '/slow?b', '/slow?c']
+            for path in paths:
+                db.session.add(Guide(url=site.url + path, category='blogpost'))
+            db.session.commit()
+
+            self.assertEqual(enrich_pending(app), {'done': 6, 'failed': 1})
+            guides = {g.url[len(site.url):]: g for g in db.session.query(Guide).all()}
+            article = guides['/article']
+            self.assertEqual(article.enrichment_status, 'done')
+            self.assertEqual(article.title, 'Jules Tips')
+            self.assertEqual(article.description, 'Ten tips for Jules.')
+            self.assertEqual(article.favicon_url, site.url + '/static/icon.png')
+            self.assertEqual(article.canonical_url, site.url + '/articles/jules-tips')
+            self.assertEqual((guides['/flaky'].title, site.hits['/flaky']), ('Jules Tips', 2)) # Retried after a 503
+            self.assertEqual((guides['/missing'].enrichment_status, guides['/missing'].enrichment_error), ('failed', 'HTTP 404'))
+            self.assertEqual(guides['/plain'].canonical_url, site.url + '/plain')
+            self.assertEqual(site.hits['/slow'], 3)
+            self.assertEqual(site.max_in_flight, 1) # Every URL is on one host
+
+            # A second pass is served from the on-disk cache
+            db.session.query(Guide).update({'enrichment_status': 'pending'})
+            db.session.commit()
+            hits = dict(site.hits)
+            self.assertEqual(enrich_pending(app), {'done': 6, 'failed': 1})
+            self.assertEqual(site.hits, dict(hits, **{'/missing': hits['/missing'] + 1}))
+
+    def test_29_create_guide_does_not_wait_for_enrichment(self):
+        """Test that a guide submission returns before its slow page has been fetched"""
+        site = StubSite()
+        self.addCleanup(site.close)
+        with tempfile.TemporaryDirectory() as tmp:
+            self.enrichment_config(tmp)
+            worker = app.extensions['guide_enrichment'] = EnrichmentWorker(app)
+            self.addCleanup(app.extensions.pop, 'guide_enrichment')
+            self.addCleanup(worker.stop, 5)
+
+            started = time.perf_counter()
+            response = self.client.post('/guides', data=json.dumps({"url": site.url + '/slow', "category": "blogpost"}),
+                                        content_type='application/json')
+            self.assertEqual(response.status_code, 201, response.data.decode())
+            self.assertLess(time.perf_counter() - started, 0.3)
+
+            self.assertTrue(worker.idle.wait(10))
+            guides = json.loads(self.client.get('/guides').data)
+            self.assertEqual([g['title'] for g in guides], ['Jules Tips'])
+
+    # --- Tests for the feedback ingestion queue ---
+
+    def use_feedback_queue(self, directory, **options):
+        """Swap in a queue on `directory`, as a freshly started process would see it"""
+        previous = app.extensions['feedback_queue']
+        queue = app.extensions['feedback_queue'] = FeedbackQueue(directory, **options)
+        def restore():
+            queue.close()
+            app.extensions['feedback_queue'] = previous
+        self.addCleanup(restore)
+        return queue
+
+    def post_feedback(self, summary, **fields):
+        payload = dict({"feedback_type": "bug", "summary": summary, "details": f"Details of {summary}"}, **fields)
+        return self.client.post('/feedback', data=json.dumps(payload), content_type='application/json')
+
+    def test_30_feedback_is_queued_then_applied_in_batches(self):
+        """Test that feedback is acknowledged from the log and inserted later, with the lag reported"""
+        with tempfile.TemporaryDirectory() as tmp:
+            self.use_feedback_queue(tmp)
+            for i in range(3):
+                response = self.post_feedback(f'Report {i}')
+                self.assertEqual(response.status_code, 202, response.data.decode())
+            lag = json.loads(response.data)['ingest_lag']
+            self.assertEqual(lag['pending'], 3)
+            self.assertGreaterEqual(lag['seconds'], 0)
+            self.assertEqual(self.post_feedback('x' * 201).status_code, 400) # Too long for the column
+            self.assertEqual(self.post_feedback('No type', feedback_type='').status_code, 400)
+            self.assertEqual(db.session.query(Feedback).count(), 0)
+            self.assertGreater(json.loads(self.client.get('/feedback/queue').data)['pending_bytes'], 0)
+
+            app.config['FEEDBACK_QUEUE_BATCH'] = 2
+            self.addCleanup(app.config.pop, 'FEEDBACK_QUEUE_BATCH')
+            self.assertEqual(apply_pending(app), {'applied': 3, 'skipped': 0})
+            self.assertEqual(sorted(f['summary'] for f in json.loads(self.client.get('/feedback').data)),
+                             ['Report 0', 'Report 1', 'Report 2'])
+            stats = json.loads(self.client.get('/feedback/queue').data)
+            self.assertEqual((stats['pending_bytes'], stats['lag']['pending'], stats['applied']), (0, 0, 3))
+            self.assertEqual(apply_pending(app), {'applied': 0, 'skipped': 0})
+
+    def test_31_feedback_queue_replays_after_restart(self):
+        """Test that a restarted queue applies every record once, across segments and a torn write"""
+        with tempfile.TemporaryDirectory() as tmp:
+            self.use_feedback_queue(tmp, segment_bytes=300)
+            for i in range(5):
+                self.assertEqual(self.post_feedback(f'Before {i}').status_code, 202)
+            self.assertGreater(len(app.extensions['feedback_queue'].segments()), 1)
+            app.config['FEEDBACK_QUEUE_BATCH'] = 2
+            self.addCleanup(app.config.pop, 'FEEDBACK_QUEUE_BATCH')
+            self.assertEqual(apply_pending(app, max_batches=1), {'applied': 2, 'skipped': 0})
+
+            # Crash in the middle of a write, then restart
+            queue = app.extensions['feedback_queue']
+            queue.close()
+            with open(queue.path(queue.segments()[-1]), 'ab') as f:
+                f.write(b'{"v":1,"summary":"Torn')
+            queue = self.use_feedback_queue(tmp, segment_bytes=300)
+            self.assertEqual(self.post_feedback('After restart').status_code, 202)
+
+            self.assertEqual(apply_pending(app), {'applied': 4, 'skipped': 1})
+            summaries = sorted(summary for summary, in db.session.query(Feedback.summary))
+            self.assertEqual(summaries, ['After restart'] + [f'Before {i}' for i in range(5)])
+            self.assertEqual(len(queue.segments()), 1) # Applied segments are deleted
+            self.assertEqual(apply_pending(app), {'applied': 0, 'skipped': 0})
+
+    # --- Tests for the feedback triage listing ---
+
+    def test_32_feedback_filters_summary_mode_and_counts(self):
+        """Test status, type and date filters, summary mode, keyset pages and cached counts"""
+        insert_feedback_fixtures(lambda sql, params: db.session.execute(db.text(sql), params))
+        db.session.commit()
+
+        items, pages = self.fetch_all_pages('/feedback?limit=2')
+        self.assertEqual(pages, 3)
+        self.assertEqual([f['summary'] for f in items],
+                         ["Love it", "Slow search", "Typo in docs", "Dark mode", "Crash on save"])
+        self.assertEqual(items[0]['details'], "Details of Love it")
+
+        items, _ = self.fetch_all_pages('/feedback?status=submitted&type=bug&limit=1')
+        self.assertEqual([f['summary'] for f in items], ["Slow search", "Crash on save"])
+        items, _ = self.fetch_all_pages('/feedback?since=2025-02-02&until=2025-02-05&fields=summary&limit=1')
+        self.assertEqual([f['summary'] for f in items], ["Slow search", "Typo in docs", "Dark mode"])
+        self.assertNotIn('details', items[0])
+        for bad in ('status=lost', 'since=yesterday', 'fields=everything', 'cursor=not-a-cursor'):
+            self.assertEqual(self.client.get(f'/feedback?{bad}').status_code, 400, bad)
+
+        counts = json.loads(self.client.get('/feedback/counts').data)
+        self.assertEqual(counts['by_status'], {'submitted': 3, 'under_review': 1, 'resolved': 1})
+        self.assertEqual(counts['by_type'], {'bug': 3, 'feature': 1, 'kudos': 1})
+        self.assertEqual(counts['total'], 5)
+
+        # Served from the cache until the feedback applier writes
+        with tempfile.TemporaryDirectory() as tmp:
+            self.use_feedback_queue(tmp)
+            self.assertEqual(self.post_feedback('Another bug').status_code, 202)
+            self.assertEqual(json.loads(self.client.get('/feedback/counts').data)['total'], 5)
+            apply_pending(app)
+        counts = json.loads(self.client.get('/feedback/counts').data)
+        self.assertEqual((counts['total'], counts['by_type']['bug']), (6, 4))
+
+    def test_33_feedback_listing_matches_netlify_function(self):
+        """Test that the Netlify feedback function filters and pages the same way as Flask"""
+        insert_feedback_fixtures(lambda sql, params: db.session.execute(db.text(sql), params))
+        db.session.commit()
+        with tempfile.TemporaryDirectory() as tmp:
+            function = load_netlify_function('feedback', os.path.join(tmp, 'community.db'))
+            function.handler({'httpMethod': 'POST', 'body': json.dumps(
+                {'feedback_type': 'bug', 'summary': 'Setup', 'details': 'Creates the table'})}, None)
+            conn = sqlite3.connect(function.DB_PATH)
+            conn.execute('DELETE FROM feedback')
+            insert_feedback_fixtures(conn.execute)
+            conn.commit()
+            conn.close()
+
+            # Row ids differ between the two databases, so each backend follows its own cursor
+            flask_cursor = netlify_cursor = None
+            while True:
+                params = {'limit': '2', 'type': 'bug', 'fields': 'summary'}
+                query = '&'.join(f'{k}={v}' for k, v in params.items())
+                flask_response = self.client.get(f'/feedback?{query}' + (f'&cursor={flask_cursor}' if flask_cursor else ''))
+                netlify_params = dict(params, **({'cursor': netlify_cursor} if netlify_cursor else {}))
+                netlify_response = function.handler({'httpMethod': 'GET', 'queryStringParameters': netlify_params}, None)
+                self.assertEqual([(f['summary'], f['submitted_at']) for f in json.loads(flask_response.data)],
+                                 [(f['summary'], f['submitted_at']) for f in json.loads(netlify_response['body'])])
+                flask_cursor = flask_response.headers.get('X-Next-Cursor')
+                netlify_cursor = netlify_response['headers'].get('X-Next-Cursor')
+                self.assertEqual(bool(flask_cursor), bool(netlify_cursor))
+                if not flask_cursor:
+                    break
+
+            function.feedback_counts.invalidate()
+            counts = json.loads(function.handler({'httpMethod': 'GET', 'path': '/.netlify/functions/feedback/counts'}, None)['body'])
+            self.assertEqual(counts['by_status'], {'submitted': 3, 'under_review': 1, 'resolved': 1})
+
+    # --- Tests for streaming exports ---
+
+    def test_34_export_ndjson_csv_windows_and_gzip(self):
+        """Test /export/<table> formats, since/until windows, on-the-fly gzip and bad requests"""
+        insert_showcase_fixtures(lambda sql, params: db.session.execute(db.text(sql), params))
+        db.session.commit()
+
+        response = self.client.get('/export/showcase_projects')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, 'application/x-ndjson')
+        rows = [json.loads(line) for line in response.data.decode().splitlines()]
+        self.assertEqual([r['title'] for r in rows], [title for title, *_ in SHOWCASE_FIXTURES])
+        self.assertEqual(rows[0]['submitted_at'], '2025-01-01 10:00:00')
+        self.assertRegex(response.headers['X-Export-Until'], r'^\d{4}-\d\d-\d\d \d\d:\d\d:\d\d$')
+
+        response = self.client.get('/export/showcase_projects?format=csv&since=2025-01-02&until=2025-01-04')
+        self.assertEqual(response.mimetype, 'text/csv')
+        rows = list(csv.DictReader(io.StringIO(response.data.decode())))
+        self.assertEqual([r['title'] for r in rows], ["Task Planner", "Review Dashboard"])
+        self.assertEqual(rows[0]['description'], "Plans your day with Jules")
+
+        plain = self.client.get('/export/showcase_projects?until=2030-01-01').data
+        response = self.client.get('/export/showcase_projects?until=2030-01-01', headers={'Accept-Encoding': 'gzip'})
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.data), plain)
+
+        self.assertEqual(self.client.get('/export/users').status_code, 404)
+        self.assertEqual(self.client.get('/export/projects_data?since=2025-01-01').status_code, 400)
+        self.assertEqual(self.client.get('/export/guides?format=xml').status_code, 400)
+
+    def test_35_export_csv_quoting_round_trips(self):
+        """Test that CSV exports quote commas, quotes and newlines the way csv readers expect"""
+        db.session.add(ProjectData(name='Quote "this", please', description='line one\nline two', url='http://example.com/q'))
+        db.session.commit()
+        with tempfile.TemporaryDirectory() as tmp:
+            export_tables(app, ['projects_data', 'feedback'], 'csv', compress=True, output_dir=tmp)
+            with gzip.open(os.path.join(tmp, 'projects_data.csv.gz'), 'rt', newline='') as f:
+                rows = list(csv.DictReader(f))
+        self.assertEqual([(r['name'], r['description']) for r in rows], [('Quote "this", please', 'line one\nline two')])
+
+    def test_36_import_round_trips_export_and_dedupes_guides(self):
+        """Test that import_data.py loads an export back and skips guides whose canonical URL exists"""
+        insert_feedback_fixtures(lambda sql, params: db.session.execute(db.text(sql), params))
+        db.session.add(Guide(url='https://example.com/guide', category='blogpost'))
+        db.session.commit()
+        with tempfile.TemporaryDirectory() as tmp:
+            export_tables(app, ['feedback'], compress=True, output_dir=tmp)
+            db.session.query(Feedback).delete()
+            db.session.commit()
+            counts = import_file(app, 'feedback', os.path.join(tmp, 'feedback.ndjson.gz'), chunk_rows=2, out=io.StringIO())
+            self.assertEqual((counts['read'], counts['inserted']), (len(FEEDBACK_FIXTURES), len(FEEDBACK_FIXTURES)))
+            rows = db.session.query(Feedback.summary, Feedback.status, Feedback.submitted_at).order_by(Feedback.id).all()
+            self.assertEqual([(r.summary, r.status) for r in rows], [(f[1], f[2]) for f in FEEDBACK_FIXTURES])
+            self.assertEqual(rows[0].submitted_at.strftime('%Y-%m-%d %H:%M:%S'), FEEDBACK_FIXTURES[0][3])
+
+            path = os.path.join(tmp, 'guides.csv')
+            with open(path, 'w', newline='') as f:
+                writer = csv.writer(f)
+                writer.writerow(['url', 'category', 'url_hash'])
+                writer.writerow(['https://EXAMPLE.com/guide/', 'blogpost', 'stale'])
+                writer.writerow(['https://example.com/other', 'video', ''])
+                writer.writerow(['https://example.com/other#intro', 'video', ''])
+                writer.writerow(['http://[', 'video', ''])
+            out = io.StringIO()
+            counts = import_file(app, 'guides', path, out=out)
+        self.assertEqual((counts['inserted'], counts['duplicates'], counts['rejected']), (1, 2, 1))
+        self.assertIn('Record 4 rejected: Not a valid URL: Invalid IPv6 URL', out.getvalue())
+        imported = db.session.query(Guide).filter_by(category='video').one()
+        self.assertEqual((imported.enrichment_status, imported.url), ('pending', 'https://example.com/other'))
+        self.assertIsNotNone(imported.submitted_at)
+
+    def test_37_import_resumes_from_checkpoint(self):
+        """Test that an interrupted import resumes after its last committed chunk, with indexes rebuilt"""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'feedback.ndjson')
+            with open(path, 'w') as f:
+                for i in range(10):
+                    f.write(json.dumps({'feedback_type': 'bug', 'summary': f'Report {i}', 'details': 'd'}) + '\n')
+
+            original_insert, calls = TableLoader.insert, []
+            def interrupted_insert(loader, conn, records):
+                calls.append(len(records))
+                if len(calls) == 3:
+                    raise KeyboardInterrupt
+                return original_insert(loader, conn, records)
+            with mock.patch.object(TableLoader, 'insert', interrupted_insert), self.assertRaises(KeyboardInterrupt):
+                import_file(app, 'feedback', path, chunk_rows=3, rebuild_indexes=True, out=io.StringIO())
+            self.assertEqual(db.session.query(Feedback).count(), 6)
+
+            counts = import_file(app, 'feedback', path, chunk_rows=3, rebuild_indexes=True, out=io.StringIO())
+            self.assertEqual((counts['read'], counts['inserted']), (4, 4))
+            self.assertEqual([f.summary for f in db.session.query(Feedback).order_by(Feedback.id)],
+                             [f'Report {i}' for i in range(10)])
+            counts = import_file(app, 'feedback', path, out=io.StringIO())
+            self.assertEqual(counts['read'], 0) # Already done
+
+            with db.engine.connect() as conn:
+                indexes = {row[0] for row in conn.exec_driver_sql("SELECT name FROM sqlite_master WHERE tbl_name = 'feedback' AND type = 'index'")}
+            self.assertTrue({'ix_feedback_submitted_at', 'ix_feedback_status_submitted_at'} <= indexes)
+
+            with open(path, 'a') as f:
+                f.write(json.dumps({'feedback_type': 'bug', 'details': 'no summary'}) + '\n')
+                f.write(json.dumps({'feedback_type': 'bug', 'summary': 'Report 11', 'details': 'd'}) + '\n')
+            out = io.StringIO()
+            counts = import_file(app, 'feedback', path, chunk_rows=5, out=out)
+            self.assertEqual((counts['inserted'], counts['rejected']), (11, 1)) # A changed file starts a new checkpoint
+            self.assertIn('Record 11 rejected: NOT NULL constraint failed: feedback.summary', out.getvalue())
+            self.assertEqual(import_file(app, 'feedback', path, out=io.StringIO())['read'], 0) # Checkpoint moved past it
+        with self.assertRaises(ImportFailed):
+            import_file(app, 'ingest_checkpoints', path)
+
+    # --- Tests for syncing the Netlify community.db ---
+
+    def test_38_sync_merges_netlify_rows_incrementally(self):
+        """Test that sync_community_db.py merges only new rows, maps image_data and survives a recycled container"""
+        db.session.add(Guide(url='https://example.com/known', category='blogpost'))
+        db.session.commit()
+        png = base64.b64encode(b'\x89PNG fake image').decode()
+        with tempfile.TemporaryDirectory() as tmp, mock.patch.dict(app.config, {'UPLOAD_FOLDER': os.path.join(tmp, 'uploads')}):
+            path = os.path.join(tmp, 'community.db')
+            def submit(name, **body):
+                response = load_netlify_function(name, path).handler({'httpMethod': 'POST', 'body': json.dumps(body)}, None)
+                self.assertEqual(response['statusCode'], 201, response['body'])
+            submit('feedback', feedback_type='bug', summary='Lost on redeploy', details='d')
+            submit('guides', url='https://example.com/new', category='video')
+            submit('guides', url='https://EXAMPLE.com/known/', category='blogpost')
+            submit('showcase_projects', title='Pixel Art', category='game', description='d',
+                   image=f'data:image/png;base64,{png}')
+            submit('prompts', title='Refactor', category='code', prompt_text='Refactor this', rating='4.5')
+
+            results = sync_snapshot(app, path)
+            self.assertEqual({t: c['inserted'] for t, c in results.items() if c}, {
+                'prompts': 1, 'guides': 1, 'showcase_projects': 1, 'feedback': 1})
+            self.assertIsNone(results['projects_data'])
+            self.assertEqual(results['guides']['duplicates'], 1)
+            self.assertEqual(results['showcase_projects']['dropped_columns'], [])
+            project = db.session.query(ShowcaseProject).one()
+            self.assertRegex(project.image_filename, r'^community_[0-9a-f]{16}\.png$')
+            with open(os.path.join(tmp, 'uploads', project.image_filename), 'rb') as f:
+                self.assertEqual(f.read(), b'\x89PNG fake image')
+
+            # Only rows past the high-water mark are read
+            submit('feedback', feedback_type='kudos', summary='Thanks', details='d')
+            results = sync_snapshot(app, path)
+            self.assertEqual((results['feedback']['read'], results['feedback']['inserted']), (1, 1))
+            self.assertEqual(results['guides']['read'], 0)
+
+            # Losing the checkpoints replays everything without duplicating it
+            db.session.query(IngestCheckpoint).delete()
+            db.session.commit()
+            results = sync_snapshot(app, path, batch_rows=1)
+            self.assertEqual(sum(c['inserted'] for c in results.values() if c), 0)
+            self.assertEqual(db.session.query(Feedback).count(), 2)
+
+            # A recycled container restarts its ids at 1
+            os.remove(path)
+            submit('feedback', feedback_type='bug', summary='After recycle', details='d')
+            results = sync_snapshot(app, path, ['feedback'])
+            self.assertEqual(results['feedback']['inserted'], 1)
+        self.assertEqual(sorted(f.summary for f in db.session.query(Feedback)), ['After recycle', 'Lost on redeploy', 'Thanks'])
+
+    # --- Tests for the change feed ---
+
+    def test_39_change_feed_reports_upserts_and_tombstones(self):
+        """Test that /changes returns changes after a seq in order, collapsed per row, with deletions as tombstones"""
+        self.client.post('/guides', json={'url': 'https://example.com/a', 'category': 'blogpost'})
+        self.client.post('/submit_project_data', json={'name': 'Feed', 'description': 'd', 'url': 'http://example.com'})
+        response = self.client.get('/changes')
+        self.assertEqual(response.status_code, 200)
+        body = json.loads(response.data)
+        self.assertEqual([(c['table'], c['op']) for c in body['changes']], [('guides', 'upsert'), ('projects_data', 'upsert')])
+        self.assertEqual(body['changes'][0]['row']['url'], 'https://example.com/a')
+        self.assertFalse(body['has_more'])
+        since = body['since']
+
+        # Nothing new: the same token comes back
+        self.assertEqual(json.loads(self.client.get(f'/changes?since={since}').data), {'changes': [], 'since': since, 'has_more': False})
+
+        guide = db.session.query(Guide).one()
+        guide.title = 'Enriched'
+        db.session.add(Prompt(title='P', category='code', prompt_text='t'))
+        db.session.commit()
+        db.session.delete(db.session.query(ProjectData).one())
+        db.session.commit()
+
+        response = self.client.get(f'/changes?since={since}&limit=2')
+        body = json.loads(response.data)
+        self.assertEqual([(c['table'], c['op']) for c in body['changes']], [('guides', 'upsert'), ('prompts', 'upsert')])
+        self.assertEqual(body['changes'][0]['row']['title'], 'Enriched')
+        self.assertTrue(body['has_more'])
+        body = json.loads(self.client.get(f"/changes?since={body['since']}&limit=2").data)
+        self.assertEqual([(c['table'], c['op'], 'row' in c) for c in body['changes']], [('projects_data', 'delete', False)])
+
+        # One entry per row, however often it changed
+        self.assertEqual(db.session.query(ChangeLog).count(), 3)
+        body = json.loads(self.client.get(f'/changes?since={since}&tables=prompts').data)
+        self.assertEqual([c['table'] for c in body['changes']], ['prompts'])
+        self.assertEqual(self.client.get('/changes?since=abc').status_code, 400)
+        self.assertEqual(self.client.get('/changes?tables=users').status_code, 400)
+
+    # --- Tests for the /events stream ---
+
+    def read_events(self, chunks, count, timeout=5):
+        """Read SSE frames from a streaming response until `count` events (not comments) arrive"""
+        events, deadline = [], time.monotonic() + timeout
+        while len(events) < count and time.monotonic() < deadline:
+            for frame in next(chunks).decode().split('\n\n'):
+                fields = dict(line.split(': ', 1) for line in frame.splitlines() if line and not line.startswith(':'))
+                if 'event' in fields:
+                    events.append(fields)
+        return events
+
+    def test_40_event_broker_fan_out_buffers_and_resume(self):
+        """Test that the broker fans out to many subscribers, resets slow ones and replays on resume"""
+        broker = EventBroker(client_buffer=3, replay=5)
+        broker.start_at(100)
+        subscribers = [broker.subscribe() for _ in range(2000)]
+        broker.publish([(101, 'guides', {'id': 1, 'op': 'upsert'})])
+        self.assertTrue(all(broker.wait(s, 0)[0] == [(101, 'guides', {'id': 1, 'op': 'upsert'})] for s in subscribers))
+        for s in subscribers[1:]:
+            broker.unsubscribe(s)
+
+        # A subscriber that stops reading holds at most its buffer, then is told to catch up
+        broker.publish([(seq, 'prompts', {'id': seq, 'op': 'upsert'}) for seq in range(102, 108)])
+        self.assertEqual(broker.wait(subscribers[0], 0), ([], 101))
+        self.assertEqual(broker.wait(subscribers[0], 0), ([], None))
+
+        # Resume replays buffered events after Last-Event-ID; older ids get a reset
+        resumed = broker.subscribe(last_event_id=105)
+        self.assertEqual([e[0] for e in broker.wait(resumed, 0)[0]], [106, 107])
+        self.assertEqual(broker.wait(broker.subscribe(last_event_id=101), 0), ([], 101))
+        started = time.monotonic()
+        self.assertEqual(broker.wait(resumed, 0.1), ([], None)) # Heartbeat timeout
+        self.assertGreaterEqual(time.monotonic() - started, 0.1)
+
+    def test_41_events_endpoint_streams_commits_and_resumes(self):
+        """Test that /events pushes committed submissions and resumes from Last-Event-ID"""
+        response = self.client.get('/events')
+        self.assertEqual(response.mimetype, 'text/event-stream')
+        chunks = iter(response.response)
+        self.assertEqual(next(chunks), b'retry: 3000\n\n')
+        next(chunks) # Subscribed; the first wait ends with a heartbeat
+
+        self.client.post('/guides', json={'url': 'https://example.com/live', 'category': 'video'})
+        self.client.post('/prompts', json={'title': 'Live', 'category': 'code', 'prompt_text': 't'})
+        events = self.read_events(chunks, 2)
+        response.close()
+        self.assertEqual([e['event'] for e in events], ['guides', 'prompts'])
+        self.assertEqual(json.loads(events[0]['data']), {'id': db.session.query(Guide).one().id, 'op': 'upsert',
+                                                          'url': 'https://example.com/live', 'category': 'video'})
+
+        response = self.client.get('/events', headers={'Last-Event-ID': events[0]['id']})
+        resumed = self.read_events(iter(response.response), 1)
+        response.close()
+        self.assertEqual(resumed, [events[1]])
+        self.assertEqual(self.client.get('/events?last_event_id=x').status_code, 400)
+
+    # --- Tests for Idempotency-Key ---
+
+    def test_42_idempotency_key_replays_stored_response(self):
+        """Test that a retried POST with the same Idempotency-Key replays the first response"""
+        headers = {'Idempotency-Key': 'retry-1'}
+        first = self.client.post('/guides', json={'url': 'https://example.com/once', 'category': 'blogpost'}, headers=headers)
+        retry = self.client.post('/guides', json={'url': 'https://example.com/once', 'category': 'blogpost'}, headers=headers)
+        self.assertEqual((first.status_code, retry.status_code), (201, 201))
+        self.assertEqual(retry.data, first.data)
+        self.assertEqual(retry.headers['Idempotent-Replayed'], 'true')
+        self.assertNotIn('Idempotent-Replayed', first.headers)
+        self.assertEqual(db.session.query(Guide).count(), 1)
+        # Without the key a duplicate guide is still a conflict
+        self.assertEqual(self.client.post('/guides', json={'url': 'https://example.com/once', 'category': 'blogpost'}).status_code, 409)
+
+        # The key is scoped to its endpoint and bound to its request
+        self.assertEqual(self.client.post('/guides', json={'url': 'https://example.com/other', 'category': 'blogpost'},
+                                          headers=headers).status_code, 422)
+        response = self.client.post('/feedback', json={'feedback_type': 'bug', 'summary': 's', 'details': 'd'}, headers=headers)
+        self.assertEqual(response.status_code, 202)
+        self.client.post('/feedback', json={'feedback_type': 'bug', 'summary': 's', 'details': 'd'}, headers=headers)
+        self.assertEqual(apply_pending(app)['applied'], 1)
+
+        # Multipart retries match on fields and file contents, not the boundary
+        def upload():
+            return self.client.post('/showcase/projects', headers={'Idempotency-Key': 'upload-1'}, data={
+                'project-title': 'Shots', 'project-category': 'web', 'project-description': 'd',
+                'project-image': (io.BytesIO(b'fake png'), 'shot.png')}, content_type='multipart/form-data')
+        with tempfile.TemporaryDirectory() as tmp, mock.patch.dict(app.config, {'UPLOAD_FOLDER': tmp}):
+            self.assertEqual([upload().status_code, upload().headers.get('Idempotent-Replayed')], [201, 'true'])
+        self.assertEqual(db.session.query(ShowcaseProject).count(), 1)
+
+        # Expired keys run again
+        db.session.execute(db.text("UPDATE idempotency_keys SET expires_at = '2000-01-01 00:00:00'"))
+        db.session.commit()
+        self.assertEqual(self.client.post('/prompts', json={'title': 'T', 'category': 'c', 'prompt_text': 'p'},
+                                          headers=headers).status_code, 201)
+        self.assertEqual(db.session.query(IdempotencyKey).count(), 1) # The rest were purged
+        self.assertEqual(self.client.post('/guides', json={}, headers={'Idempotency-Key': 'x' * 300}).status_code, 400)
+
+    def test_43_idempotency_key_collapses_concurrent_duplicates(self):
+        """Test that concurrent requests with one Idempotency-Key create one row and get the same response"""
+        responses = []
+        def post():
+            with app.test_client() as client:
+                response = client.post('/prompts', json={'title': 'Once', 'category': 'c', 'prompt_text': 'p'},
+                                       headers={'Idempotency-Key': 'burst'})
+                responses.append((response.status_code, response.get_json()['prompt']['id']))
+        threads = [threading.Thread(target=post) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(set(responses)), 1)
+        self.assertEqual(responses[0][0], 201)
+        self.assertEqual(db.session.query(Prompt).count(), 1)
+
+        # A claim another process is still working on answers 409 rather than running twice
+        db.session.execute(db.text("UPDATE idempotency_keys SET status_code = NULL, expires_at = '2100-01-01 00:00:00'"))
+        db.session.commit()
+        response = self.client.post('/prompts', json={'title': 'Once', 'category': 'c', 'prompt_text': 'p'},
+                                    headers={'Idempotency-Key': 'burst'})
+        self.assertEqual((response.status_code, response.headers['Retry-After']), (409, '1'))
+
+    # --- Tests for /batch ---
+
+    def test_44_batch_runs_sub_requests_with_per_item_status(self):
+        """Test that /batch dispatches reads and writes in order and reports each status"""
+        self.client.post('/prompts', json={'title': 'First', 'category': 'Testing', 'prompt_text': 'p'})
+        response = self.client.post('/batch', json={'requests': [
+            {'path': '/prompts?category=Testing'},
+            {'path': '/prompts/categories'},
+            {'method': 'POST', 'path': '/guides', 'body': {'url': 'https://example.com/batched', 'category': 'video'}},
+            {'path': '/guides'},
+            {'method': 'POST', 'path': '/guides', 'body': {'url': 'https://example.com/batched', 'category': 'video'}},
+            {'path': '/showcase/projects?limit=1'},
+            {'path': '/changes?since=bad'},
+            {'path': '/nowhere'},
+            {'path': '/events'},
+            {'method': 'POST', 'path': '/batch', 'body': {'requests': []}},
+        ]})
+        self.assertEqual(response.status_code, 200)
+        entries = json.loads(response.data)['responses']
+        self.assertEqual([e['status'] for e in entries], [200, 200, 201, 200, 409, 200, 400, 404, 400, 400])
+        self.assertEqual([p['title'] for p in entries[0]['body']], ['First'])
+        self.assertEqual(entries[1]['body'], [{'name': 'Testing', 'count': 1}])
+        self.assertEqual([g['url'] for g in entries[3]['body']], ['https://example.com/batched']) # Sees the write before it
+        self.assertEqual(entries[0]['headers']['Content-Type'], 'application/json')
+
+        for body in ({}, {'requests': [{'path': 'prompts'}]}, {'requests': [{'path': '/x', 'method': 'TRACE'}]},
+                     {'requests': [{'path': '/prompts', 'method': 5}]},
+                     {'requests': [{'path': '/prompts'}] * 21}):
+            self.assertEqual(self.client.post('/batch', json=body).status_code, 400)
+
+    def test_45_batch_reads_share_one_connection_and_snapshot(self):
+        """Test that consecutive reads in a batch run on one connection inside one read transaction"""
+        import batch
+        original, seen = batch.dispatch, []
+        def dispatch(app_, item, parent):
+            connection = db.session.connection().connection.driver_connection
+            seen.append((item['method'], id(connection), connection.in_transaction))
+            return original(app_, item, parent)
+        with mock.patch.object(batch, 'dispatch', dispatch):
+            response = self.client.post('/batch', json={'requests': [
+                {'path': '/projects/feed'}, {'path': '/guides'},
+                {'method': 'POST', 'path': '/submit_project_data', 'body': {'name': 'n', 'description': 'd', 'url': 'u'}},
+                {'path': '/projects/feed'}]})
+        self.assertEqual([e['status'] for e in json.loads(response.data)['responses']], [200, 200, 201, 200])
+        self.assertEqual(seen[0][1], seen[1][1])
+        self.assertEqual([(method, snapshot) for method, _, snapshot in seen],
+                         [('GET', True), ('GET', True), ('POST', False), ('GET', True)])
+        self.assertEqual(json.loads(response.data)['responses'][3]['body'][0]['name'], 'n')
+
+    def test_46_serializers_match_orm_objects_and_both_json_backends(self):
+        """Test that plain rows and model instances serialize alike, and that both JSON backends agree"""
+        import serializers
+        from decimal import Decimal
+        from json_provider import FastJSONProvider
+        self.client.post('/prompts', json={'title': 'Café', 'category': 'code', 'prompt_text': 'Explain', 'rating': '4.5'})
+        with app.app_context():
+            prompt = db.session.query(Prompt).one()
+            from_object = serializers.SERIALIZERS['prompts'].obj(prompt)
+        listed = json.loads(self.client.get('/prompts').data)
+        self.assertEqual(listed, [from_object])
+        self.assertEqual((from_object['rating'], from_object['is_featured']), ('4.50', False))
+        self.assertNotIn(' ', from_object['created_at'])
+
+        payload = {'id': 1, 'price': Decimal('1.50'), 'names': ['é', None], 2: True}
+        provider = FastJSONProvider(app)
+        encoded = []
+        for backend in ('orjson', 'json'):
+            if backend == 'orjson' and serializers.orjson is None:
+                continue
+            with mock.patch.object(serializers, 'JSON_BACKEND', backend), app.test_request_context():
+                encoded.append(provider.response(payload).get_data())
+                self.assertEqual(provider.loads(encoded[-1]), {'id': 1, 'price': '1.50', 'names': ['é', None], '2': True})
+        self.assertEqual(len(set(encoded)), 1)
+
+    def test_47_list_content_negotiation(self):
+        """Test that prompts come back as JSON, columnar JSON or MessagePack as the Accept header asks, from Flask and Netlify"""
+        from response_formats import COLUMNAR, MSGPACK, unpackb
+        for title in ('Refactor', 'Review'):
+            self.client.post('/prompts', json={'title': title, 'category': 'code', 'prompt_text': 'Do it', 'rating': '4'})
+        expected = json.loads(self.client.get('/prompts?sort_by=title').data)
+        self.assertEqual([p['title'] for p in expected], ['Refactor', 'Review'])
+
+        response = self.client.get('/prompts?sort_by=title', headers={'Accept': COLUMNAR})
+        self.assertEqual(response.mimetype, COLUMNAR)
+        self.assertIn('Accept', response.vary)
+        columnar = json.loads(response.data)
+        self.assertEqual([dict(zip(columnar['columns'], row)) for row in columnar['rows']], expected)
+        response = self.client.get('/prompts?sort_by=title', headers={'Accept': 'application/x-msgpack, */*;q=0.5'})
+        self.assertEqual(response.mimetype, MSGPACK)
+        self.assertEqual(unpackb(response.data), expected)
+        self.assertEqual(self.client.get('/guides', headers={'Accept': 'text/html'}).mimetype, 'application/json')
+
+        with tempfile.TemporaryDirectory() as tmp:
+            function = load_netlify_function('prompts', os.path.join(tmp, 'community.db'))
+            function.handler({'httpMethod': 'POST', 'body': json.dumps({'title': 'Refactor', 'category': 'code', 'prompt_text': 'Do it', 'rating': '4'})}, None)
+            get = lambda accept: function.handler({'httpMethod': 'GET', 'queryStringParameters': {}, 'headers': {'accept': accept}}, None)
+            records = json.loads(get('application/json')['body'])
+            self.assertEqual(records[0]['rating'], '4.00')
+            packed = get(MSGPACK)
+            self.assertTrue(packed['isBase64Encoded'])
+            self.assertEqual(unpackb(base64.b64decode(packed['body'])), records)
+            columnar = json.loads(get(COLUMNAR)['body'])
+            self.assertEqual([dict(zip(columnar['columns'], row)) for row in columnar['rows']], records)
+
+        # Batched, the MessagePack body is base64 encoded inside the JSON envelope
+        entries = self.client.post('/batch', json={'requests': [
+            {'path': '/prompts?sort_by=title', 'headers': {'Accept': MSGPACK}},
+            {'path': '/guides', 'headers': {'Accept': MSGPACK}},
+            {'path': '/prompts?sort_by=title', 'headers': {'Accept': COLUMNAR}}]}).get_json()['responses']
+        self.assertEqual([e['status'] for e in entries], [200, 200, 200])
+        self.assertTrue(entries[0]['base64'])
+        self.assertEqual(unpackb(base64.b64decode(entries[0]['body'])), expected)
+        self.assertEqual(unpackb(base64.b64decode(entries[1]['body'])), [])
+        self.assertNotIn('base64', entries[2])
+        self.assertEqual(len(entries[2]['body']['rows']), 2)
+
+    def test_48_json_responses_are_compressed_and_reused(self):
+        """Test gzip per Accept-Encoding above the size threshold, the compressed body cache, and the Netlify wrapper"""
+        import compression
+        compression.compressed_cache.clear()
+        for n in range(20):
+            self.client.post('/prompts', json={'title': f'Prompt {n}', 'category': 'code', 'prompt_text': 'Explain this code ' * 20})
+        plain = self.client.get('/prompts')
+        self.assertNotIn('Content-Encoding', plain.headers)
+        self.assertIn('Accept-Encoding', plain.vary)
+        for _ in range(2):
+            response = self.client.get('/prompts', headers={'Accept-Encoding': 'gzip, deflate'})
+            self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+            self.assertEqual(gzip.decompress(response.data), plain.data)
+            self.assertLess(len(response.data) * 5, len(plain.data))
+        self.assertEqual(compression.compressed_cache.stats()['hits'], 1)
+        self.assertNotIn('Content-Encoding', self.client.get('/settings/missing', headers={'Accept-Encoding': 'gzip'}).headers)
+        self.assertNotIn('Content-Encoding', self.client.get('/prompts', headers={'Accept-Encoding': 'gzip;q=0, identity'}).headers)
+        self.assertEqual(compression.choose_encoding('br;q=0.5, gzip;q=0.8', ('br', 'gzip')), 'gzip')
+        self.assertEqual(compression.choose_encoding('*', ('br', 'gzip')), 'br')
+
+        with tempfile.TemporaryDirectory() as tmp:
+            function = load_netlify_function('prompts', os.path.join(tmp, 'community.db'))
+            function.handler({'httpMethod': 'POST', 'body': json.dumps({'title': 'x', 'category': 'c', 'prompt_text': 'y' * 2000})}, None)
+            event = {'httpMethod': 'GET', 'queryStringParameters': {}, 'headers': {'Accept-Encoding': 'gzip'}}
+            response = function.handler(event, None)
+            self.assertEqual((response['headers']['Content-Encoding'], response['isBase64Encoded']), ('gzip', True))
+            self.assertEqual(json.loads(gzip.decompress(base64.b64decode(response['body'])))[0]['title'], 'x')
+
+    def test_49_read_only_gets_use_the_read_pool_until_a_write(self):
+        """Test marked GETs on the read-only engine, read-your-writes pinning after a POST, and batch sub-requests on the primary"""
+        import read_routing
+        from sqlalchemy import make_url
+        from sqlalchemy.exc import OperationalError
+        router = app.extensions['read_router']
+        self.assertEqual(db.session.execute(db.text('PRAGMA journal_mode')).scalar(), 'wal')
+        with router.engine.connect() as conn:
+            with self.assertRaises(OperationalError):
+                conn.exec_driver_sql("INSERT INTO settings (key, value) VALUES ('k', 'v')")
+
+        db.session.add(Prompt(title='Seeded', category='code', prompt_text='x'))
+        db.session.commit()
+        before = router.stats()
+        response = self.client.get('/prompts')
+        self.assertEqual([p['title'] for p in response.get_json()], ['Seeded'])
+        self.client.get('/settings/missing') # Not marked, so not counted
+        self.assertEqual(router.stats()['read'], before['read'] + 1)
+
+        response = self.client.post('/prompts', json={'title': 'Mine', 'category': 'code', 'prompt_text': 'y'})
+        self.assertIn(f'{read_routing.PIN_COOKIE}=1', response.headers['Set-Cookie'])
+        self.assertIn('Max-Age=5', response.headers['Set-Cookie'])
+        self.assertEqual(len(self.client.get('/prompts').get_json()), 2)
+        self.assertEqual(router.stats()['pinned'], before['pinned'] + 1)
+
+        response = app.test_client().post('/batch', json={'requests': [{'path': '/prompts'}]})
+        self.assertEqual(len(response.get_json()['responses'][0]['body']), 2)
+        self.assertEqual(router.stats(), {'read': before['read'] + 1, 'pinned': before['pinned'] + 2})
+
+        self.assertIsNone(read_routing.read_url(make_url('sqlite://')))
+        self.assertIn('mode=ro', str(read_routing.read_url(make_url('sqlite:///a.db'))))
+
+    def test_50_stock_reservations_never_oversell(self):
+        """Test concurrent multi-SKU reservations against limited stock, then commit, release and expiry"""
+        import stock_reservations
+        for sku in ('A-1', 'B-2'):
+            self.client.post('/products', json={'name': sku, 'price': '1.00', 'sku': sku, 'stock_quantity': 25})
+        statuses = []
+
+        def buyer(n):
+            client = app.test_client()
+            for _ in range(10):
+                items = [{'sku': 'A-1', 'quantity': 1 + n % 2}, {'sku': 'B-2', 'quantity': 1}]
+                statuses.append(client.post('/stock/reservations', json={'items': items}).status_code)
+
+        threads = [threading.Thread(target=buyer, args=(n,)) for n in range(12)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(set(statuses), {201, 409})
+        db.session.expire_all()
+        stock = {p.sku: p.stock_quantity for p in db.session.query(Product)}
+        held = {sku: sum(r.quantity for r in db.session.query(StockReservation).join(Product).filter(Product.sku == sku))
+                for sku in stock}
+        for sku in stock:
+            self.assertGreaterEqual(stock[sku], 0)
+            self.assertEqual(stock[sku] + held[sku], 25)
+        self.assertEqual(statuses.count(201), db.session.query(StockReservation.token).distinct().count())
+
+        self.client.post('/products', json={'name': 'C', 'price': '1.00', 'sku': 'C-3', 'stock_quantity': 3})
+        response = self.client.post('/stock/reservations', json={'items': [{'sku': 'C-3', 'quantity': 2}, {'sku': 'A-1', 'quantity': 99}]})
+        self.assertEqual((response.status_code, response.get_json()['sku']), (409, 'A-1'))
+        self.assertEqual(self.client.post('/stock/reservations', json={'items': [{'sku': 'nope'}]}).status_code, 404)
+        self.assertEqual(self.client.post('/stock/reservations', json={'items': [{'sku': 'C-3', 'quantity': 0}]}).status_code, 400)
+        first = self.client.post('/stock/reservations', json={'items': [{'sku': 'C-3', 'quantity': 2}]}).get_json()['reservation']
+        second = self.client.post('/stock/reservations', json={'items': [{'sku': 'C-3'}]}).get_json()['reservation']
+        self.assertEqual(self.client.post(f"/stock/reservations/{first['token']}/release").status_code, 200)
+        self.assertEqual(self.client.post(f"/stock/reservations/{first['token']}/commit").get_json()['status'], 'released')
+        self.assertEqual(self.client.post(f"/stock/reservations/{second['token']}/commit").status_code, 200)
+        self.assertEqual(self.client.post('/stock/reservations/missing/release').status_code, 404)
+        db.session.expire_all()
+        self.assertEqual(db.session.query(Product).filter_by(sku='C-3').one().stock_quantity, 2)
+
+        third = self.client.post('/stock/reservations', json={'items': [{'sku': 'C-3', 'quantity': 2}], 'ttl_seconds': 60}).get_json()['reservation']
+        self.assertEqual(stock_reservations.expire_reservations(db.session, stock_reservations.utcnow() + timedelta(minutes=2)), 1)
+        db.session.commit()
+        self.assertEqual(db.session.query(Product).filter_by(sku='C-3').one().stock_quantity, 2)
+        response = self.client.post(f"/stock/reservations/{third['token']}/commit")
+        self.assertEqual((response.status_code, response.get_json()['status']), (409, 'expired'))
+
+    def test_51_product_catalog_filters_sorts_and_pages(self):
+        """Test price, name prefix and stock filters, keyset pages for every sort on its index, and batch lookup"""
+        from decimal import Decimal
+        from pagination import encode_cursor
+        from product_query import ProductQuery
+        names = ['apple', 'Apricot', 'banana', 'Blueberry', 'cherry', 'APPLE pie', 'date', 'elderberry']
+        db.session.add_all([Product(name=name, price=Decimal(f'{n % 4 + 1}.50'), sku=f'F-{n}', stock_quantity=n % 3)
+                            for n, name in enumerate(names)])
+        db.session.commit()
+
+        for sort, key in (('name', lambda p: (p['name'].lower(), p['id'])), ('-price', lambda p: (-Decimal(p['price']), -p['id'])),
+                          ('created_at', lambda p: (p['created_at'], p['id']))):
+            seen, cursor = [], None
+            while True:
+                response = self.client.get('/products', query_string={'sort': sort, 'limit': 3, 'cursor': cursor or ''})
+                self.assertEqual(response.status_code, 200, response.data.decode())
+                seen += response.get_json()
+                cursor = response.headers.get('X-Next-Cursor')
+                if not cursor:
+                    break
+            self.assertEqual(len(seen), len(names))
+            self.assertEqual(seen, sorted(seen, key=key))
+
+        def skus(**args):
+            return sorted(p['sku'] for p in self.client.get('/products', query_string=args).get_json())
+        self.assertEqual(skus(name='ap'), ['F-0', 'F-1', 'F-5'])
+        self.assertEqual(skus(min_price='2', max_price='3'), ['F-1', 'F-5'])
+        self.assertEqual(skus(in_stock='true', name='b'), ['F-2'])
+        self.assertEqual(skus(in_stock='false'), ['F-0', 'F-3', 'F-6'])
+        for args in ({'sort': 'sku'}, {'min_price': 'abc'}, {'min_price': '5', 'max_price': '1'}, {'in_stock': 'maybe'},
+                     {'sort': 'price', 'cursor': 'WyJuYW1lIiwiYSIsMV0'}, # A cursor for sort=name
+                     *({'sort': 'name', 'cursor': encode_cursor(['name', key, last])}
+                       for key, last in (({'a': 1}, 1), ([], 1), (True, 1), ('a', '1'), ('a', True), ('a', 2 ** 64)))):
+            self.assertEqual(self.client.get('/products', query_string=args).status_code, 400, args)
+
+        for sort, index in (('name', 'ix_products_name_nocase'), ('-price', 'ix_products_price'), ('created_at', 'ix_products_created_at')):
+            sql, params = ProductQuery(sort=sort, cursor=None).sql()
+            plan = ' '.join(row[3] for row in db.session.execute(db.text('EXPLAIN QUERY PLAN ' + sql), params))
+            self.assertIn(index, plan)
+            self.assertNotIn('TEMP B-TREE', plan)
+        narrow, _ = ProductQuery(min_price='500').sql(lambda sql, params: 10)
+        wide, _ = ProductQuery(min_price='1').sql(lambda sql, params: 10 ** 6)
+        self.assertIn('INDEXED BY ix_products_price', narrow)
+        self.assertIn('+price >=', wide)
+
+        response = self.client.get('/products/lookup?sku=F-3,F-1&sku=nope&id=1,999')
+        data = response.get_json()
+        first_id = db.session.query(Product).filter_by(sku='F-0').one().id
+        self.assertEqual([p['sku'] for p in data['products']][:2], ['F-3', 'F-1'])
+        self.assertEqual(data['missing'], {'skus': ['nope'], 'ids': [i for i in (1, 999) if i < first_id or i >= first_id + len(names)]})
+        self.assertEqual(self.client.get('/products/lookup').status_code, 400)
+        self.assertEqual(self.client.get('/products/lookup?id=99999999999999999999999').status_code, 400)
+
+    def test_52_guide_enrichment_fetches_public_http_only(self):
+        """Test that enrichment refuses private addresses and redirects off http(s)"""
+        import asyncio
+        from guide_enrichment import Fetcher, fetch_metadata, is_public_address
+
+        self.assertFalse(any(map(is_public_address, ['127.0.0.1', '10.1.2.3', '169.254.169.254', '::1',
+                                                       '::ffff:192.168.0.1', 'fe80::1%eth0', '0.0.0.0', '240.0.0.1'])))
+        self.assertTrue(is_public_address('93.184.216.34'))
+
+        site = StubSite()
+        self.addCleanup(site.close)
+        def fetch(url, allow_private):
+            fetcher = Fetcher(concurrency=2, per_host=2, timeout=2.0, retries=0, backoff=0.0, allow_private=allow_private)
+            try:
+                return asyncio.run(fetch_metadata(fetcher, url))
+            finally:
+                fetcher.close()
+
+        status, error = fetch(site.url + '/article', allow_private=False)
+        self.assertEqual(status, 'failed')
+        self.assertIn('non-public address 127.0.0.1', error)
+        self.assertNotIn('/article', site.hits)
+        self.assertEqual(fetch(site.url + '/article', allow_private=True)[0], 'done')
+
+        status, error = fetch(site.url + '/to-ftp', allow_private=True)
+        self.assertEqual(status, 'failed')
+        self.assertIn('Not an http(s) URL: ftp://127.0.0.1/secret', error)
+        self.assertEqual(fetch('ftp://example.com/guide', allow_private=True), ('failed', 'Fetch failed: Not an http(s) URL: ftp://example.com/guide'))
+        self.assertEqual(fetch('http://[', allow_private=True), ('failed', 'Fetch failed: Not a valid URL: http://['))
+        response = self.client.post('/guides', data=json.dumps({"url": "http://[", "category": "blogpost"}),
+                                    content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('error', response.get_json())
+
+    def test_53_feedback_export_waits_for_queued_submissions(self):
+        """Test that an incremental feedback export picks up a submission applied after it ran"""
+        with tempfile.TemporaryDirectory() as tmp:
+            queue = self.use_feedback_queue(tmp)
+            # Queued a while ago, by a process whose applier hasn't run since
+            with mock.patch('feedback_queue.datetime') as clock:
+                clock.now.return_value = datetime(2025, 6, 1, 12, 0, 0, 500000, tzinfo=timezone.utc)
+                queue.append({"feedback_type": "bug", "summary": "Queued", "details": "Details"})
+            first = self.client.get('/export/feedback')
+            self.assertEqual(first.data, b'')
+            until = first.headers['X-Export-Until']
+            self.assertEqual(until, '2025-06-01 12:00:00')
+
+            self.assertEqual(apply_pending(app), {'applied': 1, 'skipped': 0})
+            rows = self.client.get(f'/export/feedback?since={until}&until=2100-01-01').data.decode().splitlines()
+            self.assertEqual([json.loads(row)['summary'] for row in rows], ['Queued'])
+
+    def test_54_feedback_applier_waits_for_the_first_request(self):
+        """Test that building the app leaves a leftover log alone until the app serves a request"""
+        with tempfile.TemporaryDirectory() as tmp:
+            leftover = FeedbackQueue(tmp)
+            leftover.append({"feedback_type": "bug", "summary": "Left behind", "details": "Queued before a restart"})
+            leftover.close()
+
+            second_app = create_app({'SQLALCHEMY_DATABASE_URI': f'sqlite:///{TEST_DB_FILE}',
+                                     'LOG_FILE': os.path.join(tmp, 'app.log'), 'GUIDE_ENRICHMENT': 'off',
+                                     'FEEDBACK_QUEUE_DIR': tmp})
+            applier = second_app.extensions['feedback_applier']
+            def shutdown():
+                applier.stop(5)
+                second_app.extensions['read_router'].dispose()
+                with second_app.app_context():
+                    db.engine.dispose()
+                shutdown_logging(second_app)
+            self.addCleanup(shutdown)
+            self.assertTrue(applier.idle.is_set()) # Nothing asked the applier for a pass
+            self.assertEqual(db.session.query(Feedback).count(), 0)
+
+            self.assertEqual(second_app.test_client().get('/feedback/queue').status_code, 200)
+            self.assertTrue(applier.idle.wait(10))
+            self.assertEqual([summary for summary, in db.session.query(Feedback.summary)], ['Left behind'])
+
+    def test_55_product_name_prefix_edges(self):
+        """Test name prefixes ending in '@' or the last code point, which have no plain next character"""
+        from decimal import Decimal
+        from product_query import prefix_bounds
+        self.assertEqual(prefix_bounds('R2@'), ('r2@', 'r2['))
+        self.assertEqual(prefix_bounds('x\U0010ffff'), ('x\U0010ffff', 'y'))
+        self.assertEqual(prefix_bounds('\U0010ffff'), ('\U0010ffff', None))
+
+        names = ['R2@home', 'r2@Work', 'R2[beta]', 'R2_d2', 'R2a', 'r2b', '\U0010ffff max', '\U0010ffff\U0010ffff']
+        db.session.add_all([Product(name=name, price=Decimal('1.00'), sku=f'E-{n}') for n, name in enumerate(names)])
+        db.session.commit()
+        def matching(prefix):
+            return sorted(p['name'] for p in self.client.get('/products', query_string={'name': prefix}).get_json())
+        self.assertEqual(matching('r2@'), ['R2@home', 'r2@Work'])
+        self.assertEqual(matching('R2'), sorted(names[:6]))
+        self.assertEqual(matching('\U0010ffff'), sorted(names[6:]))
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,107 @@
+"""
+Canonical URLs and URL hashes for deduplicating submitted guides
+
+Two submissions count as the same guide when their canonical forms match.
+Canonicalisation:
+    - surrounding whitespace is dropped and a missing scheme means https
+    - http and https are treated alike (both become https)
+    - the host is lowercased and default ports are dropped
+    - trailing slashes and the #fragment are dropped
+    - tracking parameters (utm_*, fbclid, gclid, ...) are dropped and the
+      remaining query parameters are sorted
+
+The guides table stores the URL as submitted next to `url_hash(url)`, a
+fixed-width hash of the canonical form with a unique index, so the duplicate
+check is a single INSERT ... ON CONFLICT DO NOTHING and lookups by URL probe a
+short index entry instead of a 255 character string. Only the standard library
+is used so the Netlify bundle can import this module.
+
+A URL urlsplit can't parse (e.g. 'http://[') raises InvalidURL, a ValueError,
+which the endpoints answer with a 400. `validate_url` is the rule both the
+Flask app and the Netlify function apply to new submissions.
+"""
+
+import hashlib
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+# Hex characters kept from the SHA-256 of the canonical URL (128 bits)
+URL_HASH_LENGTH = 32
+
+TRACKING_PARAMS = {'fbclid', 'gclid', 'dclid', 'msclkid', 'igshid', 'mc_cid', 'mc_eid', 'ref_src', 'si'}
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+
+class InvalidURL(ValueError):
+    """A URL that can't be parsed, or isn't an http(s) URL with a host"""
+
+
+def validate_url(url):
+    """Raise InvalidURL unless `url` is an http(s) URL with a host"""
+    try:
+        parts = urlsplit(url)
+        hostname = parts.hostname
+    except ValueError: # e.g. an unclosed IPv6 bracket
+        raise InvalidURL(f'Not a valid URL: {url[:500]}')
+    if parts.scheme not in ('http', 'https') or not hostname:
+        raise InvalidURL(f'Not an http(s) URL: {url[:500]}')
+
+
+def _is_tracking_param(name):
+    name = name.lower()
+    return name.startswith('utm_') or name in TRACKING_PARAMS
+
+
+def normalize_url(url):
+    """Return the canonical form of `url` used for duplicate detection"""
+    url = url.strip()
+    if '://' not in url:
+        url = f'https://{url}'
+    try:
+        parts = urlsplit(url)
+        hostname = parts.hostname
+    except ValueError as e:
+        raise InvalidURL(f'Not a valid URL: {e}')
+    scheme = parts.scheme.lower()
+    if scheme == 'http':
+        scheme = 'https'
+
+    host = (hostname or '').rstrip('.')
+    try:
+        port = parts.port
+    except ValueError:
+        port = None
+    if port and port != DEFAULT_PORTS.get(parts.scheme.lower()):
+        host = f'{host}:{port}'
+
+    path = parts.path.rstrip('/')
+    query = urlencode(sorted((k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+                             if not _is_tracking_param(k)))
+    return urlunsplit((scheme, host, path, query, ''))
+
+
+def url_hash(url):
+    """Fixed-width hash of the canonical form of `url`"""
+    return hashlib.sha256(normalize_url(url).encode('utf-8')).hexdigest()[:URL_HASH_LENGTH]
+
+
+GUIDES_HASH_INDEX_DDL = 'CREATE UNIQUE INDEX IF NOT EXISTS ix_guides_url_hash ON guides (url_hash)'
+
+# Keeps the first submission of every canonical URL
+MERGE_DUPLICATE_GUIDES_SQL = 'DELETE FROM guides WHERE id NOT IN (SELECT MIN(id) FROM guides GROUP BY url_hash)'
+
+
+def ensure_guides_url_hash(conn):
+    """Bring a sqlite3 guides table up to the url_hash schema
+
+    Adds and backfills the column, merges duplicate guides into the oldest
+    submission and creates the unique index. Does nothing once the index exists.
+    """
+    if conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'ix_guides_url_hash'").fetchone():
+        return
+    columns = [row[1] for row in conn.execute('PRAGMA table_info(guides)')]
+    if 'url_hash' not in columns:
+        conn.execute('ALTER TABLE guides ADD COLUMN url_hash TEXT')
+    rows = conn.execute('SELECT id, url FROM guides WHERE url_hash IS NULL').fetchall()
+    conn.executemany('UPDATE guides SET url_hash = ? WHERE id = ?', [(url_hash(url), id) for id, url in rows])
+    conn.execute(MERGE_DUPLICATE_GUIDES_SQL)
+    conn.execute(GUIDES_HASH_INDEX_DDL)